@@ -0,0 +1,121 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.user import User
+from models.connection import Connection, ConnectionRequest
+from extensions import db
+
+connections_bp = Blueprint('connections', __name__)
+
+
+@connections_bp.route('/api/connections', methods=['GET'])
+@jwt_required()
+def get_connections():
+    """List the current user's connections"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, min(int(request.args.get('per_page', 50)), 100))
+        
+        users = User.query.filter(User.id.in_(Connection.connected_ids_query(current_user_id)))\
+            .order_by(User.id)\
+            .limit(per_page + 1)\
+            .offset((page - 1) * per_page)\
+            .all()
+        
+        return jsonify({
+            'connections': [user.to_summary_dict() for user in users[:per_page]],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'has_more': len(users) > per_page
+            }
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching connections: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@connections_bp.route('/api/connections/requests', methods=['GET'])
+@jwt_required()
+def get_connection_requests():
+    """List pending requests sent to the current user, newest first"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        rows = db.session.execute(
+            db.select(ConnectionRequest, User)
+              .join(User, User.id == ConnectionRequest.requester_id)
+              .where(ConnectionRequest.addressee_id == current_user_id)
+              .order_by(ConnectionRequest.created_at.desc())
+              .limit(100)
+        ).all()
+        
+        requests = []
+        for connection_request, user in rows:
+            request_dict = connection_request.to_dict()
+            request_dict['requester'] = user.to_summary_dict()
+            requests.append(request_dict)
+        
+        return jsonify({'requests': requests}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching connection requests: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@connections_bp.route('/api/connections/<int:user_id>', methods=['POST'])
+@jwt_required()
+def request_connection(user_id):
+    """Send a connection request (accepted at once if the other user already asked)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            status = Connection.request(current_user_id, user_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'status': status}), 201 if status == 'pending' else 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error requesting connection: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@connections_bp.route('/api/connections/<int:user_id>/accept', methods=['POST'])
+@jwt_required()
+def accept_connection(user_id):
+    """Accept a pending request from user_id"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not Connection.accept(current_user_id, user_id):
+            return jsonify({'error': 'Connection request not found'}), 404
+        
+        return jsonify({'status': 'connected'}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error accepting connection: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@connections_bp.route('/api/connections/<int:user_id>', methods=['DELETE'])
+@jwt_required()
+def remove_connection(user_id):
+    """Disconnect, or withdraw/decline a pending request"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not Connection.remove(current_user_id, user_id):
+            return jsonify({'error': 'Connection not found'}), 404
+        
+        return jsonify({'message': 'Connection removed'}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error removing connection: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
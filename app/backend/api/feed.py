@@ -1,5 +1,172 @@
-from flask import Blueprint
+import math
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.user import User
+from models.follow import Follow
+from extensions import db
+from utils import decode_time_cursor
+from services.feed import (
+    read_home_feed, read_user_feed, backfill_follow, remove_follow
+)
+from services.ranking import rank_feed, DEFAULT_WEIGHTS
 
 feed_bp = Blueprint('feed', __name__)
- 
-# Routes will be implemented here 
\ No newline at end of file
+
+
+def feed_page_args():
+    """Parse per_page and cursor query args; raises ValueError on a bad cursor"""
+    per_page = max(1, min(int(request.args.get('per_page', 20)), 50))
+    cursor_token = request.args.get('cursor')
+    cursor = decode_time_cursor(cursor_token) if cursor_token else None
+    return per_page, cursor
+
+
+def weight_arg(name):
+    """A finite float query arg; raises ValueError for anything else, nan and inf included"""
+    value = float(request.args[name])
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def feed_response(posts, per_page, next_cursor):
+    return jsonify({
+        'posts': [post.to_dict() for post in posts],
+        'pagination': {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+    }), 200
+
+
+@feed_bp.route('/api/feed', methods=['GET'])
+@jwt_required()
+def get_home_feed():
+    """Home feed: posts from the user and everyone they follow, newest first"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        try:
+            per_page, cursor = feed_page_args()
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        posts, next_cursor = read_home_feed(current_user_id, per_page=per_page, cursor=cursor)
+        return feed_response(posts, per_page, next_cursor)
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching home feed: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@feed_bp.route('/api/feed/ranked', methods=['GET'])
+@jwt_required()
+def get_ranked_feed():
+    """Home feed ordered by relevance score instead of time"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, min(int(request.args.get('per_page', 20)), 50))
+        
+        # weight_<name>=<float> overrides a configured weight, for tuning
+        weights = {
+            name: weight_arg(f'weight_{name}')
+            for name in DEFAULT_WEIGHTS if f'weight_{name}' in request.args
+        }
+        
+        posts, scores, has_more = rank_feed(current_user_id, page=page, per_page=per_page, weights=weights)
+        
+        post_dicts = []
+        for post, score in zip(posts, scores):
+            post_dict = post.to_dict()
+            post_dict['rank_score'] = round(score, 6)
+            post_dicts.append(post_dict)
+        
+        return jsonify({
+            'posts': post_dicts,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'has_more': has_more
+            }
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid ranking parameters'}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error fetching ranked feed: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@feed_bp.route('/api/feed/user/<int:user_id>', methods=['GET'])
+@jwt_required()
+def get_user_feed(user_id):
+    """A single user's posts; private posts are only shown to their author"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            per_page, cursor = feed_page_args()
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        posts, next_cursor = read_user_feed(user_id, current_user_id, per_page=per_page, cursor=cursor)
+        return feed_response(posts, per_page, next_cursor)
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching user feed: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@feed_bp.route('/api/feed/follow/<int:user_id>', methods=['POST'])
+@jwt_required()
+def follow_user(user_id):
+    """Follow a user and pull their recent posts into the home feed"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            followed = Follow.follow(current_user_id, user_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if followed:
+            backfill_follow(current_user_id, user_id)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'User followed' if followed else 'Already following',
+            'following': True
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error following user: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@feed_bp.route('/api/feed/follow/<int:user_id>', methods=['DELETE'])
+@jwt_required()
+def unfollow_user(user_id):
+    """Unfollow a user and drop their posts from the home feed"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if Follow.unfollow(current_user_id, user_id):
+            remove_follow(current_user_id, user_id)
+        db.session.commit()
+        
+        return jsonify({'message': 'User unfollowed', 'following': False}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error unfollowing user: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -1,5 +1,282 @@
-from flask import Blueprint
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.job import Job, JobApplication
+from extensions import db
+from services.jobs import parse_filters, search_jobs, facet_counts
+from services.matching import refresh_job_matches, recommended_jobs, top_candidates
 
 jobs_bp = Blueprint('jobs', __name__)
- 
-# Routes will be implemented here 
\ No newline at end of file
+
+# Fields a poster may set when creating or updating a job
+JOB_FIELDS = ('title', 'company', 'description', 'location', 'company_size', 'employment_type',
+              'experience_years', 'skills', 'salary_min', 'salary_max')
+
+
+def job_fields(data):
+    """Pick and coerce the editable job fields from a JSON body"""
+    fields = {key: data[key] for key in JOB_FIELDS if key in data}
+    for key in ('title', 'company', 'description', 'location'):
+        if isinstance(fields.get(key), str):
+            fields[key] = fields[key].strip()
+    for key in ('experience_years', 'salary_min', 'salary_max'):
+        if fields.get(key) is not None:
+            fields[key] = int(fields[key])
+    if 'skills' in fields and not isinstance(fields['skills'], list):
+        fields['skills'] = str(fields['skills']).split(',')
+    return fields
+
+
+@jobs_bp.route('/api/jobs', methods=['GET'])
+@jwt_required()
+def get_jobs():
+    """Search jobs with facet filters; facet counts come back with the page"""
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, min(int(request.args.get('per_page', 20)), 50))
+        
+        try:
+            filters = parse_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        jobs = search_jobs(filters, page=page, per_page=per_page)
+        total, facets = facet_counts(filters)
+        
+        return jsonify({
+            'jobs': [job.to_dict() for job in jobs],
+            'facets': facets,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total_count': total,
+                'total_pages': (total + per_page - 1) // per_page,
+                'has_more': page * per_page < total
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching jobs: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs', methods=['POST'])
+@jwt_required()
+def create_job():
+    """Post a new job"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            fields = job_fields(data)
+            job = Job(
+                poster_id=current_user_id,
+                title=fields.pop('title', ''),
+                company=fields.pop('company', ''),
+                description=fields.pop('description', ''),
+                **fields
+            )
+            job.save()
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        refresh_job_matches(job.id)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Job created successfully',
+            'job': job.to_dict()
+        }), 201
+    
+    except Exception as e:
+        current_app.logger.error(f"Error creating job: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_jobs():
+    """Jobs matching the current user's skills, precomputed in job_matches"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        limit = max(1, min(int(request.args.get('limit', 20)), 50))
+        
+        jobs = []
+        for job, match in recommended_jobs(current_user_id, limit):
+            job_data = job.to_dict()
+            job_data['match'] = match.to_dict()
+            jobs.append(job_data)
+        
+        return jsonify({'jobs': jobs}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching recommended jobs: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Get a job, including whether the current user applied"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        job_data = job.to_dict()
+        job_data['has_applied'] = db.session.scalar(
+            db.select(db.func.count()).where(
+                JobApplication.job_id == job_id, JobApplication.user_id == current_user_id
+            )
+        ) > 0
+        
+        return jsonify({'job': job_data}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>', methods=['PUT'])
+@jwt_required()
+def update_job(job_id):
+    """Update a job (poster only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.poster_id != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            job.update(**job_fields(request.get_json(silent=True) or {}))
+        except (TypeError, ValueError) as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        refresh_job_matches(job.id)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Job updated successfully',
+            'job': job.to_dict()
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error updating job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>', methods=['DELETE'])
+@jwt_required()
+def delete_job(job_id):
+    """Close a job posting (poster only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.poster_id != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        job.delete()
+        refresh_job_matches(job.id)
+        db.session.commit()
+        
+        return jsonify({'message': 'Job deleted successfully'}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error deleting job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>/apply', methods=['POST'])
+@jwt_required()
+def apply_for_job(job_id):
+    """Apply to a job; applying twice is rejected"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.poster_id == current_user_id:
+            return jsonify({'error': 'You cannot apply to your own job'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        application = JobApplication.apply(job_id, current_user_id, (data.get('cover_letter') or '').strip() or None)
+        if application is None:
+            return jsonify({'error': 'You have already applied to this job'}), 409
+        
+        return jsonify({
+            'message': 'Application submitted successfully',
+            'application': application.to_dict()
+        }), 201
+    
+    except Exception as e:
+        current_app.logger.error(f"Error applying for job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>/candidates', methods=['GET'])
+@jwt_required()
+def get_top_candidates(job_id):
+    """Best matching candidates for a job (poster only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        limit = max(1, min(int(request.args.get('limit', 20)), 50))
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.poster_id != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        candidates = []
+        for user, match in top_candidates(job_id, limit):
+            user_data = user.to_summary_dict()
+            user_data['experience_years'] = user.experience_years
+            user_data['match'] = match.to_dict()
+            candidates.append(user_data)
+        
+        return jsonify({'candidates': candidates}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching candidates for job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>/applications', methods=['GET'])
+@jwt_required()
+def get_job_applications(job_id):
+    """List applications to a job (poster only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = Job.find_by_id(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.poster_id != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        applications = JobApplication.query.options(db.joinedload(JobApplication.applicant))\
+            .filter_by(job_id=job_id)\
+            .order_by(JobApplication.created_at.desc())\
+            .all()
+        
+        results = []
+        for application in applications:
+            application_data = application.to_dict()
+            application_data['applicant'] = application.applicant.to_summary_dict()
+            results.append(application_data)
+        
+        return jsonify({'applications': results}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching applications for job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.media import MediaJob
+from extensions import db
+from services.videos import POST_VIDEO_KIND
+
+media_bp = Blueprint('media', __name__)
+
+
+@media_bp.route('/api/media/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_media_job(job_id):
+    """Status of one of the current user's background media jobs"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = MediaJob.find_for_user(job_id, current_user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        if job.kind == POST_VIDEO_KIND:
+            timeout = current_app.config.get('VIDEO_JOB_TIMEOUT', 1800)
+        else:
+            timeout = current_app.config.get('MEDIA_JOB_TIMEOUT', 300)
+        if job.expire_if_stale(timeout):
+            db.session.commit()
+        
+        return jsonify({'job': job.to_dict()}), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching media job {job_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
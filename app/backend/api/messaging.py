@@ -1,5 +1,243 @@
-from flask import Blueprint
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import aliased
+from models.user import User
+from models.profile import Profile
+from models.connection import Connection
+from models.message import Conversation, ConversationParticipant, Message
+from extensions import db, events
+from utils import encode_cursor, decode_time_cursor
+from services.events import StreamLimitReached, issue_stream_token, load_stream_token
 
 messaging_bp = Blueprint('messaging', __name__)
- 
-# Routes will be implemented here 
\ No newline at end of file
+
+
+def page_args(default=20, maximum=50):
+    """Parse per_page and an optional time cursor; raises ValueError on a bad cursor"""
+    per_page = max(1, min(int(request.args.get('per_page', default)), maximum))
+    cursor_token = request.args.get('cursor')
+    cursor = decode_time_cursor(cursor_token) if cursor_token else None
+    return per_page, cursor
+
+
+def before_cursor(time_column, id_column, cursor):
+    """Rows strictly after the cursor in (time desc, id desc) order"""
+    cursor_time = datetime.fromisoformat(cursor['t'])
+    return db.or_(time_column < cursor_time,
+                  db.and_(time_column == cursor_time, id_column < cursor['id']))
+
+
+@messaging_bp.route('/api/messages/conversations', methods=['GET'])
+@jwt_required()
+def get_conversations():
+    """The user's conversations, most recent activity first, in one query"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        try:
+            per_page, cursor = page_args()
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        mine = aliased(ConversationParticipant)
+        other = aliased(ConversationParticipant)
+        query = db.select(mine, User)\
+            .join(other, db.and_(other.conversation_id == mine.conversation_id, other.user_id != mine.user_id))\
+            .join(User, User.id == other.user_id)\
+            .where(mine.user_id == current_user_id)
+        if cursor:
+            query = query.where(before_cursor(mine.last_activity_at, mine.conversation_id, cursor))
+        rows = db.session.execute(
+            query.order_by(mine.last_activity_at.desc(), mine.conversation_id.desc()).limit(per_page + 1)
+        ).all()
+        
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            last = rows[-1][0]
+            next_cursor = encode_cursor({'t': last.last_activity_at.isoformat(), 'id': last.conversation_id})
+        
+        conversations = []
+        for participant, user in rows:
+            conversation = participant.to_dict()
+            conversation['id'] = participant.conversation_id
+            conversation['participant'] = user.to_summary_dict()
+            conversations.append(conversation)
+        
+        return jsonify({
+            'conversations': conversations,
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        }), 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching conversations: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@messaging_bp.route('/api/messages/conversations', methods=['POST'])
+@jwt_required()
+def start_conversation():
+    """Open (or reopen) the direct conversation with another user"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            user_id = int(data.get('user_id'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Users who turned messages off can still be reached by their connections
+        profile = Profile.find_by_user_id(user_id)
+        if profile and profile.allow_messages is False \
+                and not Connection.are_connected(current_user_id, user_id):
+            return jsonify({'error': 'This user does not accept messages'}), 403
+        
+        try:
+            conversation, created = Conversation.get_or_create_direct(current_user_id, user_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        participant = ConversationParticipant.find(conversation.id, current_user_id)
+        data = participant.to_dict()
+        data['id'] = conversation.id
+        return jsonify({'conversation': data}), 201 if created else 200
+    
+    except Exception as e:
+        current_app.logger.error(f"Error starting conversation: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@messaging_bp.route('/api/messages/<int:conversation_id>', methods=['GET'])
+@jwt_required()
+def get_messages(conversation_id):
+    """Message history, newest first, paged by keyset cursor"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not ConversationParticipant.find(conversation_id, current_user_id):
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        try:
+            per_page, cursor = page_args(default=30, maximum=100)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        query = Message.query.filter(Message.conversation_id == conversation_id)
+        if cursor:
+            query = query.filter(before_cursor(Message.created_at, Message.id, cursor))
+        messages = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(per_page + 1).all()
+        
+        next_cursor = None
+        if len(messages) > per_page:
+            messages = messages[:per_page]
+            next_cursor = encode_cursor({'t': messages[-1].created_at.isoformat(), 'id': messages[-1].id})
+        
+        # Opening the latest page reads the conversation
+        if not cursor:
+            ConversationParticipant.mark_read(conversation_id, current_user_id)
+            db.session.commit()
+        
+        return jsonify({
+            'messages': [message.to_dict() for message in messages],
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error fetching messages: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@messaging_bp.route('/api/messages/<int:conversation_id>', methods=['POST'])
+@jwt_required()
+def send_message(conversation_id):
+    """Send a message to a conversation the user belongs to"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not ConversationParticipant.find(conversation_id, current_user_id):
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            message = Message.send(conversation_id, current_user_id, data.get('content'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Push to every participant's open streams (the sender's other devices too)
+        message_data = message.to_dict()
+        participant_ids = db.session.scalars(
+            db.select(ConversationParticipant.user_id)
+              .where(ConversationParticipant.conversation_id == conversation_id)
+        ).all()
+        events.publish(participant_ids, 'message', message_data, event_id=message.id)
+        
+        return jsonify({'message': message_data}), 201
+    
+    except Exception as e:
+        current_app.logger.error(f"Error sending message: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@messaging_bp.route('/api/messages/stream-token', methods=['POST'])
+@jwt_required()
+def create_stream_token():
+    """Short-lived token for opening the message stream (EventSource cannot send headers)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        return jsonify({
+            'token': issue_stream_token(current_user_id),
+            'expires_in': current_app.config.get('EVENTS_STREAM_TOKEN_EXPIRES', 60)
+        }), 201
+    
+    except Exception as e:
+        current_app.logger.error(f"Error issuing stream token: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@messaging_bp.route('/api/messages/stream', methods=['GET'])
+def stream_messages():
+    """Server-sent events stream of new messages for the current user.
+    
+    Opened with ?token=<stream token> from POST /api/messages/stream-token;
+    the access token itself is not accepted in the URL, where it would be
+    written to access logs. The stream ends after EVENTS_STREAM_MAX_SECONDS
+    and the client reconnects with a fresh token; fetch history to fill any
+    gap.
+    """
+    try:
+        current_user_id = load_stream_token(request.args.get('token'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 401
+    
+    try:
+        subscription = events.subscribe(current_user_id)
+        
+        # The generator runs after the app context is torn down, so the
+        # stream holds no database session while it waits for events
+        return Response(events.stream(subscription), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        
+    except StreamLimitReached:
+        # Every thread left is needed for ordinary requests; the client retries later
+        response = jsonify({'error': 'Too many open streams, try again later'})
+        response.headers['Retry-After'] = str(current_app.config.get('EVENTS_RETRY_AFTER', 30))
+        return response, 503
+    except Exception as e:
+        current_app.logger.error(f"Error opening message stream: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -1,53 +1,95 @@
-import os
-import uuid
 import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from sqlalchemy import desc, asc, func, or_, and_, text
-from models.post import Post
+from models.post import Post, TagCount
 from models.user import User
-from extensions import db
+from models.like import Like
+from extensions import db, cache, storage
+from utils import encode_cursor, decode_cursor, get_file_url
+from services.search import search_posts
+from services.feed import fan_out_post
+from services.images import queue_post_image
+from services.videos import queue_post_video
+from services.blobs import UploadTooLarge, store_upload, release_file_url
+from services.direct_uploads import issue_ticket, load_ticket, receive_upload, attach_upload
 
 posts_bp = Blueprint('posts', __name__)
 
-# Simple in-memory cache for categories and popular tags
-_cache: dict = {
-    'categories': None,
-    'popular_tags': None,
-    'last_updated': None
-}
+# Cache namespace for aggregates derived from posts
+POSTS_CACHE_NAMESPACE = 'posts'
 
 def allowed_file(filename, allowed_extensions):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def save_media_file(file, folder='posts'):
-    """Save uploaded media file and return the URL"""
+def save_media_file(file):
+    """Store uploaded media by content hash and return the URL; holds one reference until committed"""
     if file and file.filename:
-        # Generate unique filename
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        
-        # Create folder if it doesn't exist
-        upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Save file
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-        
-        # Return URL
-        return f"{current_app.config['UPLOAD_URL_PREFIX']}{folder}/{unique_filename}"
+        extension = secure_filename(file.filename).rsplit('.', 1)[-1].lower()
+        path, _ = store_upload(file, extension, current_app.config['MAX_CONTENT_LENGTH'])
+        return get_file_url(path)
     return None
 
+def build_post_cursor(post, sort_by, sort_order):
+    """Build the keyset cursor pointing just past the given post"""
+    value = getattr(post, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor({'s': sort_by, 'o': sort_order, 'v': value, 'id': post.id})
+
+def apply_post_cursor(query, cursor):
+    """Restrict a sorted posts query to rows after the cursor position"""
+    sort_by = cursor['s']
+    sort_field = getattr(Post, sort_by)
+    value = cursor['v']
+    if sort_by == 'created_at' and value is not None:
+        value = datetime.fromisoformat(value)
+    
+    if cursor['o'] == 'desc':
+        return query.filter(or_(
+            sort_field < value,
+            and_(sort_field == value, Post.id < cursor['id'])
+        ))
+    return query.filter(or_(
+        sort_field > value,
+        and_(sort_field == value, Post.id > cursor['id'])
+    ))
+
+def get_post_fields():
+    """Form fields, or the JSON body when one was sent; raises ValueError for a JSON body that is not an object"""
+    fields = request.get_json(silent=True)
+    if fields is None or fields == {}:
+        return request.form
+    if not isinstance(fields, dict):
+        raise ValueError('Request body must be a JSON object')
+    return fields
+
+def get_text_field(fields, name, default=None):
+    """A string field (default when absent or null); raises ValueError for any other JSON type"""
+    value = fields.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value
+
+def get_tag_list(fields):
+    """Tags sent as a comma-separated string or a list of strings"""
+    tags = fields.get('tags') or ''
+    if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+        tags = ','.join(tags)
+    if not isinstance(tags, str):
+        raise ValueError('tags must be a string or a list of strings')
+    return [tag.strip() for tag in tags.split(',') if tag.strip()]
+
 def invalidate_cache():
-    """Invalidate cache when posts are modified"""
-    _cache['categories'] = None
-    _cache['popular_tags'] = None
-    _cache['last_updated'] = None
+    """Invalidate cache when posts are modified (reaches every worker on a shared backend)"""
+    cache.invalidate(POSTS_CACHE_NAMESPACE)
 
 @posts_bp.route('/api/posts', methods=['POST'])
 @jwt_required()
@@ -56,12 +98,13 @@ def create_post():
     try:
         current_user_id = get_jwt_identity()
         
-        # Get form data
-        content = request.form.get('content', '').strip()
-        rich_content = request.form.get('rich_content', '').strip()
-        tags = request.form.get('tags', '')
-        visibility = request.form.get('visibility', 'public')
-        category = request.form.get('category', 'general')
+        # Get form data (or JSON, when the media was uploaded through /api/posts/media-uploads)
+        fields = get_post_fields()
+        content = get_text_field(fields, 'content', '').strip()
+        rich_content = get_text_field(fields, 'rich_content', '').strip()
+        visibility = get_text_field(fields, 'visibility', 'public')
+        category = get_text_field(fields, 'category', 'general')
+        media_upload = get_text_field(fields, 'media_upload')
         
         # Validate required fields
         if not content and not rich_content:
@@ -71,12 +114,8 @@ def create_post():
         if visibility not in ['public', 'connections', 'private']:
             return jsonify({'error': 'Invalid visibility setting'}), 400
         
-        # Parse tags
-        tag_list = []
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            # Limit to 10 tags maximum
-            tag_list = tag_list[:10]
+        # Parse tags, limited to 10 tags maximum
+        tag_list = get_tag_list(fields)[:10]
         
         # Handle media upload
         media_url = None
@@ -103,6 +142,8 @@ def create_post():
                 media_url = save_media_file(file)
                 if not media_url:
                     return jsonify({'error': 'Failed to save media file'}), 500
+        elif media_upload:
+            media_url, media_type = attach_upload(load_ticket(media_upload, int(current_user_id)))
         
         # Create post
         post = Post(
@@ -116,7 +157,18 @@ def create_post():
             category=category
         )
         
-        post.save()
+        # The post and its home timeline rows (author and followers) commit together
+        post.save(commit=False)
+        fan_out_post(post)
+        db.session.commit()
+        
+        # Resized variants and transcoded videos are produced in the background and attached when ready
+        if media_type == 'image':
+            queue_post_image(post)
+            db.session.refresh(post)
+        elif media_type == 'video':
+            queue_post_video(post)
+            db.session.refresh(post)
         
         # Invalidate cache
         invalidate_cache()
@@ -126,12 +178,52 @@ def create_post():
             'post': post.to_dict()
         }), 201
         
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Error creating post: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@posts_bp.route('/api/posts/media-uploads', methods=['POST'])
+@jwt_required()
+def create_media_upload():
+    """Issue a ticket for uploading post media straight to storage"""
+    try:
+        data = request.get_json() or {}
+        upload = issue_ticket(int(get_jwt_identity()), data.get('filename'), data.get('content_type'),
+                              data.get('size'), data.get('sha256'))
+        return jsonify({'upload': upload}), 201
+        
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error issuing media upload: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@posts_bp.route('/api/posts/media-uploads/<token>', methods=['PUT'])
+def receive_media_upload(token):
+    """Receive the bytes for a ticket when storage cannot take them directly (filesystem backend)"""
+    try:
+        # The signed ticket is the credential, as a presigned URL would be
+        ticket = load_ticket(token)
+        if not storage.is_local:
+            return jsonify({'error': 'Upload to the URL given with the ticket'}), 404
+        receive_upload(ticket, request.stream, request.content_type, request.content_length)
+        return '', 204
+        
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': 'Upload is larger than its ticket allows'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error receiving media upload: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @posts_bp.route('/api/posts', methods=['GET'])
 @jwt_required()
 def get_posts():
@@ -144,6 +236,11 @@ def get_posts():
         per_page = min(int(request.args.get('per_page', 20)), 50)  # Max 50 posts per page
         offset = (page - 1) * per_page
         
+        # Keyset pagination is used when a cursor is supplied (an empty cursor
+        # requests the first page); page/offset stays as the fallback mode
+        cursor_token = request.args.get('cursor')
+        use_cursor = cursor_token is not None or request.args.get('pagination') == 'cursor'
+        
         # Filter parameters
         search = request.args.get('search', '').strip()
         category = request.args.get('category', '').strip()
@@ -157,27 +254,39 @@ def get_posts():
         
         # Validate sort parameters
         allowed_sort_fields = ['created_at', 'likes_count', 'comments_count', 'views_count']
-        if sort_by not in allowed_sort_fields:
+        if sort_by not in allowed_sort_fields + ['relevance']:
             sort_by = 'created_at'
         
         if sort_order not in ['asc', 'desc']:
             sort_order = 'desc'
         
-        # Build query
-        query = Post.query.filter_by(is_active=True)
+        # A cursor carries the ordering it was issued for
+        cursor = None
+        if cursor_token:
+            try:
+                cursor = decode_cursor(cursor_token)
+                if cursor.get('s') not in allowed_sort_fields or cursor.get('o') not in ['asc', 'desc'] \
+                        or not isinstance(cursor.get('id'), int):
+                    raise ValueError("Invalid cursor")
+                sort_by = cursor['s']
+                sort_order = cursor['o']
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Build query (authors are eager-loaded to avoid one query per post)
+        query = Post.listing_query()
+        
+        # Only posts the viewer may see: public, their own, and their connections'
+        query = query.filter(Post.visible_to(int(current_user_id)))
         
         # User filter
         if user_id:
             query = query.filter_by(user_id=int(user_id))
-        else:
-            # For feed posts, filter by visibility
-            query = query.filter(Post.visibility.in_(['public', 'connections']))
         
-        # Search filter
+        # Search filter (full-text index where the database supports one)
+        rank_by_relevance = sort_by == 'relevance' and bool(search) and not use_cursor
         if search:
-            query = query.filter(
-                Post.content.ilike(f'%{search}%')
-            )
+            query = search_posts(query, search, rank=rank_by_relevance)
         
         # Category filter
         if category:
@@ -187,18 +296,45 @@ def get_posts():
         if visibility:
             query = query.filter(Post.visibility == visibility)
         
-        # Tags filter
+        # Tags filter (exact matches on every tag, resolved through the post_tags index)
         if tags:
             tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            for tag in tag_list:
-                query = query.filter(Post.tags.ilike(f'%{tag}%'))
-        
-        # Apply sorting
-        sort_field = getattr(Post, sort_by)
-        if sort_order == 'desc':
-            query = query.order_by(desc(sort_field))
-        else:
-            query = query.order_by(asc(sort_field))
+            if tag_list:
+                query = query.filter(Post.with_all_tags(tag_list))
+        
+        # Apply sorting (id breaks ties so the order is stable for cursors);
+        # relevance ordering was already applied by the search backend
+        if not rank_by_relevance:
+            if sort_by == 'relevance':
+                sort_by = 'created_at'
+            sort_field = getattr(Post, sort_by)
+            if sort_order == 'desc':
+                query = query.order_by(desc(sort_field), desc(Post.id))
+            else:
+                query = query.order_by(asc(sort_field), asc(Post.id))
+        
+        if use_cursor:
+            if cursor:
+                try:
+                    query = apply_post_cursor(query, cursor)
+                except (ValueError, TypeError):
+                    return jsonify({'error': 'Invalid cursor'}), 400
+            
+            # Fetch one extra row to learn whether another page exists,
+            # without counting the whole result set
+            posts = query.limit(per_page + 1).all()
+            has_more = len(posts) > per_page
+            posts = posts[:per_page]
+            next_cursor = build_post_cursor(posts[-1], sort_by, sort_order) if has_more else None
+            
+            return jsonify({
+                'posts': [post.to_dict() for post in posts],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor,
+                    'has_more': has_more
+                }
+            }), 200
         
         # Get total count for pagination
         total_count = query.count()
@@ -230,25 +366,19 @@ def get_posts():
 def get_categories():
     """Get all available post categories"""
     try:
-        # Check cache first
-        if _cache['categories'] and _cache['last_updated']:
-            # Cache for 1 hour
-            cache_age = datetime.utcnow() - _cache['last_updated']
-            if cache_age.total_seconds() < 3600:
-                return jsonify({'categories': _cache['categories']}), 200
-        
-        # Get categories from database
-        categories = db.session.query(Post.category, func.count(Post.id).label('count'))\
-            .filter_by(is_active=True)\
-            .group_by(Post.category)\
-            .order_by(desc('count'))\
-            .all()
-        
-        category_list = [{'name': cat.category, 'count': cat.count} for cat in categories if cat.category]
-        
-        # Update cache
-        _cache['categories'] = category_list
-        _cache['last_updated'] = datetime.utcnow()
+        def load_categories():
+            categories = db.session.query(Post.category, func.count(Post.id).label('count'))\
+                .filter_by(is_active=True)\
+                .group_by(Post.category)\
+                .order_by(desc('count'))\
+                .all()
+            return [{'name': cat.category, 'count': cat.count} for cat in categories if cat.category]
+        
+        # Cache for 1 hour, or until the next post write. After a write the
+        # previous list is served for up to 5 minutes while a single
+        # background refresh recomputes it, so write bursts do not stampede
+        category_list = cache.get_or_set('categories', load_categories, ttl=3600,
+                                         namespace=POSTS_CACHE_NAMESPACE, stale_ttl=300)
         
         return jsonify({'categories': category_list}), 200
         
@@ -261,33 +391,9 @@ def get_categories():
 def get_popular_tags():
     """Get most popular tags"""
     try:
-        # Check cache first
-        if _cache['popular_tags'] and _cache['last_updated']:
-            # Cache for 1 hour
-            cache_age = datetime.utcnow() - _cache['last_updated']
-            if cache_age.total_seconds() < 3600:
-                return jsonify({'tags': _cache['popular_tags']}), 200
-        
-        # Get all tags and count occurrences
-        posts = Post.query.filter_by(is_active=True).all()
-        tag_counts = {}
-        
-        for post in posts:
-            if post.tags:
-                try:
-                    post_tags = json.loads(post.tags) if isinstance(post.tags, str) else post.tags
-                    for tag in post_tags:
-                        tag_counts[tag] = tag_counts.get(tag, 0) + 1
-                except (json.JSONDecodeError, TypeError):
-                    continue
-        
-        # Sort by count and get top 20
-        popular_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:20]
-        tag_list = [{'name': tag, 'count': count} for tag, count in popular_tags]
-        
-        # Update cache
-        _cache['popular_tags'] = tag_list
-        _cache['last_updated'] = datetime.utcnow()
+        # Counters are maintained on every post write, so this is an
+        # indexed top-K read and needs no cache
+        tag_list = [{'name': row.tag, 'count': row.post_count} for row in TagCount.top(20)]
         
         return jsonify({'tags': tag_list}), 200
         
@@ -300,10 +406,15 @@ def get_popular_tags():
 def get_post(post_id):
     """Get a specific post by ID"""
     try:
+        current_user_id = int(get_jwt_identity())
+        
         post = Post.find_by_id(post_id)
-        if not post:
+        if not post or not post.is_visible_to(current_user_id):
             return jsonify({'error': 'Post not found'}), 404
         
+        # Views are aggregated in memory and flushed in bulk
+        Post.record_view(post.id)
+        
         return jsonify({'post': post.to_dict()}), 200
         
     except Exception as e:
@@ -315,7 +426,7 @@ def get_post(post_id):
 def update_post(post_id):
     """Update a post"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         post = Post.find_by_id(post_id)
         if not post:
@@ -325,25 +436,25 @@ def update_post(post_id):
         if post.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Get form data
-        content = request.form.get('content', '').strip()
-        rich_content = request.form.get('rich_content', '').strip()
-        tags = request.form.get('tags', '')
-        visibility = request.form.get('visibility')
-        category = request.form.get('category')
+        # Get form data (or JSON, when the media was uploaded through /api/posts/media-uploads)
+        fields = get_post_fields()
+        content = get_text_field(fields, 'content', '').strip()
+        rich_content = get_text_field(fields, 'rich_content', '').strip()
+        visibility = get_text_field(fields, 'visibility')
+        category = get_text_field(fields, 'category')
+        media_upload = get_text_field(fields, 'media_upload')
         
         # Validate required fields
         if not content and not rich_content:
             return jsonify({'error': 'Post content is required'}), 400
         
         # Parse tags
-        tag_list = []
-        if tags:
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        tag_list = get_tag_list(fields)
         
         # Handle media upload
         media_url = post.media_url
         media_type = post.media_type
+        media_uploaded = False
         
         if 'media' in request.files:
             file = request.files['media']
@@ -366,6 +477,10 @@ def update_post(post_id):
                 media_url = save_media_file(file)
                 if not media_url:
                     return jsonify({'error': 'Failed to save media file'}), 500
+                media_uploaded = True
+        elif media_upload:
+            media_url, media_type = attach_upload(load_ticket(media_upload, current_user_id))
+            media_uploaded = True
         
         # Update post
         update_data = {
@@ -384,8 +499,24 @@ def update_post(post_id):
         if category:
             update_data['category'] = category
         
+        media_changed = media_url != post.media_url
+        if media_uploaded:
+            # The replaced media, or the extra reference taken by re-uploading the same bytes
+            release_file_url(post.media_url)
+        if media_changed:
+            release_file_url(post.media_poster_url)
+            update_data.update(media_variants=None, media_poster_url=None, media_duration=None,
+                               media_width=None, media_height=None)
+        
         post.update(**update_data)
         
+        if media_changed and media_type == 'image':
+            queue_post_image(post)
+            db.session.refresh(post)
+        elif media_changed and media_type == 'video':
+            queue_post_video(post)
+            db.session.refresh(post)
+        
         # Invalidate cache
         invalidate_cache()
         
@@ -394,6 +525,8 @@ def update_post(post_id):
             'post': post.to_dict()
         }), 200
         
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -405,7 +538,7 @@ def update_post(post_id):
 def delete_post(post_id):
     """Delete a post"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         post = Post.find_by_id(post_id)
         if not post:
@@ -415,6 +548,9 @@ def delete_post(post_id):
         if post.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
+        # The media blob goes with its last post
+        release_file_url(post.media_url)
+        release_file_url(post.media_poster_url)
         post.delete()
         
         # Invalidate cache
@@ -431,21 +567,20 @@ def delete_post(post_id):
 def like_post(post_id):
     """Like/unlike a post"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         post = Post.find_by_id(post_id)
         if not post:
             return jsonify({'error': 'Post not found'}), 404
         
-        # TODO: Implement like/unlike logic with a separate Like model
-        # For now, just increment likes
-        post.increment_likes()
+        liked, likes_count = Like.toggle(current_user_id, post_id)
         
         return jsonify({
-            'message': 'Post liked successfully',
-            'likes_count': post.likes_count
+            'message': 'Post liked successfully' if liked else 'Post unliked successfully',
+            'liked': liked,
+            'likes_count': likes_count
         }), 200
         
     except Exception as e:
         current_app.logger.error(f"Error liking post {post_id}: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500
@@ -1,16 +1,21 @@
-import json
 import os
+import json
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.exceptions import RequestEntityTooLarge
 from models.user import User
 from models.profile import Profile
+from models.media import MediaJob
 from utils import (
-    validate_image_file, process_image, save_uploaded_file, 
-    get_file_url, delete_file, validate_phone_number, 
-    validate_website_url, sanitize_text, generate_unique_filename
+    allowed_file, probe_image,
+    delete_file, validate_phone_number, 
+    validate_website_url, sanitize_text, image_variants_dict, get_file_path
 )
 from extensions import db
+from services.suggestions import get_suggestions
+from services.matching import index_user_skills, refresh_user_matches
+from services.images import PROFILE_IMAGE_KIND, queue_profile_image, stored_variant_paths
+from services.blobs import UploadTooLarge, stream_to_temp, is_content_addressed, release_paths
 
 profile_bp = Blueprint('profile', __name__)
 
@@ -199,6 +204,12 @@ def update_profile():
                 'details': validation_errors
             }), 400
         
+        # Keep the skill index and precomputed job matches in step
+        if 'skills' in data:
+            index_user_skills(current_user_id, data['skills'])
+        if 'skills' in data or 'experience_years' in data:
+            refresh_user_matches(current_user_id)
+        
         # Save changes
         db.session.commit()
         
@@ -238,52 +249,34 @@ def upload_profile_image():
         if file.filename == '':
             return jsonify({'error': 'No image file selected'}), 400
         
-        # Validate image file
-        valid, error = validate_image_file(file)
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'File type not allowed. Please upload PNG, JPG, JPEG, GIF, or WebP files.'}), 400
+        
+        # Stream to disk with the size checked while reading, then validate from the header alone
+        try:
+            temp_path, _, _ = stream_to_temp(file, current_app.config['MAX_CONTENT_LENGTH'])
+        except UploadTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        valid, error = probe_image(temp_path)
         if not valid:
+            os.remove(temp_path)
             return jsonify({'error': error}), 400
         
-        # Delete old profile image if exists
-        if user.profile_image_url:
-            old_filepath = user.profile_image_url.replace(current_app.config['UPLOAD_URL_PREFIX'], '')
-            delete_file(old_filepath)
+        # Decoding and resizing happen in the media pipeline; poll status_url for the result
+        job = queue_profile_image(current_user_id, temp_path, file.filename)
+        db.session.refresh(job)
         
-        # Process and save image
-        try:
-            # Process image (resize, optimize)
-            processed_image = process_image(file)
-            
-            # Generate unique filename
-            filename = generate_unique_filename(file.filename)
-            filepath = os.path.join('profile_images', filename)
-            full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filepath)
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            
-            # Save processed image to disk
-            with open(full_path, 'wb') as f:
-                f.write(processed_image.getvalue())
-            
-            # Generate URL
-            image_url = get_file_url(filepath)
-            
-            # Update user profile
-            user.profile_image_url = image_url
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Profile image uploaded successfully',
-                'image_url': image_url
-            }), 200
-            
-        except Exception as e:
-            current_app.logger.error(f"Error processing image: {str(e)}")
-            return jsonify({'error': 'Failed to process image'}), 500
+        return jsonify({
+            'success': True,
+            'message': 'Profile image uploaded and is being processed',
+            'job': job.to_dict(),
+            'image_url': job.result_url,
+            'status_url': f"/api/media/jobs/{job.id}"
+        }), 202
         
     except RequestEntityTooLarge:
-        return jsonify({'error': 'File too large. Maximum size is 5MB'}), 413
+        max_size = current_app.config['MAX_CONTENT_LENGTH']
+        return jsonify({'error': f"File too large. Maximum size is {max_size // (1024*1024)}MB"}), 413
     except Exception as e:
         current_app.logger.error(f"Error uploading profile image: {str(e)}")
         db.session.rollback()
@@ -302,15 +295,22 @@ def delete_profile_image():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        # An upload still processing must not bring the image back
+        MediaJob.cancel_pending(current_user_id, PROFILE_IMAGE_KIND)
+        
         if not user.profile_image_url:
+            db.session.commit()
             return jsonify({'error': 'No profile image to delete'}), 404
         
-        # Delete file from disk
-        filepath = user.profile_image_url.replace(current_app.config['UPLOAD_URL_PREFIX'], '')
-        delete_file(filepath)
+        # Delete file from disk; content-addressed variants may be shared and are released instead
+        filepath = get_file_path(user.profile_image_url)
+        if not is_content_addressed(filepath):
+            delete_file(filepath)
+        release_paths(stored_variant_paths(user.profile_image_variants))
         
         # Update user profile
         user.profile_image_url = None
+        user.profile_image_variants = None
         db.session.commit()
         
         return jsonify({
@@ -346,6 +346,7 @@ def get_public_profile(user_id):
             'company': user.company,
             'job_title': user.job_title,
             'profile_image_url': user.profile_image_url,
+            'profile_image_variants': image_variants_dict(user.profile_image_variants),
             'headline': profile.headline,
             'industry': profile.industry,
             'current_position': profile.current_position,
@@ -377,4 +378,22 @@ def get_public_profile(user_id):
         current_app.logger.error(f"Error getting public profile: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-# Routes will be implemented here 
\ No newline at end of file
+@profile_bp.route('/api/profile/suggestions', methods=['GET'])
+@jwt_required()
+def get_connection_suggestions():
+    """People you may know, precomputed by build_connection_suggestions.py"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        limit = max(1, min(int(request.args.get('limit', 20)), 50))
+        
+        suggestions = []
+        for user, suggestion in get_suggestions(current_user_id, limit):
+            user_data = user.to_summary_dict()
+            user_data['mutual_connections'] = suggestion.mutual_count
+            suggestions.append(user_data)
+        
+        return jsonify({'suggestions': suggestions}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting connection suggestions: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
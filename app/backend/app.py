@@ -2,7 +2,7 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from config import Config
-from extensions import db, migrate, jwt
+from extensions import db, migrate, jwt, cache, counters, events, media, videos, storage
 import os
 import logging
 import traceback
@@ -39,6 +39,12 @@ def create_app(config_class=Config):
         db.init_app(app)
         migrate.init_app(app, db)
         jwt.init_app(app)
+        cache.init_app(app)
+        counters.init_app(app)
+        events.init_app(app)
+        storage.init_app(app)
+        media.init_app(app)
+        videos.init_app(app)
         app.logger.info("✅ Extensions initialized successfully")
     except Exception as e:
         app.logger.error(f"❌ Failed to initialize extensions: {e}")
@@ -71,15 +77,19 @@ def create_app(config_class=Config):
         from api.profile import profile_bp
         from api.posts import posts_bp
         from api.feed import feed_bp
+        from api.connections import connections_bp
         from api.jobs import jobs_bp
         from api.messaging import messaging_bp
+        from api.media import media_bp
         
         app.register_blueprint(auth_bp)
         app.register_blueprint(profile_bp)
         app.register_blueprint(posts_bp)
         app.register_blueprint(feed_bp)
+        app.register_blueprint(connections_bp)
         app.register_blueprint(jobs_bp)
         app.register_blueprint(messaging_bp)
+        app.register_blueprint(media_bp)
         app.logger.info("✅ Blueprints registered successfully")
     except Exception as e:
         app.logger.error(f"❌ Failed to register blueprints: {e}")
@@ -94,15 +104,20 @@ def create_app(config_class=Config):
         app.logger.error(f"❌ Failed to initialize rate limiter: {e}")
         # Don't raise here as rate limiting is not critical
     
-    # Set up file serving for uploads
-    from flask import send_from_directory
+    # Set up file serving for uploads (caching, ranges and X-Sendfile in services/uploads.py)
+    from werkzeug.exceptions import HTTPException, NotFound
+    from services.uploads import send_upload
     
     @app.route('/uploads/<path:filename>')
     def uploaded_file(filename):
         """Serve uploaded files"""
         try:
-            upload_folder = app.config['UPLOAD_FOLDER']
-            return send_from_directory(upload_folder, filename)
+            return send_upload(filename)
+        except NotFound:
+            return jsonify({'error': 'File not found'}), 404
+        except HTTPException as e:
+            # e.g. 416 for a range past the end of the file
+            return e
         except Exception as e:
             app.logger.error(f"❌ File serving error: {e}")
             return jsonify({'error': 'File not found'}), 404
@@ -181,6 +196,42 @@ def create_app(config_class=Config):
                 'error': str(e)
             }, 500
     
+    @app.route('/api/cache-stats')
+    def cache_stats():
+        """Cache hit/miss metrics for this worker"""
+        try:
+            return {'status': 'ok', 'cache': cache.stats()}
+        except Exception as e:
+            app.logger.error(f"❌ Cache stats error: {e}")
+            return {'status': 'error', 'message': 'Cache stats failed'}, 500
+    
+    @app.route('/api/counter-stats')
+    def counter_stats():
+        """Write-behind counter flush and lag metrics for this worker"""
+        try:
+            return {'status': 'ok', 'counters': counters.stats()}
+        except Exception as e:
+            app.logger.error(f"❌ Counter stats error: {e}")
+            return {'status': 'error', 'message': 'Counter stats failed'}, 500
+    
+    @app.route('/api/event-stats')
+    def event_stats():
+        """Open streams and event delivery metrics for this worker"""
+        try:
+            return {'status': 'ok', 'events': events.stats()}
+        except Exception as e:
+            app.logger.error(f"❌ Event stats error: {e}")
+            return {'status': 'error', 'message': 'Event stats failed'}, 500
+    
+    @app.route('/api/media-stats')
+    def media_stats():
+        """Background media job metrics for this worker"""
+        try:
+            return {'status': 'ok', 'media': media.stats(), 'videos': videos.stats(), 'storage': storage.stats()}
+        except Exception as e:
+            app.logger.error(f"❌ Media stats error: {e}")
+            return {'status': 'error', 'message': 'Media stats failed'}, 500
+    
     @app.route('/api/debug-config')
     def debug_config():
         """Debug endpoint to check configuration"""
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text post search against the original ILIKE scan
+
+Usage:
+    python benchmark_post_search.py [post_count] [repeats]
+
+Runs against a throwaway in-memory SQLite database unless DATABASE_URL
+points somewhere else.
+"""
+
+import os
+import sys
+import random
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from extensions import db
+from app import create_app
+from models.post import Post
+from services.search import get_search_backend, search_posts
+
+# Synthetic vocabulary with a Zipf-like frequency distribution, so the
+# benchmark covers both common and rare search terms
+VOCABULARY = [f"term{rank}" for rank in range(1, 5001)]
+WEIGHTS = [1.0 / rank for rank in range(1, 5001)]
+SEARCH_TERMS = ('term3', 'term40', 'term900', 'term40 term900')
+
+
+def populate(post_count):
+    """Insert post_count posts of random words in bulk"""
+    db.session.execute(text(
+        "INSERT INTO users (username, email, password_hash, is_active) "
+        "VALUES ('bench', 'bench@example.com', 'x', 1)"
+    ))
+    user_id = db.session.execute(text("SELECT id FROM users WHERE username = 'bench'")).scalar()
+    rng = random.Random(42)
+    rows = [
+        {'user_id': user_id, 'content': ' '.join(rng.choices(VOCABULARY, weights=WEIGHTS, k=40)),
+         'is_active': True, 'visibility': 'public', 'category': 'general', 'likes_count': 0, 'comments_count': 0}
+        for _ in range(post_count)
+    ]
+    db.session.execute(Post.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_query(run_query, repeats):
+    """Return (best seconds, result) over several runs"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run_query()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(label, term, ilike, full_text):
+    """Print one comparison line"""
+    (ilike_time, ilike_result), (fts_time, fts_result) = ilike, full_text
+    print(f"🔍 {label} '{term}': ILIKE {ilike_time * 1000:.2f}ms ({ilike_result}) | "
+          f"full-text {fts_time * 1000:.2f}ms ({fts_result}) | "
+          f"speedup x{ilike_time / fts_time:.1f}")
+
+
+def run_benchmark(post_count=50000, repeats=5):
+    app = create_app()
+    with app.app_context():
+        populate(post_count)
+        backend = get_search_backend()
+        print(f"📊 {post_count} posts, backend: {backend.name}")
+        
+        def base():
+            return Post.query.filter_by(is_active=True)
+        
+        def ilike(term):
+            return base().filter(*[Post.content.ilike(f'%{word}%') for word in term.split()])
+        
+        for term in SEARCH_TERMS:
+            # First page ordered by recency, as the feed search requests it
+            report('page ', term,
+                   time_query(lambda: len(ilike(term).order_by(Post.created_at.desc()).limit(20).all()), repeats),
+                   time_query(lambda: len(search_posts(base(), term).order_by(Post.created_at.desc()).limit(20).all()), repeats))
+            # Total count, as offset pagination computes it on every request
+            report('count', term,
+                   time_query(lambda: ilike(term).count(), repeats),
+                   time_query(lambda: search_posts(base(), term).count(), repeats))
+            # Relevance ranking has no ILIKE equivalent, time it on its own
+            rank_time, _ = time_query(lambda: search_posts(base(), term, rank=True).limit(20).all(), repeats)
+            print(f"🏆 ranked '{term}': {rank_time * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run_benchmark(post_count, repeats)
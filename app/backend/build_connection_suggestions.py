@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the "people you may know" table from the connection graph
+
+Usage:
+    python build_connection_suggestions.py [per_user]
+
+Meant to run periodically (e.g. a nightly cron job); the web workers only
+read the precomputed connection_suggestions rows.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from services.suggestions import build_suggestions
+
+
+def main(per_user=50):
+    app = create_app()
+    with app.app_context():
+        stats = build_suggestions(per_user=per_user)
+        print(f"✅ {stats['suggestions']} suggestions for {stats['users']} users "
+              f"({stats['edges']} connection rows) in {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the job_matches table from job and user skills
+
+Usage:
+    python build_job_matches.py [batch_size]
+
+Job and profile edits keep job_matches current on their own; run this
+after importing data or changing the JOB_MATCH_* settings.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from services.matching import rebuild_job_matches
+
+
+def main(batch_size=128):
+    app = create_app()
+    with app.app_context():
+        stats = rebuild_job_matches(batch_size=batch_size)
+        print(f"✅ {stats['matches']} matches for {stats['jobs']} jobs and {stats['users']} users "
+              f"({stats['skills']} shared skills) in {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 128)
@@ -1,4 +1,6 @@
 import os
+import json
+import shutil
 from datetime import timedelta
 from urllib.parse import quote_plus
 
@@ -80,11 +82,82 @@ class Config:
     # Rate limiting configuration
     RATELIMIT_STORAGE_URL = 'memory://'
 
+    # Cache configuration ('memory' is per worker, 'sqlite' is shared by all workers on the host)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'cache.sqlite'))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    
+    # Write-behind counters (views etc.): flush every N seconds or once this many rows are pending
+    COUNTER_FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', 5))
+    COUNTER_FLUSH_THRESHOLD = int(os.environ.get('COUNTER_FLUSH_THRESHOLD', 1000))
+    
+    # Home feed: authors with more followers than this are merged in at read time instead of fanned out
+    FEED_FANOUT_MAX_FOLLOWERS = int(os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', 10000))
+    
+    # Ranked feed: candidate window/cap, recency half-life and score weights (see services/ranking.py)
+    FEED_RANKING_WINDOW_HOURS = int(os.environ.get('FEED_RANKING_WINDOW_HOURS', 48))
+    FEED_RANKING_MAX_CANDIDATES = int(os.environ.get('FEED_RANKING_MAX_CANDIDATES', 10000))
+    FEED_RANKING_HALF_LIFE_HOURS = float(os.environ.get('FEED_RANKING_HALF_LIFE_HOURS', 12))
+    FEED_RANKING_WEIGHTS = json.loads(os.environ.get('FEED_RANKING_WEIGHTS', '{}'))
+    
+    # Job matching: stored matches score at least this; each year of experience short costs this much
+    JOB_MATCH_MIN_SCORE = float(os.environ.get('JOB_MATCH_MIN_SCORE', 0.2))
+    JOB_MATCH_EXPERIENCE_PENALTY = float(os.environ.get('JOB_MATCH_EXPERIENCE_PENALTY', 0.15))
+    
+    # Server-sent events: 'socket' shares events between all workers on the host, 'memory' is per worker
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'socket' if os.name == 'posix' else 'memory')
+    EVENTS_SOCKET_DIR = os.environ.get('EVENTS_SOCKET_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'events'))
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_MAX_STREAMS_PER_USER = int(os.environ.get('EVENTS_MAX_STREAMS_PER_USER', 5))
+    # Each stream holds a gunicorn thread for its whole life; keep this below --threads (8 in the Procfile)
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 4))
+    EVENTS_RETRY_AFTER = int(os.environ.get('EVENTS_RETRY_AFTER', 30))
+    EVENTS_HEARTBEAT_INTERVAL = float(os.environ.get('EVENTS_HEARTBEAT_INTERVAL', 15))
+    EVENTS_IDLE_TIMEOUT = float(os.environ.get('EVENTS_IDLE_TIMEOUT', 60))
+    EVENTS_STREAM_MAX_SECONDS = float(os.environ.get('EVENTS_STREAM_MAX_SECONDS', 300))
+    # Seconds a stream token (EventSource's stand-in for the access token) can be used to open a stream
+    EVENTS_STREAM_TOKEN_EXPIRES = int(os.environ.get('EVENTS_STREAM_TOKEN_EXPIRES', 60))
+
+    # Background media processing: 'process' pool, 'thread' pool or 'sync' (inline)
+    MEDIA_EXECUTOR = os.environ.get('MEDIA_EXECUTOR', 'process')
+    MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS', 2))
+    MEDIA_JOB_TIMEOUT = int(os.environ.get('MEDIA_JOB_TIMEOUT', 300))
+    
+    # Video transcoding runs in its own pool; 'ffmpeg' needs ffmpeg/ffprobe on PATH, 'stub' copies files as-is
+    VIDEO_EXECUTOR = os.environ.get('VIDEO_EXECUTOR', 'process')
+    VIDEO_WORKERS = int(os.environ.get('VIDEO_WORKERS', 1))
+    VIDEO_JOB_TIMEOUT = int(os.environ.get('VIDEO_JOB_TIMEOUT', 1800))
+    # 'ffmpeg', 'stub' (tests) or 'none' (posts keep the uploaded video); ffmpeg only when it is installed
+    VIDEO_ENCODER = os.environ.get('VIDEO_ENCODER', 'ffmpeg' if shutil.which('ffmpeg') else 'none')
+    VIDEO_MAX_WIDTH = int(os.environ.get('VIDEO_MAX_WIDTH', 1280))
+    
     # File upload configuration
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB max file size
+    MAX_IMAGE_PIXELS = 50 * 1000 * 1000  # Largest image the media workers will decode
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'mp4', 'avi', 'mov', 'wmv'}
     UPLOAD_URL_PREFIX = '/uploads/'
+    UPLOADS_MAX_AGE = int(os.environ.get('UPLOADS_MAX_AGE', 3600))  # Files not stored by content hash
+    # Let the front proxy send file bytes: None, 'x-sendfile' or 'x-accel-redirect' (nginx internal location)
+    UPLOADS_SENDFILE = os.environ.get('UPLOADS_SENDFILE') or None
+    UPLOADS_ACCEL_PREFIX = os.environ.get('UPLOADS_ACCEL_PREFIX', '/internal-uploads/')
+    
+    # Where files are kept: 'filesystem' (UPLOAD_FOLDER) or 's3' (any S3-compatible store; see services/storage.py)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'filesystem')
+    STORAGE_S3_ENDPOINT = os.environ.get('STORAGE_S3_ENDPOINT', 'https://s3.amazonaws.com')
+    STORAGE_S3_BUCKET = os.environ.get('STORAGE_S3_BUCKET')
+    STORAGE_S3_REGION = os.environ.get('STORAGE_S3_REGION', 'us-east-1')
+    STORAGE_S3_ACCESS_KEY = os.environ.get('STORAGE_S3_ACCESS_KEY')
+    STORAGE_S3_SECRET_KEY = os.environ.get('STORAGE_S3_SECRET_KEY')
+    STORAGE_S3_PREFIX = os.environ.get('STORAGE_S3_PREFIX', '')
+    STORAGE_S3_PART_SIZE = int(os.environ.get('STORAGE_S3_PART_SIZE', 8 * 1024 * 1024))  # S3 needs 5MB or more
+    STORAGE_S3_PUBLIC_URL = os.environ.get('STORAGE_S3_PUBLIC_URL') or None  # Public bucket or CDN; else presigned GETs
+    STORAGE_PRESIGN_EXPIRES = int(os.environ.get('STORAGE_PRESIGN_EXPIRES', 900))
+    # Delete removed files on a background thread; only worth it when deletes are network round trips
+    STORAGE_ASYNC_DELETE = os.environ.get('STORAGE_ASYNC_DELETE', str(STORAGE_BACKEND != 'filesystem')).lower() == 'true'
+    # Direct-to-storage post media uploads: how long a ticket (and its upload URL) stays valid
+    MEDIA_UPLOAD_TICKET_EXPIRES = int(os.environ.get('MEDIA_UPLOAD_TICKET_EXPIRES', 3600))
     
     # Production settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
@@ -0,0 +1,151 @@
+"""
+Shared pytest fixtures for the backend test scripts.
+
+Builds the app against an in-memory SQLite database so the tests never touch
+the production PostgreSQL instance configured in config.py.
+"""
+
+import os
+import sys
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from config import Config
+from extensions import db, storage
+
+
+class TestConfig(Config):
+    """Configuration for isolated test runs"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RATELIMIT_ENABLED = False
+    EVENTS_BACKEND = 'memory'
+    MEDIA_EXECUTOR = 'sync'
+    VIDEO_EXECUTOR = 'sync'
+    VIDEO_ENCODER = 'stub'
+    STORAGE_ASYNC_DELETE = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Create a fresh app with empty tables for every test"""
+    from app import create_app
+
+    TestConfig.UPLOAD_FOLDER = str(tmp_path / 'uploads')
+    app = create_app(TestConfig)
+
+    # Each app gets its own in-memory database, created by create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """App on a SQLite file, for tests that need real concurrent connections"""
+    from app import create_app
+
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.sqlite'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+
+    app = create_app(FileConfig)
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """Test client bound to the fresh app"""
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(monkeypatch):
+    """Factory creating saved users in the active app (app or file_app)"""
+    import models.user
+    from models.user import User
+    from werkzeug.security import generate_password_hash
+
+    # Full-strength hashing dominates test time; one round is enough here
+    monkeypatch.setattr(models.user, 'generate_password_hash',
+                        lambda password: generate_password_hash(password, method='pbkdf2:sha256:1'))
+
+    counter = {'n': 0}
+
+    def _make_user(username=None, **fields):
+        counter['n'] += 1
+        username = username or f"user{counter['n']}"
+        user = User(username, f"{username}@example.com", 'TestPass123!')
+        for key, value in fields.items():
+            setattr(user, key, value)
+        user.save()
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def auth_headers():
+    """Build an Authorization header for a user"""
+    def _auth_headers(user):
+        token = create_access_token(identity=str(user.id))
+        return {'Authorization': f'Bearer {token}'}
+
+    return _auth_headers
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager recording every SQL statement sent to the database"""
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    return _count_queries
+
+
+@pytest.fixture
+def s3_server(tmp_path):
+    """Local S3 stand-in (local_s3.py) on a free port"""
+    from local_s3 import LocalS3Server
+
+    server = LocalS3Server(str(tmp_path / 's3')).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def s3_storage(app, s3_server):
+    """Point the app's storage extension at the stand-in server"""
+    app.config.update({
+        'STORAGE_BACKEND': 's3',
+        'STORAGE_S3_ENDPOINT': s3_server.endpoint,
+        'STORAGE_S3_BUCKET': s3_server.bucket,
+        'STORAGE_S3_ACCESS_KEY': s3_server.access_key,
+        'STORAGE_S3_SECRET_KEY': s3_server.secret_key
+    })
+    storage.init_app(app)
+    yield s3_server
+    app.config['STORAGE_BACKEND'] = 'filesystem'
+    storage.init_app(app)
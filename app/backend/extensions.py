@@ -1,8 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from services.cache import Cache
+from services.counters import CounterBuffer
+from services.events import EventBus
+from services.media import MediaPipeline
+from services.storage import Storage
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+cache = Cache()
+counters = CounterBuffer()
+events = EventBus()
+media = MediaPipeline()
+storage = Storage()
+videos = MediaPipeline(config_prefix='VIDEO')  # Transcodes get their own, smaller pool
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an S3-compatible object store
+
+Usage:
+    python local_s3.py [port] [root]
+
+Serves one bucket from a directory with the subset of the S3 API that
+services/storage.py uses: PUT/GET/HEAD/DELETE object, ranged GETs,
+CopyObject, x-amz-checksum-sha256 checks, multipart uploads and presigned
+URLs, all checked with AWS Signature V4. Point the app at it with
+
+    STORAGE_BACKEND=s3 STORAGE_S3_ENDPOINT=http://127.0.0.1:9000
+    STORAGE_S3_BUCKET=prok-media STORAGE_S3_ACCESS_KEY=local STORAGE_S3_SECRET_KEY=local-secret
+
+The tests start it in-process (LocalS3Server.start).
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import uuid
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+from werkzeug.security import safe_join
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.storage import canonical_request, signature
+
+
+class LocalS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, root, bucket='prok-media', access_key='local', secret_key='local-secret',
+                 region='us-east-1', address=('127.0.0.1', 0)):
+        super().__init__(address, _Handler)
+        self.root = root
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.content_types = {}
+        self.uploads = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, bucket, '.parts'), exist_ok=True)
+    
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def object_path(self, key):
+        return safe_join(os.path.join(self.root, self.bucket), key)
+    
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+    
+    def do_GET(self):
+        self._dispatch('GET')
+    
+    def do_PUT(self):
+        self._dispatch('PUT')
+    
+    def do_POST(self):
+        self._dispatch('POST')
+    
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+    
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if 'Content-Length' not in (headers or {}):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def _error(self, status, code):
+        self._reply(status, f"<Error><Code>{code}</Code></Error>".encode('utf-8'),
+                    {'Content-Type': 'application/xml'})
+    
+    def _authorized(self, method, path, params):
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        if 'X-Amz-Signature' in params:
+            amz_date = params.get('X-Amz-Date', '')
+            credential = params.get('X-Amz-Credential', '')
+            names = params.get('X-Amz-SignedHeaders', '').split(';')
+            given = params['X-Amz-Signature']
+            query = {k: v for k, v in params.items() if k != 'X-Amz-Signature'}
+            payload_hash = 'UNSIGNED-PAYLOAD'
+            try:
+                signed_at = datetime.strptime(amz_date, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+                if (datetime.now(timezone.utc) - signed_at).total_seconds() > int(params.get('X-Amz-Expires', 0)):
+                    return False
+            except ValueError:
+                return False
+        else:
+            fields = dict(
+                part.strip().split('=', 1) for part in
+                headers.get('authorization', '').replace('AWS4-HMAC-SHA256 ', '', 1).split(',') if '=' in part
+            )
+            amz_date = headers.get('x-amz-date', '')
+            credential = fields.get('Credential', '')
+            names = fields.get('SignedHeaders', '').split(';')
+            given = fields.get('Signature', '')
+            query = params
+            payload_hash = headers.get('x-amz-content-sha256', '')
+        if credential.split('/', 1)[0] != self.server.access_key or any(name not in headers for name in names):
+            return False
+        expected = signature(self.server.secret_key, self.server.region, amz_date,
+                             canonical_request(method, path, query, {name: headers[name] for name in names},
+                                               payload_hash))
+        return hmac.compare_digest(expected, given)
+    
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        bucket, _, key = path.lstrip('/').partition('/')
+        server = self.server
+        with server.lock:
+            server.requests.append((method, key, tuple(sorted(params))))
+        
+        if not self._authorized(method, path, params):
+            return self._error(403, 'SignatureDoesNotMatch')
+        object_path = server.object_path(key) if key else None
+        if bucket != server.bucket or object_path is None or key.startswith('.parts'):
+            return self._error(404, 'NoSuchBucket')
+        
+        if method == 'POST' and 'uploads' in params:
+            upload_id = uuid.uuid4().hex
+            with server.lock:
+                server.uploads[upload_id] = {'key': key, 'parts': {}, 'content_type': self.headers.get('Content-Type')}
+            return self._reply(200, (
+                f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            ).encode('utf-8'), {'Content-Type': 'application/xml'})
+        
+        if 'uploadId' in params:
+            upload = server.uploads.get(params['uploadId'])
+            if upload is None or upload['key'] != key:
+                return self._error(404, 'NoSuchUpload')
+            if method == 'PUT':
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                part_path = os.path.join(server.root, bucket, '.parts', f"{params['uploadId']}.{int(params['partNumber'])}")
+                with open(part_path, 'wb') as output:
+                    output.write(body)
+                upload['parts'][int(params['partNumber'])] = (etag, part_path)
+                return self._reply(200, headers={'ETag': etag})
+            if method == 'POST':
+                manifest = [
+                    (int(part.findtext('PartNumber')), part.findtext('ETag'))
+                    for part in ElementTree.fromstring(body).iter('Part')
+                ]
+                if not manifest or any(upload['parts'].get(number, (None,))[0] != etag for number, etag in manifest):
+                    return self._error(400, 'InvalidPart')
+                data = b''
+                for number, _ in manifest:
+                    with open(upload['parts'][number][1], 'rb') as part:
+                        data += part.read()
+                self._write(key, data, upload['content_type'])
+                self._drop_upload(params['uploadId'])
+                return self._reply(200, f"<CompleteMultipartUploadResult><Key>{key}</Key></CompleteMultipartUploadResult>"
+                                   .encode('utf-8'), {'Content-Type': 'application/xml'})
+            if method == 'DELETE':
+                self._drop_upload(params['uploadId'])
+                return self._reply(204)
+        
+        if method == 'PUT' and self.headers.get('x-amz-copy-source'):
+            source_key = unquote(self.headers['x-amz-copy-source']).lstrip('/').partition('/')[2]
+            source_path = server.object_path(source_key)
+            if source_path is None or not os.path.isfile(source_path):
+                return self._error(404, 'NoSuchKey')
+            with open(source_path, 'rb') as source:
+                data = source.read()
+            self._write(key, data, server.content_types.get(source_key))
+            return self._reply(200, (
+                f'<CopyObjectResult><ETag>"{hashlib.md5(data).hexdigest()}"</ETag></CopyObjectResult>'
+            ).encode('utf-8'), {'Content-Type': 'application/xml'})
+        if method == 'PUT':
+            checksum = self.headers.get('x-amz-checksum-sha256')
+            if checksum and checksum != base64.b64encode(hashlib.sha256(body).digest()).decode('ascii'):
+                return self._error(400, 'BadDigest')
+            self._write(key, body, self.headers.get('Content-Type'))
+            return self._reply(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+        if method == 'DELETE':
+            if os.path.isfile(object_path):
+                os.remove(object_path)
+            return self._reply(204)
+        if method in ('GET', 'HEAD'):
+            if not os.path.isfile(object_path):
+                return self._error(404, 'NoSuchKey')
+            with open(object_path, 'rb') as source:
+                data = source.read()
+            headers = {
+                'Content-Type': server.content_types.get(key) or 'application/octet-stream',
+                'ETag': f'"{hashlib.md5(data).hexdigest()}"'
+            }
+            byte_range = self.headers.get('Range', '')
+            if method == 'GET' and byte_range.startswith('bytes='):
+                first, _, last = byte_range[len('bytes='):].partition('-')
+                first, last = int(first), min(int(last or len(data) - 1), len(data) - 1)
+                headers['Content-Range'] = f"bytes {first}-{last}/{len(data)}"
+                part = data[first:last + 1]
+                return self._reply(206, part, {**headers, 'Content-Length': str(len(part))})
+            return self._reply(200, data, {**headers, 'Content-Length': str(len(data))})
+        return self._error(405, 'MethodNotAllowed')
+    
+    def _write(self, key, data, content_type):
+        object_path = self.server.object_path(key)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        partial_path = f"{object_path}.{uuid.uuid4().hex}.part"
+        with open(partial_path, 'wb') as output:
+            output.write(data)
+        os.replace(partial_path, object_path)
+        self.server.content_types[key] = content_type
+    
+    def _drop_upload(self, upload_id):
+        with self.server.lock:
+            upload = self.server.uploads.pop(upload_id, None)
+        for _, part_path in (upload or {'parts': {}})['parts'].values():
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+def main(port=9000, root='s3data'):
+    server = LocalS3Server(root, address=('127.0.0.1', port))
+    print(f"✅ Serving bucket '{server.bucket}' from {os.path.abspath(root)} at {server.endpoint}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 9000, sys.argv[2] if len(sys.argv) > 2 else 's3data')
@@ -0,0 +1,30 @@
+"""Add composite indexes for keyset pagination of posts
+
+Revision ID: a1c3e5f7b902
+Revises: 7fad5ac26934
+Create Date: 2026-10-17 09:12:31.408112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b902'
+down_revision = '7fad5ac26934'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_created_at_id', ['created_at', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_posts_likes_count_id', ['likes_count', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_posts_comments_count_id', ['comments_count', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_comments_count_id', if_exists=True)
+        batch_op.drop_index('ix_posts_likes_count_id', if_exists=True)
+        batch_op.drop_index('ix_posts_created_at_id', if_exists=True)
@@ -0,0 +1,37 @@
+"""Add image variant maps to users and posts
+
+Revision ID: a2e6f8c41d93
+Revises: f1d7b3c95a28
+Create Date: 2026-10-17 20:58:13.902417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2e6f8c41d93'
+down_revision = 'f1d7b3c95a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columns = [column['name'] for column in inspector.get_columns('users')]
+    if 'profile_image_variants' not in columns:
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('profile_image_variants', sa.Text(), nullable=True))
+
+    columns = [column['name'] for column in inspector.get_columns('posts')]
+    if 'media_variants' not in columns:
+        with op.batch_alter_table('posts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('media_variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('media_variants')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('profile_image_variants')
@@ -0,0 +1,31 @@
+"""Add media_upload_claims table
+
+Revision ID: a5c81e3f9d27
+Revises: e9b3c5d71a46
+Create Date: 2026-10-17 01:27:43.604918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c81e3f9d27'
+down_revision = 'e9b3c5d71a46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_upload_claims',
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('path'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_media_upload_claims_created_at'), 'media_upload_claims', ['created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_media_upload_claims_created_at'), table_name='media_upload_claims', if_exists=True)
+    op.drop_table('media_upload_claims', if_exists=True)
@@ -0,0 +1,47 @@
+"""Add connections and connection_requests tables
+
+Revision ID: a9d4e7c3f210
+Revises: f5b18d2c7e43
+Create Date: 2026-10-17 16:12:38.904215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e7c3f210'
+down_revision = 'f5b18d2c7e43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('connections',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('connected_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['connected_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'connected_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_connections_connected_id_user_id', 'connections', ['connected_id', 'user_id'], unique=False, if_not_exists=True)
+
+    op.create_table('connection_requests',
+    sa.Column('requester_id', sa.Integer(), nullable=False),
+    sa.Column('addressee_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['requester_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['addressee_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('requester_id', 'addressee_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_connection_requests_addressee_created', 'connection_requests', ['addressee_id', 'created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_connection_requests_addressee_created', table_name='connection_requests', if_exists=True)
+    op.drop_table('connection_requests', if_exists=True)
+    op.drop_index('ix_connections_connected_id_user_id', table_name='connections', if_exists=True)
+    op.drop_table('connections', if_exists=True)
@@ -0,0 +1,56 @@
+"""Add post_tags index table and backfill it from posts.tags
+
+Revision ID: b4d2f8a61c37
+Revises: a1c3e5f7b902
+Create Date: 2026-10-17 10:03:48.215690
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d2f8a61c37'
+down_revision = 'a1c3e5f7b902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_tags',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'tag'),
+    if_not_exists=True
+    )
+    with op.batch_alter_table('post_tags', schema=None) as batch_op:
+        batch_op.create_index('ix_post_tags_tag_post_id', ['tag', 'post_id'], unique=False, if_not_exists=True)
+
+    # Backfill from the JSON text column, normalizing the same way as PostTag.normalize
+    connection = op.get_bind()
+    post_tags = sa.table('post_tags', sa.column('post_id', sa.Integer), sa.column('tag', sa.String))
+    existing = set(connection.execute(sa.text("SELECT post_id, tag FROM post_tags")).fetchall())
+    rows = []
+    for post_id, raw_tags in connection.execute(sa.text("SELECT id, tags FROM posts WHERE tags IS NOT NULL")):
+        try:
+            tags = json.loads(raw_tags)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        seen = set()
+        for tag in tags if isinstance(tags, list) else []:
+            tag = str(tag).strip().lower()[:100]
+            if tag and tag not in seen and (post_id, tag) not in existing:
+                seen.add(tag)
+                rows.append({'post_id': post_id, 'tag': tag})
+    if rows:
+        op.bulk_insert(post_tags, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('post_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_tags_tag_post_id', if_exists=True)
+
+    op.drop_table('post_tags')
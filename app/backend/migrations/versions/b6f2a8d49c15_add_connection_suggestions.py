@@ -0,0 +1,36 @@
+"""Add connection_suggestions table for people you may know
+
+Revision ID: b6f2a8d49c15
+Revises: a9d4e7c3f210
+Create Date: 2026-10-17 16:58:02.771340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f2a8d49c15'
+down_revision = 'a9d4e7c3f210'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('connection_suggestions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('suggested_id', sa.Integer(), nullable=False),
+    sa.Column('mutual_count', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['suggested_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'suggested_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_connection_suggestions_user_score', 'connection_suggestions', ['user_id', 'score'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_connection_suggestions_user_score', table_name='connection_suggestions', if_exists=True)
+    op.drop_table('connection_suggestions', if_exists=True)
@@ -0,0 +1,37 @@
+"""Add media_blobs table
+
+Revision ID: b7f2d9e05c14
+Revises: a2e6f8c41d93
+Create Date: 2026-10-17 21:36:40.118274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f2d9e05c14'
+down_revision = 'a2e6f8c41d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('variants', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_media_blobs_sha256'), 'media_blobs', ['sha256'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_media_blobs_sha256'), table_name='media_blobs', if_exists=True)
+    op.drop_table('media_blobs', if_exists=True)
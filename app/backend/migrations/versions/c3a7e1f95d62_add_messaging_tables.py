@@ -0,0 +1,66 @@
+"""Add conversations, conversation_participants and messages tables
+
+Revision ID: c3a7e1f95d62
+Revises: b6f2a8d49c15
+Create Date: 2026-10-17 17:40:19.215806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7e1f95d62'
+down_revision = 'b6f2a8d49c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('direct_key', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('direct_key'),
+    if_not_exists=True
+    )
+
+    op.create_table('conversation_participants',
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=True),
+    sa.Column('last_activity_at', sa.DateTime(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_message_at', sa.DateTime(), nullable=True),
+    sa.Column('last_message_preview', sa.String(length=200), nullable=True),
+    sa.Column('last_sender_id', sa.Integer(), nullable=True),
+    sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_read_message_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('conversation_id', 'user_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_conversation_participants_user_activity', 'conversation_participants', ['user_id', 'last_activity_at', 'conversation_id'], unique=False, if_not_exists=True)
+
+    op.create_table('messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('sender_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_messages_conversation_created_id', 'messages', ['conversation_id', 'created_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_messages_conversation_created_id', table_name='messages', if_exists=True)
+    op.drop_table('messages', if_exists=True)
+    op.drop_index('ix_conversation_participants_user_activity', table_name='conversation_participants', if_exists=True)
+    op.drop_table('conversation_participants', if_exists=True)
+    op.drop_table('conversations', if_exists=True)
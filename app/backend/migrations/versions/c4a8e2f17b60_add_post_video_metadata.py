@@ -0,0 +1,43 @@
+"""Add video poster, duration and dimensions to posts
+
+Revision ID: c4a8e2f17b60
+Revises: b7f2d9e05c14
+Create Date: 2026-10-17 22:41:05.337812
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2f17b60'
+down_revision = 'b7f2d9e05c14'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('media_poster_url', sa.String(length=500)),
+    ('media_duration', sa.Float()),
+    ('media_width', sa.Integer()),
+    ('media_height', sa.Integer()),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = [column['name'] for column in inspector.get_columns('posts')]
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        for name, column_type in COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, column_type, nullable=True))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = [column['name'] for column in inspector.get_columns('posts')]
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        for name, _ in reversed(COLUMNS):
+            if name in existing:
+                batch_op.drop_column(name)
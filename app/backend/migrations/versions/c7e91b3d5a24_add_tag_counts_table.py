@@ -0,0 +1,43 @@
+"""Add tag_counts aggregate table and backfill it from post_tags
+
+Revision ID: c7e91b3d5a24
+Revises: b4d2f8a61c37
+Create Date: 2026-10-17 11:26:05.731904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e91b3d5a24'
+down_revision = 'b4d2f8a61c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_counts',
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.Column('post_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tag'),
+    if_not_exists=True
+    )
+    with op.batch_alter_table('tag_counts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tag_counts_post_count'), ['post_count'], unique=False, if_not_exists=True)
+
+    op.execute(sa.text("DELETE FROM tag_counts"))
+    op.execute(sa.text("""
+        INSERT INTO tag_counts (tag, post_count)
+        SELECT post_tags.tag, COUNT(*)
+        FROM post_tags JOIN posts ON posts.id = post_tags.post_id
+        WHERE posts.is_active = :active
+        GROUP BY post_tags.tag
+    """).bindparams(active=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tag_counts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tag_counts_post_count'), if_exists=True)
+
+    op.drop_table('tag_counts')
@@ -0,0 +1,82 @@
+"""Add jobs, job_skills and job_applications tables
+
+Revision ID: d5b9f3a72e84
+Revises: c3a7e1f95d62
+Create Date: 2026-10-17 18:52:07.431920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b9f3a72e84'
+down_revision = 'c3a7e1f95d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('poster_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('company', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('location', sa.String(length=100), nullable=True),
+    sa.Column('company_size', sa.String(length=50), nullable=True),
+    sa.Column('employment_type', sa.String(length=20), nullable=True),
+    sa.Column('experience_years', sa.Integer(), nullable=False),
+    sa.Column('skills', sa.Text(), nullable=True),
+    sa.Column('salary_min', sa.Integer(), nullable=True),
+    sa.Column('salary_max', sa.Integer(), nullable=True),
+    sa.Column('applications_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['poster_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_jobs_poster_id', 'jobs', ['poster_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_jobs_active_created_id', 'jobs', ['is_active', 'created_at', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_jobs_active_location', 'jobs', ['is_active', 'location'], unique=False, if_not_exists=True)
+    op.create_index('ix_jobs_active_company_size', 'jobs', ['is_active', 'company_size'], unique=False, if_not_exists=True)
+    op.create_index('ix_jobs_active_experience', 'jobs', ['is_active', 'experience_years'], unique=False, if_not_exists=True)
+
+    op.create_table('job_skills',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('skill', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'skill'),
+    if_not_exists=True
+    )
+    op.create_index('ix_job_skills_skill_job_id', 'job_skills', ['skill', 'job_id'], unique=False, if_not_exists=True)
+
+    op.create_table('job_applications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('cover_letter', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'user_id', name='uq_job_applications_job_user'),
+    if_not_exists=True
+    )
+    op.create_index('ix_job_applications_user_id', 'job_applications', ['user_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_job_applications_user_id', table_name='job_applications', if_exists=True)
+    op.drop_table('job_applications', if_exists=True)
+    op.drop_index('ix_job_skills_skill_job_id', table_name='job_skills', if_exists=True)
+    op.drop_table('job_skills', if_exists=True)
+    op.drop_index('ix_jobs_active_experience', table_name='jobs', if_exists=True)
+    op.drop_index('ix_jobs_active_company_size', table_name='jobs', if_exists=True)
+    op.drop_index('ix_jobs_active_location', table_name='jobs', if_exists=True)
+    op.drop_index('ix_jobs_active_created_id', table_name='jobs', if_exists=True)
+    op.drop_index('ix_jobs_poster_id', table_name='jobs', if_exists=True)
+    op.drop_table('jobs', if_exists=True)
@@ -0,0 +1,39 @@
+"""Add likes table with one like per user and post
+
+Revision ID: d83f4a0e6b19
+Revises: c7e91b3d5a24
+Create Date: 2026-10-17 13:41:19.902457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f4a0e6b19'
+down_revision = 'c7e91b3d5a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('likes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'post_id', name='uq_likes_user_post'),
+    if_not_exists=True
+    )
+    with op.batch_alter_table('likes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_likes_post_id'), ['post_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('likes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_likes_post_id'), if_exists=True)
+
+    op.drop_table('likes')
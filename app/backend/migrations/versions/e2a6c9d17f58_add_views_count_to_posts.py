@@ -0,0 +1,30 @@
+"""Add views_count counter to posts
+
+Revision ID: e2a6c9d17f58
+Revises: d83f4a0e6b19
+Create Date: 2026-10-17 14:52:07.118364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6c9d17f58'
+down_revision = 'd83f4a0e6b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')]
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        if 'views_count' not in columns:
+            batch_op.add_column(sa.Column('views_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_posts_views_count_id', ['views_count', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_posts_views_count_id', table_name='posts', if_exists=True)
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('views_count')
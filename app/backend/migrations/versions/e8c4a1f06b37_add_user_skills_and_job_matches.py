@@ -0,0 +1,70 @@
+"""Add user_skills index and job_matches tables
+
+Revision ID: e8c4a1f06b37
+Revises: d5b9f3a72e84
+Create Date: 2026-10-17 19:31:44.108352
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4a1f06b37'
+down_revision = 'd5b9f3a72e84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_skills',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('skill', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'skill'),
+    if_not_exists=True
+    )
+    op.create_index('ix_user_skills_skill_user_id', 'user_skills', ['skill', 'user_id'], unique=False, if_not_exists=True)
+
+    op.create_table('job_matches',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('matched_skills', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'user_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_job_matches_job_score', 'job_matches', ['job_id', 'score'], unique=False, if_not_exists=True)
+    op.create_index('ix_job_matches_user_score', 'job_matches', ['user_id', 'score'], unique=False, if_not_exists=True)
+
+    # Backfill from the JSON text column, normalizing the same way as JobSkill.normalize;
+    # job_matches is filled by build_job_matches.py
+    connection = op.get_bind()
+    user_skills = sa.table('user_skills', sa.column('user_id', sa.Integer), sa.column('skill', sa.String))
+    existing = set(connection.execute(sa.text("SELECT user_id, skill FROM user_skills")).fetchall())
+    rows = []
+    for user_id, raw_skills in connection.execute(sa.text("SELECT id, skills FROM users WHERE skills IS NOT NULL")):
+        try:
+            skills = json.loads(raw_skills)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        seen = set()
+        for skill in skills if isinstance(skills, list) else []:
+            skill = str(skill).strip().lower()[:100]
+            if skill and skill not in seen and (user_id, skill) not in existing:
+                seen.add(skill)
+                rows.append({'user_id': user_id, 'skill': skill})
+    if rows:
+        op.bulk_insert(user_skills, rows)
+
+
+def downgrade():
+    op.drop_index('ix_job_matches_user_score', table_name='job_matches', if_exists=True)
+    op.drop_index('ix_job_matches_job_score', table_name='job_matches', if_exists=True)
+    op.drop_table('job_matches', if_exists=True)
+    op.drop_index('ix_user_skills_skill_user_id', table_name='user_skills', if_exists=True)
+    op.drop_table('user_skills', if_exists=True)
@@ -0,0 +1,65 @@
+"""Add the full-text search index for posts and index existing posts
+
+Revision ID: e9b3c5d71a46
+Revises: c4a8e2f17b60
+Create Date: 2026-10-17 01:18:52.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b3c5d71a46'
+down_revision = 'c4a8e2f17b60'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts
+       USING fts5(content, content='posts', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+         INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+         INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF content ON posts BEGIN
+         INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+         INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+       END""",
+    # Index the posts written before the triggers existed
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS posts_fts_au",
+    "DROP TRIGGER IF EXISTS posts_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_fts_ai",
+    "DROP TABLE IF EXISTS posts_fts",
+]
+
+# A stored generated column is computed for existing rows when it is added
+POSTGRESQL_UPGRADE = [
+    """ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+       GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_posts_search_vector",
+    "ALTER TABLE posts DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements_by_dialect):
+    for statement in statements_by_dialect.get(op.get_bind().dialect.name, []):
+        op.execute(sa.text(statement))
+
+
+def upgrade():
+    _run({'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRESQL_UPGRADE})
+
+
+def downgrade():
+    _run({'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRESQL_DOWNGRADE})
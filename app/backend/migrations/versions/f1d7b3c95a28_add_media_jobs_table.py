@@ -0,0 +1,40 @@
+"""Add media_jobs table
+
+Revision ID: f1d7b3c95a28
+Revises: e8c4a1f06b37
+Create Date: 2026-10-17 20:14:52.660193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1d7b3c95a28'
+down_revision = 'e8c4a1f06b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('source_path', sa.String(length=500), nullable=True),
+    sa.Column('output_path', sa.String(length=500), nullable=True),
+    sa.Column('result_url', sa.String(length=500), nullable=True),
+    sa.Column('error', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_media_jobs_user_kind_status', 'media_jobs', ['user_id', 'kind', 'status'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_media_jobs_user_kind_status', table_name='media_jobs', if_exists=True)
+    op.drop_table('media_jobs', if_exists=True)
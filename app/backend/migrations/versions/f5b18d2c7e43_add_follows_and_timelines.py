@@ -0,0 +1,66 @@
+"""Add follows, timeline_entries and users.followers_count for the home feed
+
+Revision ID: f5b18d2c7e43
+Revises: e2a6c9d17f58
+Create Date: 2026-10-17 15:31:44.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b18d2c7e43'
+down_revision = 'e2a6c9d17f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('follows',
+    sa.Column('follower_id', sa.Integer(), nullable=False),
+    sa.Column('followed_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['followed_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('follower_id', 'followed_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_follows_followed_id_follower_id', 'follows', ['followed_id', 'follower_id'], unique=False, if_not_exists=True)
+
+    op.create_table('timeline_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'post_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_timeline_entries_user_created_post', 'timeline_entries', ['user_id', 'created_at', 'post_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_timeline_entries_user_author', 'timeline_entries', ['user_id', 'author_id'], unique=False, if_not_exists=True)
+
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')]
+    if 'followers_count' not in columns:
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Nobody follows anyone yet, so every timeline starts with the user's own posts
+    op.execute(
+        "INSERT INTO timeline_entries (user_id, post_id, author_id, created_at) "
+        "SELECT user_id, id, user_id, created_at FROM posts "
+        "WHERE is_active AND created_at IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM timeline_entries t WHERE t.user_id = posts.user_id AND t.post_id = posts.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('followers_count')
+
+    op.drop_index('ix_timeline_entries_user_author', table_name='timeline_entries', if_exists=True)
+    op.drop_index('ix_timeline_entries_user_created_post', table_name='timeline_entries', if_exists=True)
+    op.drop_table('timeline_entries', if_exists=True)
+    op.drop_index('ix_follows_followed_id_follower_id', table_name='follows', if_exists=True)
+    op.drop_table('follows', if_exists=True)
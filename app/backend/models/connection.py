@@ -0,0 +1,187 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db, cache
+
+# Cached adjacency sets live here, one key per user
+CONNECTIONS_CACHE_NAMESPACE = 'connections'
+ADJACENCY_CACHE_TTL = 600
+
+class Connection(db.Model):
+    """Accepted connection, stored once per direction.
+    
+    Keeping both (a, b) and (b, a) means "who is connected to user X" is a
+    range scan of the primary key for either endpoint, and visibility
+    checks become a plain indexed semi-join on user_id.
+    """
+    __tablename__ = 'connections'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    connected_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # The primary key covers lookups by user_id; this covers the reverse side
+    __table_args__ = (
+        db.Index('ix_connections_connected_id_user_id', 'connected_id', 'user_id'),
+    )
+    
+    def __init__(self, user_id, connected_id):
+        self.user_id = user_id
+        self.connected_id = connected_id
+    
+    @classmethod
+    def connected_ids_query(cls, user_id):
+        """SELECT of the user's connection ids, for use in semi-joins"""
+        return db.select(cls.connected_id).where(cls.user_id == user_id)
+    
+    @classmethod
+    def adjacency(cls, user_id):
+        """Set of the user's connection ids, cached until the user's connections change.
+        
+        With the per-worker memory cache another worker can hold a stale set
+        until ADJACENCY_CACHE_TTL, so this only filters suggestions;
+        authorization uses are_connected.
+        """
+        ids = cache.get_or_set(
+            str(user_id),
+            lambda: sorted(db.session.scalars(cls.connected_ids_query(user_id))),
+            ttl=ADJACENCY_CACHE_TTL,
+            namespace=CONNECTIONS_CACHE_NAMESPACE
+        )
+        return set(ids)
+    
+    @classmethod
+    def are_connected(cls, user_id, other_id):
+        """Whether the two users are connected, read from the database (a primary key lookup)"""
+        return db.session.scalar(db.select(db.exists().where(
+            cls.user_id == user_id, cls.connected_id == other_id
+        )))
+    
+    @classmethod
+    def request(cls, requester_id, addressee_id):
+        """Ask to connect; accepts straight away when the other user already asked.
+        
+        Returns 'connected', 'pending' or 'already_connected'.
+        """
+        if requester_id == addressee_id:
+            raise ValueError("You cannot connect with yourself")
+        
+        if cls.are_connected(requester_id, addressee_id):
+            return 'already_connected'
+        
+        try:
+            reverse = db.session.execute(
+                db.delete(ConnectionRequest).where(
+                    ConnectionRequest.requester_id == addressee_id,
+                    ConnectionRequest.addressee_id == requester_id
+                )
+            ).rowcount
+            if reverse:
+                cls._link(requester_id, addressee_id)
+                status = 'connected'
+            else:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(ConnectionRequest(requester_id, addressee_id))
+                except IntegrityError:
+                    pass  # Asked before; the request is still pending
+                status = 'pending'
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        if status == 'connected':
+            cls._forget(requester_id, addressee_id)
+        return status
+    
+    @classmethod
+    def accept(cls, addressee_id, requester_id):
+        """Accept a pending request; returns False if there was none"""
+        try:
+            removed = db.session.execute(
+                db.delete(ConnectionRequest).where(
+                    ConnectionRequest.requester_id == requester_id,
+                    ConnectionRequest.addressee_id == addressee_id
+                )
+            ).rowcount
+            if removed:
+                cls._link(requester_id, addressee_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        if removed:
+            cls._forget(requester_id, addressee_id)
+        return bool(removed)
+    
+    @classmethod
+    def remove(cls, user_id, other_id):
+        """Disconnect two users, or withdraw/decline a request between them"""
+        try:
+            removed = db.session.execute(
+                db.delete(cls).where(db.or_(
+                    db.and_(cls.user_id == user_id, cls.connected_id == other_id),
+                    db.and_(cls.user_id == other_id, cls.connected_id == user_id)
+                ))
+            ).rowcount
+            removed += db.session.execute(
+                db.delete(ConnectionRequest).where(db.or_(
+                    db.and_(ConnectionRequest.requester_id == user_id, ConnectionRequest.addressee_id == other_id),
+                    db.and_(ConnectionRequest.requester_id == other_id, ConnectionRequest.addressee_id == user_id)
+                ))
+            ).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        cls._forget(user_id, other_id)
+        return bool(removed)
+    
+    @classmethod
+    def _link(cls, user_id, other_id):
+        """Insert both directions unless they already exist; does not commit"""
+        for a, b in ((user_id, other_id), (other_id, user_id)):
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(user_id=a, connected_id=b))
+            except IntegrityError:
+                pass
+    
+    @classmethod
+    def _forget(cls, *user_ids):
+        """Drop cached adjacency sets after a committed change"""
+        for user_id in user_ids:
+            cache.delete(str(user_id), namespace=CONNECTIONS_CACHE_NAMESPACE)
+    
+    def __repr__(self):
+        return f'<Connection {self.user_id} <-> {self.connected_id}>'
+
+
+class ConnectionRequest(db.Model):
+    """Pending request from requester_id to addressee_id"""
+    __tablename__ = 'connection_requests'
+    
+    requester_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    addressee_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Incoming requests for a user, newest first
+    __table_args__ = (
+        db.Index('ix_connection_requests_addressee_created', 'addressee_id', 'created_at'),
+    )
+    
+    def __init__(self, requester_id, addressee_id):
+        self.requester_id = requester_id
+        self.addressee_id = addressee_id
+    
+    def to_dict(self):
+        return {
+            'requester_id': self.requester_id,
+            'addressee_id': self.addressee_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ConnectionRequest {self.requester_id} -> {self.addressee_id}>'
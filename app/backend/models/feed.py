@@ -0,0 +1,19 @@
+from extensions import db
+
+class TimelineEntry(db.Model):
+    """Precomputed home-feed row: post_id appears in user_id's timeline"""
+    __tablename__ = 'timeline_entries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    author_id = db.Column(db.Integer, nullable=False)
+    # Copy of posts.created_at so a page is a single index range scan
+    created_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_timeline_entries_user_created_post', 'user_id', 'created_at', 'post_id'),
+        db.Index('ix_timeline_entries_user_author', 'user_id', 'author_id'),
+    )
+    
+    def __repr__(self):
+        return f'<TimelineEntry User {self.user_id} Post {self.post_id}>'
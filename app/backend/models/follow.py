@@ -0,0 +1,53 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+class Follow(db.Model):
+    """Directed follow edge: follower_id sees followed_id's posts in their feed"""
+    __tablename__ = 'follows'
+    
+    follower_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    followed_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # The primary key serves "who do I follow"; this index serves fan-out
+    __table_args__ = (
+        db.Index('ix_follows_followed_id_follower_id', 'followed_id', 'follower_id'),
+    )
+    
+    def __init__(self, follower_id, followed_id):
+        self.follower_id = follower_id
+        self.followed_id = followed_id
+    
+    @classmethod
+    def follow(cls, follower_id, followed_id):
+        """Create the edge; returns False if it already existed"""
+        from models.user import User
+        
+        if follower_id == followed_id:
+            raise ValueError("You cannot follow yourself")
+        
+        try:
+            db.session.add(cls(follower_id=follower_id, followed_id=followed_id))
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        
+        User.adjust_followers(followed_id, 1)
+        return True
+    
+    @classmethod
+    def unfollow(cls, follower_id, followed_id):
+        """Remove the edge; returns False if there was none"""
+        from models.user import User
+        
+        removed = db.session.execute(
+            db.delete(cls).where(cls.follower_id == follower_id, cls.followed_id == followed_id)
+        ).rowcount
+        if removed:
+            User.adjust_followers(followed_id, -1)
+        return bool(removed)
+    
+    def __repr__(self):
+        return f'<Follow {self.follower_id} -> {self.followed_id}>'
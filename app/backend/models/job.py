@@ -0,0 +1,231 @@
+import json
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+# Experience facet buckets: (name, lowest years, highest years or None)
+EXPERIENCE_BUCKETS = (
+    ('0-1', 0, 1),
+    ('2-4', 2, 4),
+    ('5-9', 5, 9),
+    ('10+', 10, None),
+)
+
+COMPANY_SIZES = ('1-10', '11-50', '51-200', '201-500', '501-1000', '1000+')
+EMPLOYMENT_TYPES = ('full-time', 'part-time', 'contract', 'internship', 'temporary')
+
+class Job(db.Model):
+    """Job posting on the jobs board"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    poster_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
+    company = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    location = db.Column(db.String(100), nullable=True)
+    company_size = db.Column(db.String(50), nullable=True)  # Same values as Profile.company_size
+    employment_type = db.Column(db.String(20), default='full-time')
+    experience_years = db.Column(db.Integer, nullable=False, default=0)  # Minimum required
+    skills = db.Column(db.Text, nullable=True)  # JSON string, indexed in job_skills
+    salary_min = db.Column(db.Integer, nullable=True)
+    salary_max = db.Column(db.Integer, nullable=True)
+    applications_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    poster = db.relationship('User', backref=db.backref('jobs', lazy='dynamic'))
+    skill_entries = db.relationship('JobSkill', backref='job', cascade='all, delete-orphan')
+    
+    # Facet columns lead with is_active, which every board query filters on
+    __table_args__ = (
+        db.Index('ix_jobs_active_created_id', 'is_active', 'created_at', 'id'),
+        db.Index('ix_jobs_active_location', 'is_active', 'location'),
+        db.Index('ix_jobs_active_company_size', 'is_active', 'company_size'),
+        db.Index('ix_jobs_active_experience', 'is_active', 'experience_years'),
+    )
+    
+    def __init__(self, poster_id, title, company, description, **kwargs):
+        self.poster_id = poster_id
+        self.title = title
+        self.company = company
+        self.description = description
+        self.experience_years = 0
+        skills = kwargs.pop('skills', None)
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+        self.set_skills(skills)
+    
+    def set_skills(self, skills):
+        """Store the skill list and keep the job_skills index rows in step"""
+        wanted = JobSkill.normalize(skills)
+        self.skills = json.dumps(wanted) if wanted else None
+        existing = {entry.skill for entry in self.skill_entries}
+        self.skill_entries = [entry for entry in self.skill_entries if entry.skill in wanted]
+        for skill in wanted:
+            if skill not in existing:
+                self.skill_entries.append(JobSkill(skill=skill))
+    
+    def get_skills(self):
+        try:
+            return json.loads(self.skills) if self.skills else []
+        except (json.JSONDecodeError, TypeError):
+            return []
+    
+    def validate(self):
+        """Raise ValueError describing the first invalid field"""
+        if not self.title or not self.title.strip():
+            raise ValueError("Job title is required")
+        if not self.company or not self.company.strip():
+            raise ValueError("Company is required")
+        if not self.description or not self.description.strip():
+            raise ValueError("Job description is required")
+        if self.company_size and self.company_size not in COMPANY_SIZES:
+            raise ValueError("Invalid company size")
+        if self.employment_type and self.employment_type not in EMPLOYMENT_TYPES:
+            raise ValueError("Invalid employment type")
+        if self.experience_years is None or int(self.experience_years) < 0:
+            raise ValueError("Experience years must be zero or more")
+        if self.salary_min and self.salary_max and int(self.salary_min) > int(self.salary_max):
+            raise ValueError("Minimum salary cannot exceed maximum salary")
+    
+    def save(self):
+        """Validate and save job to database"""
+        self.validate()
+        try:
+            db.session.add(self)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Failed to save job: {str(e)}")
+    
+    def update(self, **kwargs):
+        """Update job fields"""
+        for key, value in kwargs.items():
+            if key == 'skills':
+                self.set_skills(value)
+            elif hasattr(self, key):
+                setattr(self, key, value)
+        self.updated_at = datetime.utcnow()
+        return self.save()
+    
+    def delete(self):
+        """Soft delete job"""
+        self.is_active = False
+        return self.save()
+    
+    @staticmethod
+    def experience_bucket():
+        """SQL expression naming the EXPERIENCE_BUCKETS entry of each job"""
+        return db.case(
+            *[(Job.experience_years <= high, name) for name, _, high in EXPERIENCE_BUCKETS if high is not None],
+            else_=EXPERIENCE_BUCKETS[-1][0]
+        )
+    
+    @classmethod
+    def find_by_id(cls, job_id):
+        return cls.query.filter_by(id=job_id, is_active=True).first()
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'poster_id': self.poster_id,
+            'title': self.title,
+            'company': self.company,
+            'description': self.description,
+            'location': self.location,
+            'company_size': self.company_size,
+            'employment_type': self.employment_type,
+            'experience_years': self.experience_years,
+            'skills': self.get_skills(),
+            'salary_min': self.salary_min,
+            'salary_max': self.salary_max,
+            'applications_count': self.applications_count or 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.title}>'
+
+
+class JobSkill(db.Model):
+    """Inverted index row, one per (job, skill)"""
+    __tablename__ = 'job_skills'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    skill = db.Column(db.String(100), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_job_skills_skill_job_id', 'skill', 'job_id'),
+    )
+    
+    @staticmethod
+    def normalize(skills):
+        """Lowercase, trim and de-duplicate skills while keeping their order"""
+        normalized = []
+        for skill in skills or []:
+            skill = str(skill).strip().lower()[:100]
+            if skill and skill not in normalized:
+                normalized.append(skill)
+        return normalized
+    
+    def __repr__(self):
+        return f'<JobSkill {self.skill} on Job {self.job_id}>'
+
+
+class JobApplication(db.Model):
+    """A user's application to a job; at most one per (job, user)"""
+    __tablename__ = 'job_applications'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    cover_letter = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='submitted')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    applicant = db.relationship('User')
+    
+    __table_args__ = (
+        db.UniqueConstraint('job_id', 'user_id', name='uq_job_applications_job_user'),
+    )
+    
+    @classmethod
+    def apply(cls, job_id, user_id, cover_letter=None):
+        """Submit an application; returns None if the user already applied"""
+        try:
+            application = cls(job_id=job_id, user_id=user_id, cover_letter=cover_letter)
+            with db.session.begin_nested():
+                db.session.add(application)
+            db.session.execute(
+                db.update(Job)
+                  .where(Job.id == job_id)
+                  .values(applications_count=db.func.coalesce(Job.applications_count, 0) + 1,
+                          updated_at=Job.updated_at)
+                  .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            return application
+        except IntegrityError:
+            db.session.rollback()
+            return None
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'cover_letter': self.cover_letter,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<JobApplication User {self.user_id} -> Job {self.job_id}>'
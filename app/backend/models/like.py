@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+class Like(db.Model):
+    """A user's like on a post; at most one per (user, post)"""
+    __tablename__ = 'likes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'post_id', name='uq_likes_user_post'),
+    )
+    
+    def __init__(self, user_id, post_id):
+        self.user_id = user_id
+        self.post_id = post_id
+    
+    @classmethod
+    def toggle(cls, user_id, post_id):
+        """Like the post if the user has not yet, otherwise unlike it.
+        
+        Returns (liked, likes_count). The unique constraint settles races
+        between concurrent toggles by the same user, and the counter is
+        moved with a single atomic UPDATE in the same transaction.
+        """
+        from models.post import Post
+        
+        try:
+            removed = db.session.execute(
+                db.delete(cls).where(cls.user_id == user_id, cls.post_id == post_id)
+            ).rowcount
+            
+            if removed:
+                liked = False
+                likes_count = Post.adjust_counter(post_id, 'likes_count', -1)
+            else:
+                liked = True
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(cls(user_id=user_id, post_id=post_id))
+                    likes_count = Post.adjust_counter(post_id, 'likes_count', 1)
+                except IntegrityError:
+                    # A concurrent request by the same user already liked it
+                    likes_count = db.session.scalar(db.select(Post.likes_count).where(Post.id == post_id))
+            
+            db.session.commit()
+            return liked, likes_count
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    @classmethod
+    def liked_post_ids(cls, user_id, post_ids):
+        """Subset of post_ids liked by the user, in one query"""
+        if not post_ids:
+            return set()
+        return set(db.session.scalars(
+            db.select(cls.post_id).where(cls.user_id == user_id, cls.post_id.in_(post_ids))
+        ))
+    
+    def __repr__(self):
+        return f'<Like User {self.user_id} -> Post {self.post_id}>'
@@ -0,0 +1,46 @@
+from datetime import datetime
+from extensions import db
+
+class UserSkill(db.Model):
+    """Inverted index row for User.skills, one per (user, normalized skill)"""
+    __tablename__ = 'user_skills'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    skill = db.Column(db.String(100), primary_key=True)
+    
+    # "Who has this skill" is a range scan on the skill
+    __table_args__ = (
+        db.Index('ix_user_skills_skill_user_id', 'skill', 'user_id'),
+    )
+    
+    def __repr__(self):
+        return f'<UserSkill {self.skill} on User {self.user_id}>'
+
+
+class JobMatch(db.Model):
+    """Precomputed job/candidate match, refreshed when the job or the user's profile changes"""
+    __tablename__ = 'job_matches'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    matched_skills = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Both directions are read best-first with one index range scan
+    __table_args__ = (
+        db.Index('ix_job_matches_job_score', 'job_id', 'score'),
+        db.Index('ix_job_matches_user_score', 'user_id', 'score'),
+    )
+    
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'score': round(self.score, 4),
+            'matched_skills': self.matched_skills,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<JobMatch Job {self.job_id} ~ User {self.user_id} ({self.score:.2f})>'
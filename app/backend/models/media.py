@@ -0,0 +1,184 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+class MediaJob(db.Model):
+    """Background media processing job; its row is the status the client polls"""
+    __tablename__ = 'media_jobs'
+    
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # e.g. 'profile_image'
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    source_path = db.Column(db.String(500), nullable=True)  # Raw upload, relative to UPLOAD_FOLDER
+    output_path = db.Column(db.String(500), nullable=True)
+    result_url = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_media_jobs_user_kind_status', 'user_id', 'kind', 'status'),
+    )
+    
+    @classmethod
+    def find_for_user(cls, job_id, user_id):
+        return cls.query.filter_by(id=job_id, user_id=user_id).first()
+    
+    @classmethod
+    def cancel_pending(cls, user_id, kind):
+        """Cancel the user's unfinished jobs of this kind, so an older upload cannot win; does not commit"""
+        return cls.query.filter_by(user_id=user_id, kind=kind, status=cls.PENDING)\
+                        .update({'status': cls.CANCELLED, 'finished_at': datetime.utcnow()},
+                                synchronize_session=False)
+    
+    def finish(self, status, result_url=None, error=None):
+        self.status = status
+        self.result_url = result_url
+        self.error = error[:500] if error else None
+        self.finished_at = datetime.utcnow()
+    
+    def expire_if_stale(self, timeout_seconds):
+        """Fail a job whose worker died before reporting back; returns True if it changed"""
+        if self.status == self.PENDING and self.created_at \
+                and datetime.utcnow() - self.created_at > timedelta(seconds=timeout_seconds):
+            self.finish(self.FAILED, error='Processing timed out')
+            return True
+        return False
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result_url': self.result_url,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<MediaJob {self.id} {self.kind} {self.status}>'
+
+
+class MediaBlob(db.Model):
+    """One stored file under UPLOAD_FOLDER/media, shared by every row that uses the same bytes"""
+    __tablename__ = 'media_blobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), unique=True, nullable=False)  # Relative to UPLOAD_FOLDER
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.BigInteger, nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    variants = db.Column(db.Text, nullable=True)  # JSON: kind -> rendered map, each path holding a reference
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def find_by_path(cls, path):
+        return cls.query.filter_by(path=path).first()
+    
+    @classmethod
+    def acquire(cls, path, sha256, size=None):
+        """Add a reference to the blob at path, creating it on first use; does not commit"""
+        increment = {'ref_count': cls.ref_count + 1}
+        if cls.query.filter_by(path=path).update(increment, synchronize_session=False):
+            return False
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(path=path, sha256=sha256, size=size, ref_count=1))
+            return True
+        except IntegrityError:
+            # Another request created it first
+            cls.query.filter_by(path=path).update(increment, synchronize_session=False)
+            return False
+    
+    @classmethod
+    def release(cls, paths):
+        """Drop one reference from each blob; returns the paths whose last reference went, rows deleted"""
+        orphaned = []
+        pending = list(paths)
+        while pending:
+            path = pending.pop()
+            released = cls.query.filter(cls.path == path, cls.ref_count > 0)\
+                                .update({'ref_count': cls.ref_count - 1}, synchronize_session=False)
+            if not released:
+                # Not tracked (stored before blobs existed) or already gone
+                continue
+            row = db.session.query(cls.ref_count, cls.variants).filter_by(path=path).first()
+            if row is None or row.ref_count > 0:
+                continue
+            # The guard keeps a concurrent acquire from losing its blob
+            if cls.query.filter_by(path=path, ref_count=0).delete(synchronize_session=False):
+                orphaned.append(path)
+                # Derived variants were referenced by this blob alone (never by itself, see cache_variants)
+                pending.extend(cls.variant_paths(cls._load_variants(row.variants)) - {path})
+        return orphaned
+    
+    @staticmethod
+    def _load_variants(raw):
+        try:
+            return json.loads(raw) if raw else {}
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    
+    @staticmethod
+    def variant_paths(variants_by_kind):
+        """Distinct file paths in a {kind: {name: {format: path, ...}}} map; other values are numbers"""
+        return {
+            value
+            for rendered in variants_by_kind.values()
+            for entry in rendered.values()
+            for value in entry.values()
+            if isinstance(value, str)
+        }
+    
+    def cached_variants(self, kind):
+        """Variants already rendered from this blob for kind, or None"""
+        return self._load_variants(self.variants).get(kind)
+    
+    def cache_variants(self, kind, rendered):
+        """Remember variants rendered from this blob; the caller acquires their paths except self.path,
+        which a re-encode can reproduce byte for byte"""
+        variants = self._load_variants(self.variants)
+        variants[kind] = rendered
+        self.variants = json.dumps(variants)
+    
+    def __repr__(self):
+        return f'<MediaBlob {self.path} refs={self.ref_count}>'
+
+
+class MediaUploadClaim(db.Model):
+    """A staged direct upload that has been attached to a post.
+    
+    The primary key on path is what makes attaching atomic on every storage
+    backend: a second claim of the same path waits for the first transaction
+    and then fails, before either fetches the file.
+    """
+    __tablename__ = 'media_upload_claims'
+    
+    path = db.Column(db.String(500), primary_key=True)  # Staging path from the upload ticket
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    @classmethod
+    def claim(cls, path):
+        """Record the claim; False when the path was already claimed. Does not commit"""
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(path=path))
+            return True
+        except IntegrityError:
+            return False
+    
+    @classmethod
+    def purge_before(cls, cutoff):
+        """Forget claims whose tickets have expired and can no longer be presented; does not commit"""
+        return cls.query.filter(cls.created_at < cutoff).delete(synchronize_session=False)
+    
+    def __repr__(self):
+        return f'<MediaUploadClaim {self.path}>'
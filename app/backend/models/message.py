@@ -0,0 +1,196 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+# Characters of the latest message kept on each participant row
+PREVIEW_LENGTH = 200
+
+class Conversation(db.Model):
+    """A direct conversation between two users"""
+    __tablename__ = 'conversations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # "<smaller user id>:<larger user id>", so each pair has one conversation
+    direct_key = db.Column(db.String(50), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    participants = db.relationship('ConversationParticipant', backref='conversation', lazy='select',
+                                   cascade='all, delete-orphan')
+    
+    @staticmethod
+    def direct_key_for(user_id, other_id):
+        low, high = sorted((int(user_id), int(other_id)))
+        return f'{low}:{high}'
+    
+    @classmethod
+    def get_or_create_direct(cls, user_id, other_id):
+        """Return (conversation, created) for the pair; commits when it creates one"""
+        if int(user_id) == int(other_id):
+            raise ValueError("You cannot message yourself")
+        
+        key = cls.direct_key_for(user_id, other_id)
+        conversation = cls.query.filter_by(direct_key=key).first()
+        if conversation:
+            return conversation, False
+        
+        try:
+            conversation = cls(direct_key=key)
+            db.session.add(conversation)
+            db.session.flush()
+            for participant_id in (user_id, other_id):
+                db.session.add(ConversationParticipant(conversation_id=conversation.id, user_id=participant_id))
+            db.session.commit()
+            return conversation, True
+        except IntegrityError:
+            # Created concurrently by the other participant
+            db.session.rollback()
+            return cls.query.filter_by(direct_key=key).first(), False
+    
+    def __repr__(self):
+        return f'<Conversation {self.id} {self.direct_key}>'
+
+
+class ConversationParticipant(db.Model):
+    """A user's view of a conversation, with the latest message denormalized onto it.
+    
+    Listing a user's conversations reads only these rows (newest activity
+    first through ix_conversation_participants_user_activity), so no
+    per-conversation lookups of the last message or unread count are needed.
+    """
+    __tablename__ = 'conversation_participants'
+    
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    joined_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Time of the latest message, or of creation while there is none
+    last_activity_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    last_message_preview = db.Column(db.String(PREVIEW_LENGTH), nullable=True)
+    last_sender_id = db.Column(db.Integer, nullable=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_read_message_id = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_conversation_participants_user_activity', 'user_id', 'last_activity_at', 'conversation_id'),
+    )
+    
+    @classmethod
+    def find(cls, conversation_id, user_id):
+        return db.session.get(cls, (conversation_id, user_id))
+    
+    @classmethod
+    def mark_read(cls, conversation_id, user_id):
+        """Clear the unread count up to the latest message; does not commit"""
+        db.session.execute(
+            db.update(cls)
+              .where(cls.conversation_id == conversation_id, cls.user_id == user_id)
+              .values(unread_count=0, last_read_message_id=cls.last_message_id)
+              .execution_options(synchronize_session='fetch')
+        )
+    
+    def to_dict(self):
+        return {
+            'conversation_id': self.conversation_id,
+            'last_message': {
+                'id': self.last_message_id,
+                'content': self.last_message_preview,
+                'sender_id': self.last_sender_id,
+                'created_at': self.last_message_at.isoformat() if self.last_message_at else None
+            } if self.last_message_id else None,
+            'unread_count': self.unread_count or 0,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ConversationParticipant {self.conversation_id} User {self.user_id}>'
+
+
+class Message(db.Model):
+    """A message in a conversation"""
+    __tablename__ = 'messages'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id', ondelete='CASCADE'), nullable=False)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # History pages are keyset range scans on this index
+    __table_args__ = (
+        db.Index('ix_messages_conversation_created_id', 'conversation_id', 'created_at', 'id'),
+    )
+    
+    def __init__(self, conversation_id, sender_id, content):
+        self.conversation_id = conversation_id
+        self.sender_id = sender_id
+        self.content = content
+    
+    @classmethod
+    def send(cls, conversation_id, sender_id, content):
+        """Store a message and update the participant rows.
+        
+        Concurrent sends can commit out of id order, so the last_message
+        fields only move forward (a conditional UPDATE); unread counts take
+        every message.
+        """
+        content = (content or '').strip()
+        if not content:
+            raise ValueError("Message content is required")
+        if len(content) > 5000:
+            raise ValueError("Message must be 5000 characters or less")
+        
+        try:
+            message = cls(conversation_id=conversation_id, sender_id=sender_id, content=content)
+            message.created_at = datetime.utcnow()
+            db.session.add(message)
+            db.session.flush()
+            
+            in_conversation = ConversationParticipant.conversation_id == conversation_id
+            db.session.execute(
+                db.update(ConversationParticipant)
+                  .where(in_conversation,
+                         db.or_(ConversationParticipant.last_message_id.is_(None),
+                                ConversationParticipant.last_message_id < message.id))
+                  .values(
+                      last_message_id=message.id,
+                      last_message_at=message.created_at,
+                      last_activity_at=message.created_at,
+                      last_message_preview=content[:PREVIEW_LENGTH],
+                      last_sender_id=sender_id
+                  )
+                  .execution_options(synchronize_session=False)
+            )
+            
+            is_sender = ConversationParticipant.user_id == sender_id
+            read_before = db.or_(ConversationParticipant.last_read_message_id.is_(None),
+                                 ConversationParticipant.last_read_message_id < message.id)
+            db.session.execute(
+                db.update(ConversationParticipant)
+                  .where(in_conversation)
+                  .values(
+                      unread_count=db.case((is_sender, 0),
+                                           else_=ConversationParticipant.unread_count + 1),
+                      last_read_message_id=db.case((db.and_(is_sender, read_before), message.id),
+                                                   else_=ConversationParticipant.last_read_message_id)
+                  )
+                  .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            return message
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'conversation_id': self.conversation_id,
+            'sender_id': self.sender_id,
+            'content': self.content,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Message {self.id} in Conversation {self.conversation_id}>'
@@ -1,6 +1,10 @@
 import json
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import set_committed_value
 from extensions import db
+from services.search import install_on_create
+from utils import image_variants_dict
 
 class Post(db.Model):
     """Post model for user-generated content"""
@@ -12,8 +16,14 @@ class Post(db.Model):
     content = db.Column(db.Text, nullable=False)
     media_url = db.Column(db.String(500), nullable=True)
     media_type = db.Column(db.String(20), nullable=True)  # 'image', 'video'
+    media_variants = db.Column(db.Text, nullable=True)  # JSON map of resized image variants
+    media_poster_url = db.Column(db.String(500), nullable=True)  # Poster frame of a transcoded video
+    media_duration = db.Column(db.Float, nullable=True)  # Seconds, videos only
+    media_width = db.Column(db.Integer, nullable=True)
+    media_height = db.Column(db.Integer, nullable=True)
     likes_count = db.Column(db.Integer, default=0)
     comments_count = db.Column(db.Integer, default=0)
+    views_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
@@ -28,6 +38,15 @@ class Post(db.Model):
     
     # Relationships
     user = db.relationship('User', backref=db.backref('posts', lazy='dynamic'))
+    tag_entries = db.relationship('PostTag', backref='post', cascade='all, delete-orphan')
+    
+    # Composite indexes backing keyset pagination on (sort_field, id)
+    __table_args__ = (
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+        db.Index('ix_posts_likes_count_id', 'likes_count', 'id'),
+        db.Index('ix_posts_comments_count_id', 'comments_count', 'id'),
+        db.Index('ix_posts_views_count_id', 'views_count', 'id'),
+    )
     
     def __init__(self, user_id, content, media_url=None, media_type=None, rich_content=None, tags=None, visibility='public', category='general'):
         """Initialize post with validation"""
@@ -39,16 +58,24 @@ class Post(db.Model):
         self.tags = json.dumps(tags) if tags else None
         self.visibility = visibility
         self.category = category
+        self.set_tag_index(tags)
     
-    def save(self):
-        """Save post to database"""
+    def save(self, commit=True):
+        """Save post to database; with commit=False only flush, leaving the transaction open"""
         try:
             db.session.add(self)
-            db.session.commit()
+            # Tag counters move in the same transaction as the post itself
+            TagCount.apply(getattr(self, '_tag_count_deltas', {}))
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
             return True
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Failed to save post: {str(e)}")
+        finally:
+            self._tag_count_deltas = {}
     
     def update(self, **kwargs):
         """Update post fields"""
@@ -56,14 +83,39 @@ class Post(db.Model):
             if hasattr(self, key):
                 if key == 'tags' and value is not None:
                     setattr(self, key, json.dumps(value))
+                    self.set_tag_index(value)
                 else:
                     setattr(self, key, value)
         
         self.updated_at = datetime.utcnow()
         return self.save()
     
+    def set_tag_index(self, tags):
+        """Keep the post_tags index rows in step with the given tag list"""
+        wanted = PostTag.normalize(tags)
+        existing = {entry.tag for entry in self.tag_entries}
+        self.tag_entries = [entry for entry in self.tag_entries if entry.tag in wanted]
+        for tag in wanted:
+            if tag not in existing:
+                self.tag_entries.append(PostTag(tag=tag))
+        
+        # Only active posts contribute to the popular-tags counters
+        if self.is_active is not False:
+            self._queue_tag_counts(set(wanted) - existing, 1)
+            self._queue_tag_counts(existing - set(wanted), -1)
+    
+    def _queue_tag_counts(self, tags, delta):
+        """Record tag counter changes to be written by the next save()"""
+        deltas = getattr(self, '_tag_count_deltas', None)
+        if deltas is None:
+            deltas = self._tag_count_deltas = {}
+        for tag in tags:
+            deltas[tag] = deltas.get(tag, 0) + delta
+    
     def delete(self):
         """Soft delete post"""
+        if self.is_active is not False:
+            self._queue_tag_counts([entry.tag for entry in self.tag_entries], -1)
         self.is_active = False
         return self.save()
     
@@ -80,9 +132,15 @@ class Post(db.Model):
             'content': self.content,
             'media_url': self.media_url,
             'media_type': self.media_type,
+            'media_variants': image_variants_dict(self.media_variants),
+            'media_poster_url': self.media_poster_url,
+            'media_duration': self.media_duration,
+            'media_width': self.media_width,
+            'media_height': self.media_height,
             'rich_content': self.rich_content,
             'likes_count': self.likes_count,
             'comments_count': self.comments_count,
+            'views_count': self.views_count,
             'tags': tags,
             'visibility': self.visibility,
             'category': self.category,
@@ -94,60 +152,214 @@ class Post(db.Model):
                 'username': self.user.username,
                 'first_name': self.user.first_name,
                 'last_name': self.user.last_name,
-                'profile_image_url': self.user.profile_image_url
+                'profile_image_url': self.user.profile_image_url,
+                'profile_image_variants': image_variants_dict(self.user.profile_image_variants)
             } if self.user else None
         }
     
+    @classmethod
+    def listing_query(cls):
+        """Active posts with their authors joined in, so to_dict() issues no extra queries"""
+        return cls.query.options(db.joinedload(cls.user)).filter_by(is_active=True)
+    
+    @classmethod
+    def with_all_tags(cls, tags):
+        """Filter clause matching posts carrying every given tag, via the post_tags index"""
+        wanted = PostTag.normalize(tags)
+        tagged = db.select(PostTag.post_id)\
+                   .where(PostTag.tag.in_(wanted))\
+                   .group_by(PostTag.post_id)\
+                   .having(db.func.count(PostTag.tag) == len(wanted))
+        return cls.id.in_(tagged)
+    
     @classmethod
     def find_by_id(cls, post_id):
         """Find post by ID"""
-        return cls.query.filter_by(id=post_id, is_active=True).first()
+        return cls.listing_query().filter_by(id=post_id).first()
     
     @classmethod
     def find_by_user(cls, user_id, limit=20, offset=0):
         """Find posts by user ID"""
-        return cls.query.filter_by(user_id=user_id, is_active=True)\
+        return cls.listing_query().filter_by(user_id=user_id)\
                        .order_by(cls.created_at.desc())\
                        .limit(limit)\
                        .offset(offset)\
                        .all()
     
+    @classmethod
+    def visible_to(cls, viewer_id):
+        """Filter for posts the viewer may see.
+        
+        Public posts, the viewer's own posts, and 'connections' posts whose
+        author is connected to the viewer. The connection check is a
+        semi-join on the connections primary key, so its cost does not grow
+        with the number of connections.
+        """
+        from models.connection import Connection
+        
+        if viewer_id is None:
+            return cls.visibility == 'public'
+        return db.or_(
+            cls.visibility == 'public',
+            cls.user_id == viewer_id,
+            db.and_(cls.visibility == 'connections',
+                    cls.user_id.in_(Connection.connected_ids_query(viewer_id)))
+        )
+    
+    def is_visible_to(self, viewer_id):
+        """Single-post version of visible_to"""
+        from models.connection import Connection
+        
+        if self.visibility == 'public' or (viewer_id is not None and self.user_id == viewer_id):
+            return True
+        if self.visibility == 'connections' and viewer_id is not None:
+            return Connection.are_connected(viewer_id, self.user_id)
+        return False
+    
     @classmethod
     def get_feed_posts(cls, user_id=None, limit=20, offset=0):
         """Get posts for feed (public posts or from connections)"""
-        query = cls.query.filter_by(is_active=True)
-        
-        if user_id:
-            # For now, return all public posts
-            # TODO: Implement connection-based filtering
-            query = query.filter((cls.visibility == 'public') | (cls.visibility == 'connections'))
+        query = cls.listing_query().filter(cls.visible_to(user_id))
         
         return query.order_by(cls.created_at.desc())\
                    .limit(limit)\
                    .offset(offset)\
                    .all()
     
+    COUNTER_FIELDS = ('likes_count', 'comments_count', 'views_count')
+    
+    @classmethod
+    def adjust_counter(cls, post_id, field, delta):
+        """Atomically add delta to a counter column (never below zero) and return the new value.
+        
+        Runs as a single UPDATE ... SET field = field + delta, so concurrent
+        writers cannot lose each other's increments. Does not commit.
+        """
+        if field not in cls.COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+        
+        column = getattr(cls, field)
+        new_value = db.func.coalesce(column, 0) + delta
+        statement = db.update(cls)\
+            .where(cls.id == post_id)\
+            .values({field: db.case((new_value < 0, 0), else_=new_value),
+                     # A counter change is not an edit of the post
+                     'updated_at': cls.updated_at})\
+            .execution_options(synchronize_session=False)
+        
+        if db.session.get_bind().dialect.update_returning:
+            value = db.session.execute(statement.returning(column)).scalar()
+        else:
+            db.session.execute(statement)
+            value = db.session.scalar(db.select(column).where(cls.id == post_id))
+        
+        # Keep an already loaded instance in step without marking it dirty
+        post = db.session.identity_map.get(db.inspect(cls).identity_key_from_primary_key((post_id,)))
+        if post is not None and value is not None:
+            set_committed_value(post, field, value)
+        return value
+    
+    def _adjust_and_commit(self, field, delta):
+        try:
+            self.adjust_counter(self.id, field, delta)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
     def increment_likes(self):
         """Increment likes count"""
-        self.likes_count += 1
-        db.session.commit()
+        self._adjust_and_commit('likes_count', 1)
     
     def decrement_likes(self):
         """Decrement likes count"""
-        if self.likes_count > 0:
-            self.likes_count -= 1
-            db.session.commit()
+        self._adjust_and_commit('likes_count', -1)
     
     def increment_comments(self):
         """Increment comments count"""
-        self.comments_count += 1
-        db.session.commit()
+        self._adjust_and_commit('comments_count', 1)
     
     def decrement_comments(self):
         """Decrement comments count"""
-        if self.comments_count > 0:
-            self.comments_count -= 1
-            db.session.commit()
+        self._adjust_and_commit('comments_count', -1)
+    
+    @classmethod
+    def record_view(cls, post_id):
+        """Count a view through the write-behind buffer (no write transaction here)"""
+        from extensions import counters
+        counters.add(post_id, 'views_count', 1)
     
     def __repr__(self):
         return f'<Post {self.id} by User {self.user_id}>'
+
+
+event.listen(Post.__table__, 'after_create', install_on_create)
+
+
+class PostTag(db.Model):
+    """Normalized tag index row, one per (post, tag)"""
+    __tablename__ = 'post_tags'
+    
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_post_tags_tag_post_id', 'tag', 'post_id'),
+    )
+    
+    @staticmethod
+    def normalize(tags):
+        """Lowercase, trim and de-duplicate tags while keeping their order"""
+        normalized = []
+        for tag in tags or []:
+            tag = str(tag).strip().lower()[:100]
+            if tag and tag not in normalized:
+                normalized.append(tag)
+        return normalized
+    
+    def __repr__(self):
+        return f'<PostTag {self.tag} on Post {self.post_id}>'
+
+
+class TagCount(db.Model):
+    """Number of active posts carrying each tag, maintained incrementally"""
+    __tablename__ = 'tag_counts'
+    
+    tag = db.Column(db.String(100), primary_key=True)
+    post_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    
+    @classmethod
+    def apply(cls, deltas):
+        """Atomically add per-tag deltas inside the current transaction"""
+        deltas = {tag: delta for tag, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        dialect = db.session.get_bind().dialect.name
+        for tag, delta in deltas.items():
+            if dialect in ('sqlite', 'postgresql'):
+                if dialect == 'sqlite':
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                statement = insert(cls).values(tag=tag, post_count=max(delta, 0))\
+                                       .on_conflict_do_update(index_elements=[cls.tag],
+                                                              set_={'post_count': cls.post_count + delta})
+                db.session.execute(statement)
+            else:
+                updated = db.session.execute(
+                    db.update(cls).where(cls.tag == tag).values(post_count=cls.post_count + delta)
+                ).rowcount
+                if not updated and delta > 0:
+                    db.session.add(cls(tag=tag, post_count=delta))
+    
+    @classmethod
+    def top(cls, limit=20):
+        """Most used tags, read straight off the post_count index"""
+        return cls.query.filter(cls.post_count > 0)\
+                        .order_by(cls.post_count.desc(), cls.tag)\
+                        .limit(limit)\
+                        .all()
+    
+    def __repr__(self):
+        return f'<TagCount {self.tag}={self.post_count}>'
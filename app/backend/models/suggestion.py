@@ -0,0 +1,29 @@
+from datetime import datetime
+from extensions import db
+
+class ConnectionSuggestion(db.Model):
+    """Precomputed "people you may know" entry, rebuilt by the suggestions batch job"""
+    __tablename__ = 'connection_suggestions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    suggested_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    mutual_count = db.Column(db.Integer, nullable=False, default=0)
+    # mutual_count plus a tie-break bonus below 1 (same industry, shared skills)
+    score = db.Column(db.Float, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A user's list is one range scan in score order
+    __table_args__ = (
+        db.Index('ix_connection_suggestions_user_score', 'user_id', 'score'),
+    )
+    
+    @classmethod
+    def for_user(cls, user_id, limit=20):
+        """The user's stored suggestions, best first"""
+        return cls.query.filter_by(user_id=user_id)\
+                        .order_by(cls.score.desc(), cls.suggested_id)\
+                        .limit(limit)\
+                        .all()
+    
+    def __repr__(self):
+        return f'<ConnectionSuggestion {self.user_id} -> {self.suggested_id} ({self.mutual_count})>'
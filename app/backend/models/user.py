@@ -4,6 +4,7 @@ from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.exc import IntegrityError
 from extensions import db
+from utils import image_variants_dict
 
 class User(db.Model):
     """User model with authentication and validation"""
@@ -28,11 +29,15 @@ class User(db.Model):
     website = db.Column(db.String(200), nullable=True)
     phone = db.Column(db.String(20), nullable=True)
     profile_image_url = db.Column(db.String(500), nullable=True)
+    profile_image_variants = db.Column(db.Text, nullable=True)  # JSON map of resized variants
     skills = db.Column(db.Text, nullable=True)  # JSON string
     experience_years = db.Column(db.Integer, nullable=True)
     education = db.Column(db.Text, nullable=True)  # JSON string
     social_links = db.Column(db.Text, nullable=True)  # JSON string
     
+    # Denormalized follower count, maintained atomically by Follow
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     def __init__(self, username, email, password):
         """Initialize user with validation"""
         self.username = username
@@ -91,6 +96,19 @@ class User(db.Model):
             db.session.rollback()
             raise ValueError("Username or email already exists")
     
+    def to_summary_dict(self):
+        """Minimal public fields, for lists of other users"""
+        return {
+            'id': self.id,
+            'username': self.username,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'job_title': self.job_title,
+            'company': self.company,
+            'profile_image_url': self.profile_image_url,
+            'profile_image_variants': image_variants_dict(self.profile_image_variants)
+        }
+    
     def to_dict(self):
         """Convert user to dictionary (excluding sensitive data)"""
         try:
@@ -121,15 +139,29 @@ class User(db.Model):
             'website': self.website,
             'phone': self.phone,
             'profile_image_url': self.profile_image_url,
+            'profile_image_variants': image_variants_dict(self.profile_image_variants),
             'skills': skills,
             'experience_years': self.experience_years,
             'education': education,
             'social_links': social_links,
+            'followers_count': self.followers_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active
         }
     
+    @classmethod
+    def adjust_followers(cls, user_id, delta):
+        """Atomically move followers_count by delta (never below zero); does not commit"""
+        new_value = db.func.coalesce(cls.followers_count, 0) + delta
+        db.session.execute(
+            db.update(cls)
+              .where(cls.id == user_id)
+              .values(followers_count=db.case((new_value < 0, 0), else_=new_value),
+                      updated_at=cls.updated_at)
+              .execution_options(synchronize_session=False)
+        )
+    
     @classmethod
     def find_by_username(cls, username):
         """Find user by username"""
@@ -23,5 +23,6 @@ exec gunicorn app:app \
     --timeout 120 \
     --log-level info \
     --access-logfile - \
+    --access-logformat '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(a)s"' \
     --error-logfile - \
     --preload 
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Content-addressed media storage with reference counts (models.media.MediaBlob).
+
+A file's bytes decide where it lives: UPLOAD_FOLDER/media/<first two hex
+digits>/<sha256>.<ext>. Uploads are hashed with SHA-256 chunk by chunk while
+they are copied to a temporary file, so bytes that are already stored cost
+one reference count increment and no new file. Uploads are never held in
+memory whole: stream_to_temp enforces the size limit while reading.
+
+Every row that points at a blob holds one reference: posts.media_url, the
+paths in users.profile_image_variants, and a source blob for the variants
+rendered from it (MediaBlob.variants). A row acquires a path when it starts
+using it and releases it when it stops. When the last reference goes, the
+MediaBlob row is deleted in the same transaction, together with its derived
+variants. The file is removed only after that transaction commits.
+
+Files are written under UPLOAD_FOLDER first, then published to the
+configured storage backend (services/storage.py), which may be an object
+store shared by every instance. Publishing happens before the transaction
+that references the file commits, so a rollback deletes the files it had
+newly published. local_source gives media workers a local
+copy of a stored file to read.
+"""
+
+import hashlib
+import os
+import tempfile
+import uuid
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from extensions import db, storage
+from models.media import MediaBlob
+from utils import delete_file, get_file_path
+
+CONTENT_FOLDER = 'media'
+CHUNK_SIZE = 64 * 1024
+
+# Session.info key for files to remove once the releasing transaction commits
+ORPHANED_KEY = 'orphaned_media_paths'
+# Session.info key for files published by a transaction that has not committed yet
+CREATED_KEY = 'created_media_paths'
+
+
+def content_path(digest, extension):
+    """Storage path, relative to UPLOAD_FOLDER, of the file whose sha256 is digest"""
+    return f"{CONTENT_FOLDER}/{digest[:2]}/{digest}.{extension}"
+
+
+def is_content_addressed(path):
+    return path.startswith(CONTENT_FOLDER + '/')
+
+
+def digest_of(path):
+    """The sha256 a content-addressed path was named after"""
+    return os.path.basename(path).split('.', 1)[0]
+
+
+def store_content(upload_folder, data, extension):
+    """Write data under its content hash unless already stored; returns the relative path.
+    
+    Safe to call from worker processes: it touches files only. The caller's
+    app side acquires the path afterwards.
+    """
+    path = content_path(hashlib.sha256(data).hexdigest(), extension)
+    full_path = os.path.join(upload_folder, path)
+    if not os.path.exists(full_path):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        partial_path = f"{full_path}.{os.getpid()}.part"
+        with open(partial_path, 'wb') as output:
+            output.write(data)
+        os.replace(partial_path, full_path)
+    return path
+
+
+def file_digest(source_path):
+    """sha256 of a file on disk, read in chunks"""
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_file(upload_folder, source_path, extension):
+    """Move a finished file into content-addressed storage, hashing it in chunks; returns the relative path.
+
+    Worker-safe like store_content, for outputs too large to hold in memory.
+    """
+    path = content_path(file_digest(source_path), extension)
+    full_path = os.path.join(upload_folder, path)
+    if os.path.exists(full_path):
+        os.remove(source_path)
+    else:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(source_path, full_path)
+    return path
+
+
+class UploadTooLarge(ValueError):
+    """An upload went over its size limit while it was being read"""
+
+
+def stream_to_temp(file, max_size=None):
+    """Copy an upload to a temporary file chunk by chunk, hashing as it goes.
+    
+    Only one chunk is held in memory at a time. Reading stops with
+    UploadTooLarge as soon as more than max_size bytes arrive, so the size is
+    never measured by seeking to the end. Returns (temp_path, sha256, size);
+    the caller renames or removes temp_path. file is an uploaded FileStorage
+    or a raw request stream.
+    """
+    temp_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], CONTENT_FOLDER, 'tmp')
+    os.makedirs(temp_folder, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    size = 0
+    if file.seekable():
+        file.seek(0)
+    with tempfile.NamedTemporaryFile(dir=temp_folder, suffix='.part', delete=False) as output:
+        temp_path = output.name
+        try:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge(f"File size exceeds maximum limit of {max_size // (1024*1024)}MB")
+                digest.update(chunk)
+                output.write(chunk)
+        except Exception:
+            output.close()
+            os.remove(temp_path)
+            raise
+    return temp_path, digest.hexdigest(), size
+
+
+def store_upload(file, extension, max_size=None):
+    """Stream an upload into blob storage; returns (path, created) and holds one reference; does not commit"""
+    temp_path, digest, size = stream_to_temp(file, max_size)
+    return _store_temp(temp_path, digest, size, extension)
+
+
+def store_local(temp_path, extension):
+    """Move a local file into blob storage, like store_upload for bytes already on disk"""
+    return _store_temp(temp_path, file_digest(temp_path), os.path.getsize(temp_path), extension)
+
+
+def store_copy(source, digest, size, extension):
+    """Store a file that is already in the storage backend under its content address, by a
+    copy inside the backend; digest must come from the backend (e.g. a checksum it verified)"""
+    path = content_path(digest, extension)
+    created = MediaBlob.acquire(path, digest, size)
+    if created:
+        db.session.info.setdefault(CREATED_KEY, []).append(path)
+        storage.copy(source, path)
+    return path, created
+
+
+def _store_temp(temp_path, digest, size, extension):
+    path = content_path(digest, extension)
+    full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], path)
+    if os.path.exists(full_path):
+        # Seen before: keep the stored copy
+        os.remove(temp_path)
+    else:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(temp_path, full_path)
+    
+    created = MediaBlob.acquire(path, digest, size)
+    _publish(path, created)
+    return path, created
+
+
+def acquire_paths(paths):
+    """Reference files already written by store_content, publishing new ones; does not commit"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for path in paths:
+        full_path = os.path.join(upload_folder, path)
+        size = os.path.getsize(full_path) if os.path.exists(full_path) else None
+        _publish(path, MediaBlob.acquire(path, digest_of(path), size))
+
+
+def _publish(path, created):
+    """Publish a stored file; a new one is deleted again if the transaction rolls back"""
+    if created:
+        db.session.info.setdefault(CREATED_KEY, []).append(path)
+    storage.publish(path, new=created)
+
+
+def local_source(path):
+    """A local file a media worker can read for a stored path: (absolute path, staging path or None).
+    
+    The staging copy, when the backend is remote, is the caller's to delete
+    (MediaJob.source_path does that).
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    if storage.is_local:
+        return os.path.join(upload_folder, path), None
+    staging_path = f"{CONTENT_FOLDER}/tmp/{uuid.uuid4().hex}{os.path.splitext(path)[1]}"
+    full_path = os.path.join(upload_folder, staging_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    storage.fetch(path, full_path)
+    return full_path, staging_path
+
+
+def release_paths(paths):
+    """Drop one reference from each path; files whose last reference went are removed after commit"""
+    orphaned = MediaBlob.release(paths)
+    if orphaned:
+        db.session.info.setdefault(ORPHANED_KEY, []).extend(orphaned)
+    return orphaned
+
+
+def release_file_url(file_url):
+    """Release the blob behind an uploaded file URL; files stored before blobs existed are left alone"""
+    if file_url:
+        return release_paths([get_file_path(file_url)])
+    return []
+
+
+def discard_unreferenced(paths):
+    """Remove rendered files that no row took a reference to"""
+    paths = set(paths)
+    if not paths:
+        return
+    referenced = set(db.session.scalars(select(MediaBlob.path).where(MediaBlob.path.in_(paths))))
+    for path in paths - referenced:
+        delete_file(path)
+    if not storage.is_local:
+        # Stored already; what is left under UPLOAD_FOLDER is the worker's copy
+        for path in referenced:
+            delete_file(path)
+
+
+def _is_stored(path):
+    """Whether a committed blob row uses path; asked right before its file is deleted"""
+    with db.engine.connect() as connection:
+        return connection.scalar(select(MediaBlob.id).where(MediaBlob.path == path)) is not None
+
+
+@event.listens_for(Session, 'after_commit')
+def _remove_orphaned_files(session):
+    session.info.pop(CREATED_KEY, None)
+    paths = session.info.pop(ORPHANED_KEY, None)
+    if not paths:
+        return
+    # The same bytes can be stored again before the (possibly queued) delete runs; keep the file then
+    storage.delete(set(paths), keep=_is_stored)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_orphaned_files(session, previous_transaction):
+    if previous_transaction.parent is not None:
+        # A savepoint; the outer transaction can still commit
+        return
+    session.info.pop(ORPHANED_KEY, None)
+    # Published before the commit that would have referenced them; a concurrent upload may have taken them since
+    paths = session.info.pop(CREATED_KEY, None)
+    if paths:
+        storage.delete(set(paths), keep=_is_stored)
@@ -0,0 +1,385 @@
+"""
+Pluggable key/value cache with per-key TTLs, versioned invalidation and
+hit/miss metrics.
+
+Backends:
+- 'memory': in-process LRU, private to each worker
+- 'sqlite': a SQLite file shared by every worker on the host, so one
+  worker's invalidation is seen by all the others without an outside service
+
+Entries are grouped into namespaces. Invalidating a namespace bumps its
+version number in the backend, which orphans every key written under the
+old version; orphaned entries age out through TTL/LRU eviction.
+
+get_or_set() coalesces concurrent misses so only one computation runs per
+key (a per-key lock inside the process, plus a lease row in the shared
+backend across workers). With stale_ttl it serves the previous value,
+including the one from before the last invalidation, while a single
+background refresh computes the new one.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+_MISSING = object()
+
+
+class MemoryLRUBackend:
+    """Thread-safe in-process LRU store with per-entry expiry"""
+    name = 'memory'
+    
+    def __init__(self, max_entries=1024, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        # Namespace versions live outside the LRU so they can never be evicted
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl=None):
+        expires_at = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def get_version(self, namespace):
+        return self._versions.get(namespace, 0)
+    
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+    
+    def acquire_lease(self, key, ttl):
+        # The in-process key lock already serialises a single worker
+        return True
+    
+    def release_lease(self, key):
+        pass
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Cache table in a local SQLite file, shared by all processes that open it"""
+    name = 'sqlite'
+    
+    # Expired rows are purged once every this many writes
+    PURGE_EVERY = 200
+    
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_versions ("
+            " namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_leases ("
+            " key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        value, expires_at = row
+        if expires_at is not None and expires_at <= self.clock():
+            return _MISSING
+        return json.loads(value)
+    
+    def set(self, key, value, ttl=None):
+        expires_at = self.clock() + ttl if ttl else None
+        connection = self._connection()
+        connection.execute(
+            "INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), expires_at)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (self.clock(),)
+            )
+    
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+    
+    def get_version(self, namespace):
+        row = self._connection().execute(
+            "SELECT version FROM cache_versions WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def bump_version(self, namespace):
+        connection = self._connection()
+        connection.execute(
+            "INSERT INTO cache_versions (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+            (namespace,)
+        )
+        return self.get_version(namespace)
+    
+    def acquire_lease(self, key, ttl):
+        """Take the cross-worker computation lease for key, or take over an expired one"""
+        now = self.clock()
+        connection = self._connection()
+        inserted = connection.execute(
+            "INSERT OR IGNORE INTO cache_leases (key, expires_at) VALUES (?, ?)", (key, now + ttl)
+        ).rowcount
+        if inserted:
+            return True
+        return connection.execute(
+            "UPDATE cache_leases SET expires_at = ? WHERE key = ? AND expires_at <= ?",
+            (now + ttl, key, now)
+        ).rowcount == 1
+    
+    def release_lease(self, key):
+        self._connection().execute("DELETE FROM cache_leases WHERE key = ?", (key,))
+    
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries")
+
+
+class Cache:
+    """Namespaced cache front-end, initialised like the other Flask extensions"""
+    
+    # Number of striped per-key locks used for in-process single-flight
+    LOCK_STRIPES = 64
+    
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = 300
+        self.lease_ttl = 30
+        self.wait_timeout = 10
+        self.poll_interval = 0.05
+        self._stats_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._refreshing = set()
+        self._refresh_threads = []
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Build the backend selected by CACHE_BACKEND"""
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        if backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['CACHE_SQLITE_PATH'])
+        elif backend == 'memory':
+            self.backend = MemoryLRUBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        self.lease_ttl = app.config.get('CACHE_LEASE_TTL', 30)
+        self.wait_timeout = app.config.get('CACHE_WAIT_TIMEOUT', 10)
+        self.reset_stats()
+        app.extensions['cache'] = self
+    
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+    
+    def _key(self, namespace, key, version=None):
+        if version is None:
+            version = self.backend.get_version(namespace)
+        return f'{namespace}:v{version}:{key}'
+    
+    def _read(self, full_key):
+        """Return (value, is_fresh), or None when nothing usable is stored"""
+        entry = self.backend.get(full_key)
+        if entry is _MISSING:
+            return None
+        return entry['value'], entry['fresh_until'] > self.backend.clock()
+    
+    def _write(self, full_key, value, ttl, stale_ttl=0):
+        ttl = ttl or self.default_ttl
+        entry = {'value': value, 'fresh_until': self.backend.clock() + ttl}
+        self.backend.set(full_key, entry, ttl + (stale_ttl or 0))
+        self._count('sets')
+    
+    def get(self, key, namespace='default', default=None):
+        """Return the cached value, or default when it is missing or stale"""
+        entry = self._read(self._key(namespace, key))
+        if entry is None or not entry[1]:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return entry[0]
+    
+    def set(self, key, value, ttl=None, namespace='default'):
+        """Store a JSON-serialisable value with its own TTL in seconds"""
+        self._write(self._key(namespace, key), value, ttl)
+    
+    def delete(self, key, namespace='default'):
+        """Drop a single entry"""
+        self.backend.delete(self._key(namespace, key))
+    
+    def get_or_set(self, key, compute, ttl=None, namespace='default', stale_ttl=0):
+        """Return the cached value, computing it at most once per key on a miss.
+        
+        With stale_ttl, an expired value (or the value from before the last
+        invalidation) is served for up to stale_ttl seconds while one
+        background refresh recomputes it.
+        """
+        version = self.backend.get_version(namespace)
+        full_key = self._key(namespace, key, version)
+        entry = self._read(full_key)
+        if entry is not None and entry[1]:
+            self._count('hits')
+            return entry[0]
+        
+        if stale_ttl:
+            if entry is None and version > 0:
+                entry = self._read(self._key(namespace, key, version - 1))
+            if entry is not None:
+                self._count('stale_hits')
+                self._refresh_in_background(full_key, compute, ttl, stale_ttl)
+                return entry[0]
+        
+        self._count('misses')
+        return self._compute_once(full_key, compute, ttl, stale_ttl)
+    
+    def _compute_once(self, full_key, compute, ttl, stale_ttl):
+        """Single-flight computation: other callers wait for the first one's result"""
+        with self._key_locks[hash(full_key) % self.LOCK_STRIPES]:
+            entry = self._read(full_key)
+            if entry is not None and entry[1]:
+                self._count('coalesced')
+                return entry[0]
+            
+            if not self.backend.acquire_lease(full_key, self.lease_ttl):
+                # Another worker is computing; wait for it to publish the value
+                deadline = time.monotonic() + self.wait_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(self.poll_interval)
+                    entry = self._read(full_key)
+                    if entry is not None and entry[1]:
+                        self._count('coalesced')
+                        return entry[0]
+                    if self.backend.acquire_lease(full_key, self.lease_ttl):
+                        break
+                else:
+                    # Give up waiting rather than fail the request
+                    self._count('lease_timeouts')
+                    value = compute()
+                    self._write(full_key, value, ttl, stale_ttl)
+                    return value
+            
+            try:
+                value = compute()
+                self._write(full_key, value, ttl, stale_ttl)
+                self._count('computes')
+                return value
+            finally:
+                self.backend.release_lease(full_key)
+    
+    def _refresh_in_background(self, full_key, compute, ttl, stale_ttl):
+        """Start at most one refresh per key across all workers"""
+        with self._stats_lock:
+            if full_key in self._refreshing:
+                return
+            self._refreshing.add(full_key)
+        
+        if not self.backend.acquire_lease(full_key, self.lease_ttl):
+            with self._stats_lock:
+                self._refreshing.discard(full_key)
+            return
+        
+        app = current_app._get_current_object() if has_app_context() else None
+        
+        def refresh():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        value = compute()
+                else:
+                    value = compute()
+                self._write(full_key, value, ttl, stale_ttl)
+                self._count('refreshes')
+            except Exception as e:
+                self._count('refresh_errors')
+                if app is not None:
+                    app.logger.error(f"Background cache refresh failed for {full_key}: {e}")
+            finally:
+                self.backend.release_lease(full_key)
+                with self._stats_lock:
+                    self._refreshing.discard(full_key)
+        
+        thread = threading.Thread(target=refresh, name=f'cache-refresh:{full_key}', daemon=True)
+        self._refresh_threads = [t for t in self._refresh_threads if t.is_alive()] + [thread]
+        thread.start()
+    
+    def join_refreshes(self, timeout=None):
+        """Wait for background refreshes started by this process"""
+        for thread in list(self._refresh_threads):
+            thread.join(timeout)
+    
+    def invalidate(self, namespace):
+        """Invalidate every key in a namespace, for all workers sharing the backend"""
+        self.backend.bump_version(namespace)
+        self._count('invalidations')
+    
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'hits': 0, 'misses': 0, 'stale_hits': 0, 'coalesced': 0, 'computes': 0,
+                'refreshes': 0, 'refresh_errors': 0, 'lease_timeouts': 0,
+                'sets': 0, 'invalidations': 0
+            }
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else None
+        stats['backend'] = self.backend.name if self.backend else None
+        return stats
@@ -0,0 +1,187 @@
+"""
+Write-behind aggregation for high-frequency post counters.
+
+Increments are summed in memory per (post_id, field) and written in bulk:
+one executemany UPDATE per counter column, either every
+COUNTER_FLUSH_INTERVAL seconds from a background thread, once
+COUNTER_FLUSH_THRESHOLD distinct rows are pending, or at process exit.
+Request handlers therefore never open a write transaction just to count.
+
+Counts buffered in a worker that is killed before flushing are lost, which
+is acceptable for view counts; likes stay transactional (see Like.toggle).
+"""
+
+import atexit
+import threading
+import time
+from sqlalchemy import bindparam, case, func
+
+
+class CounterBuffer:
+    """In-process buffer of counter deltas with periodic bulk flushes"""
+    
+    FIELDS = ('views_count', 'likes_count', 'comments_count')
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 5
+        self.flush_threshold = 1000
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._oldest_pending_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Bind the buffer to an app; the flusher thread starts on first use"""
+        self.stop()
+        self.app = app
+        self.flush_interval = app.config.get('COUNTER_FLUSH_INTERVAL', 5)
+        self.flush_threshold = app.config.get('COUNTER_FLUSH_THRESHOLD', 1000)
+        with self._lock:
+            self._pending = {}
+            self._oldest_pending_at = None
+        self.reset_stats()
+        app.extensions['counters'] = self
+    
+    def add(self, post_id, field, delta=1):
+        """Queue a counter change; it reaches the database on the next flush"""
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+        
+        with self._lock:
+            key = (post_id, field)
+            self._pending[key] = self._pending.get(key, 0) + delta
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.time()
+            self._stats['buffered_increments'] += 1
+            pending_rows = len(self._pending)
+        
+        self._ensure_flusher()
+        if pending_rows >= self.flush_threshold:
+            self.flush()
+    
+    def pending(self, post_id, field):
+        """Delta buffered for a post that has not been flushed yet"""
+        with self._lock:
+            return self._pending.get((post_id, field), 0)
+    
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            oldest, self._oldest_pending_at = self._oldest_pending_at, None
+        return pending, oldest
+    
+    def _restore_pending(self, pending, oldest):
+        """Put deltas back after a failed flush, merged with anything newer"""
+        with self._lock:
+            for key, delta in pending.items():
+                self._pending[key] = self._pending.get(key, 0) + delta
+            if oldest is not None and (self._oldest_pending_at is None or oldest < self._oldest_pending_at):
+                self._oldest_pending_at = oldest
+    
+    def flush(self):
+        """Write every buffered delta with one bulk UPDATE per counter column"""
+        with self._flush_lock:
+            pending, oldest = self._take_pending()
+            if not pending:
+                return 0
+            
+            by_field = {}
+            for (post_id, field), delta in pending.items():
+                if delta:
+                    by_field.setdefault(field, []).append({'b_post_id': post_id, 'b_delta': delta})
+            
+            started = time.time()
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self._write(by_field)
+                else:
+                    self._write(by_field)
+            except Exception as e:
+                self._restore_pending(pending, oldest)
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                if self.app is not None:
+                    self.app.logger.error(f"Counter flush failed, will retry: {e}")
+                return 0
+            
+            finished = time.time()
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['flushed_rows'] += len(pending)
+                self._stats['last_flush_at'] = finished
+                self._stats['last_flush_ms'] = round((finished - started) * 1000, 2)
+                self._stats['last_flush_lag_seconds'] = round(finished - oldest, 3) if oldest else 0
+            return len(pending)
+    
+    def _write(self, by_field):
+        from extensions import db
+        from models.post import Post
+        
+        table = Post.__table__
+        with db.engine.begin() as connection:
+            for field, params in by_field.items():
+                column = table.c[field]
+                new_value = func.coalesce(column, 0) + bindparam('b_delta')
+                statement = table.update()\
+                    .where(table.c.id == bindparam('b_post_id'))\
+                    .values({field: case((new_value < 0, 0), else_=new_value),
+                             # Counter changes are not edits of the post
+                             'updated_at': table.c.updated_at})
+                connection.execute(statement, params)
+    
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._flush_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+    
+    def stop(self, flush=True):
+        """Stop the flusher thread, writing out what is still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        if flush and self.app is not None:
+            self.flush()
+    
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'buffered_increments': 0, 'flushes': 0, 'flushed_rows': 0, 'flush_errors': 0,
+                'last_flush_at': None, 'last_flush_ms': None, 'last_flush_lag_seconds': None
+            }
+    
+    def stats(self):
+        """Flush and lag metrics for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending_rows'] = len(self._pending)
+            stats['lag_seconds'] = round(time.time() - self._oldest_pending_at, 3) \
+                if self._oldest_pending_at else 0
+        return stats
+
+
+def _flush_at_exit():
+    from extensions import counters
+    try:
+        counters.stop()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
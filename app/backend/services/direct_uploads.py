@@ -0,0 +1,224 @@
+"""
+Two-phase post media uploads: the bytes go to storage, not through the API.
+
+1. POST /api/posts/media-uploads with {filename, content_type, size,
+   sha256} checks the type and size and returns a ticket: a signed token
+   plus the URL and headers to PUT the bytes with. With a remote
+   STORAGE_BACKEND that URL is presigned for the store over the staging
+   path, Content-Type, Content-Length and x-amz-checksum-sha256, so the store
+   itself refuses any other path, type, size or content. The filesystem
+   backend has no such store, so its URL points back at the app
+   (PUT /api/posts/media-uploads/<token>), which streams the raw body to disk
+   without multipart parsing and checks the SHA-256 itself.
+2. POST /api/posts (or PUT /api/posts/<id>) with {"media_upload": <token>}
+   attaches the upload. The staged file is checked against the ticket (size,
+   image header) and stored by its content hash like any other upload
+   (services/blobs.py), and the staged copy is dropped. On an object store
+   the hash is the checksum the store verified, and the file is moved with a
+   server-side copy: the app reads only an image's header, never the whole
+   upload.
+
+Tickets are stateless: itsdangerous tokens signed with SECRET_KEY that
+expire after MEDIA_UPLOAD_TICKET_EXPIRES. A staged file is consumed by the
+first post it is attached to; the media_upload_claims row (unique on the
+staging path) decides which one that is, on any storage backend. Uploads
+that are never attached stay under STAGING_FOLDER; on S3, expire that
+prefix with a bucket lifecycle rule.
+"""
+
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app, url_for
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.utils import secure_filename
+from extensions import storage
+from models.media import MediaUploadClaim
+from services.blobs import CONTENT_FOLDER, UploadTooLarge, stream_to_temp, store_copy, store_local
+from services.storage import StorageError, sha256_checksum
+from utils import get_file_url, probe_image
+
+STAGING_FOLDER = 'incoming/uploads'
+
+# Enough of an image file for probe_image to read its format and dimensions
+HEADER_BYTES = 256 * 1024
+
+SHA256_PATTERN = re.compile(r'[0-9a-fA-F]{64}')
+
+POST_MEDIA_TYPES = {
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image',
+    'mp4': 'video', 'avi': 'video', 'mov': 'video', 'wmv': 'video'
+}
+
+
+class TicketError(ValueError):
+    """An upload ticket is invalid, expired, not the caller's or already used"""
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='post-media-upload')
+
+
+def issue_ticket(user_id, filename, content_type, size, sha256):
+    """Phase one: validate what the client is about to upload and say where to send it"""
+    allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+    filename = secure_filename(filename or '')
+    extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    media_type = POST_MEDIA_TYPES.get(extension) if extension in allowed_extensions else None
+    if media_type is None:
+        raise ValueError('Invalid file type. Allowed: ' + ', '.join(allowed_extensions))
+    if not content_type or content_type.split('/', 1)[0] != media_type:
+        raise ValueError(f"Content type must be {media_type}/*")
+    
+    max_size = current_app.config['MAX_CONTENT_LENGTH']
+    if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+        raise ValueError('File size must be a positive number of bytes')
+    if size > max_size:
+        raise UploadTooLarge(f"File size exceeds maximum limit of {max_size // (1024*1024)}MB")
+    if not isinstance(sha256, str) or not SHA256_PATTERN.fullmatch(sha256):
+        raise ValueError('sha256 must be the hex SHA-256 digest of the file')
+    sha256 = sha256.lower()
+    
+    expires = current_app.config.get('MEDIA_UPLOAD_TICKET_EXPIRES', 3600)
+    path = f"{STAGING_FOLDER}/{uuid.uuid4().hex}.{extension}"
+    token = _serializer().dumps({'u': user_id, 'p': path, 'c': content_type, 's': size, 'h': sha256})
+    url = storage.upload_url(path, content_type, size=size, expires=expires, sha256=sha256)
+    headers = {'Content-Type': content_type}
+    if url:
+        headers['x-amz-checksum-sha256'] = sha256_checksum(sha256)
+    return {
+        'token': token,
+        'url': url or url_for('posts.receive_media_upload', token=token),
+        'method': 'PUT',
+        'headers': headers,
+        'size': size,
+        'media_type': media_type,
+        'expires_in': expires
+    }
+
+
+def load_ticket(token, user_id=None):
+    """The ticket's fields; raises TicketError"""
+    try:
+        ticket = _serializer().loads(token, max_age=current_app.config.get('MEDIA_UPLOAD_TICKET_EXPIRES', 3600))
+    except SignatureExpired:
+        raise TicketError('Upload ticket has expired')
+    except BadSignature:
+        raise TicketError('Invalid upload ticket')
+    if user_id is not None and ticket['u'] != user_id:
+        raise TicketError('Invalid upload ticket')
+    return ticket
+
+
+def receive_upload(ticket, stream, content_type, content_length):
+    """Filesystem backend stand-in for the presigned PUT: stage the raw request body"""
+    if content_type != ticket['c'] or content_length != ticket['s']:
+        raise ValueError('Content-Type and Content-Length must match the upload ticket')
+    temp_path, digest, size = stream_to_temp(stream, ticket['s'])
+    if size != ticket['s']:
+        os.remove(temp_path)
+        raise ValueError('Upload is shorter than its Content-Length')
+    if digest != ticket['h']:
+        os.remove(temp_path)
+        raise ValueError('Upload does not match its SHA-256 checksum')
+    
+    staged_path = storage.local_path(ticket['p'])
+    os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+    os.replace(temp_path, staged_path)
+
+
+def _claim(path):
+    """Record that the staged file is being attached; raises TicketError when it already was.
+    
+    Fetching, copying and deleting a staged object on a remote store are
+    separate requests, so the claim row is written first: of two concurrent
+    attaches of one ticket, only the one whose insert wins touches the file.
+    The row is part of the caller's transaction and goes away if it rolls back.
+    """
+    expires = current_app.config.get('MEDIA_UPLOAD_TICKET_EXPIRES', 3600)
+    MediaUploadClaim.purge_before(datetime.utcnow() - timedelta(seconds=expires))
+    if not MediaUploadClaim.claim(path):
+        raise TicketError('Upload has already been attached')
+
+
+def _temp_path(extension='part'):
+    temp_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], CONTENT_FOLDER, 'tmp')
+    os.makedirs(temp_folder, exist_ok=True)
+    return os.path.join(temp_folder, f"{uuid.uuid4().hex}.{extension}")
+
+
+def _validate_image(path):
+    """Check a staged image from its first HEADER_BYTES only"""
+    temp_path = _temp_path()
+    try:
+        storage.fetch_head(path, temp_path, HEADER_BYTES)
+        is_valid, message = probe_image(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if not is_valid:
+        raise ValueError(message)
+
+
+def _attach_local(ticket, media_type, extension):
+    """Filesystem backend: move the staged file into blob storage"""
+    temp_path = _temp_path()
+    try:
+        os.replace(storage.local_path(ticket['p']), temp_path)
+    except OSError:
+        raise TicketError('Upload not found; PUT the file to the ticket URL first')
+    try:
+        if os.path.getsize(temp_path) != ticket['s']:
+            raise ValueError('Uploaded file does not match the declared size')
+        if media_type == 'image':
+            is_valid, message = probe_image(temp_path)
+            if not is_valid:
+                raise ValueError(message)
+        stored_path, _ = store_local(temp_path, extension)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return stored_path
+
+
+def _attach_remote(ticket, media_type, extension):
+    """Object store: copy the staged object to its content address without reading it"""
+    path = ticket['p']
+    size = storage.size(path)
+    if size is None:
+        raise TicketError('Upload not found; PUT the file to the ticket URL first')
+    if size != ticket['s']:
+        raise ValueError('Uploaded file does not match the declared size')
+    if media_type == 'image':
+        _validate_image(path)
+    # The presigned PUT carried the ticket's checksum, so the store has verified the digest
+    stored_path, _ = store_copy(path, ticket['h'], size, extension)
+    return stored_path
+
+
+def attach_upload(ticket):
+    """Phase two: validate the staged upload and store it by content hash.
+    
+    Returns (media_url, media_type) holding one reference, like
+    save_media_file; does not commit.
+    """
+    path = ticket['p']
+    extension = path.rsplit('.', 1)[1]
+    media_type = POST_MEDIA_TYPES[extension]
+    _claim(path)
+    try:
+        if storage.is_local:
+            stored_path = _attach_local(ticket, media_type, extension)
+        else:
+            stored_path = _attach_remote(ticket, media_type, extension)
+    except (TicketError, StorageError):
+        # Nothing to attach yet, or the store is unreachable: keep what was uploaded
+        raise
+    except Exception:
+        storage.delete([path])
+        raise
+    
+    storage.delete([path])
+    return get_file_url(stored_path), media_type
@@ -0,0 +1,378 @@
+"""
+Publish/subscribe bus for pushing events to connected clients over SSE.
+
+Backends:
+- 'memory': delivers only to streams held by this process
+- 'socket': every worker that holds streams binds a Unix datagram socket in
+  EVENTS_SOCKET_DIR; publishing sends one datagram to each socket there, so
+  events reach streams in any gunicorn worker on the host without an
+  outside broker. Sockets left behind by dead workers are removed on the
+  first failed send.
+
+Each stream owns a bounded queue (EVENTS_QUEUE_SIZE); when a slow client
+falls behind, the oldest events are dropped rather than buffered without
+limit. A user holds at most EVENTS_MAX_STREAMS_PER_USER streams (the oldest
+is closed first), and a worker holds at most EVENTS_MAX_STREAMS in total:
+each open stream ties up one gunicorn thread, so the cap sits below
+--threads to leave threads for ordinary API requests. Past it, subscribe
+raises StreamLimitReached (503 with Retry-After). Streams end after
+EVENTS_STREAM_MAX_SECONDS so the client reconnects, and a sweeper thread
+closes streams whose consumer has not polled for EVENTS_IDLE_TIMEOUT seconds.
+
+EventSource cannot send an Authorization header, so a stream is opened with
+a stream token in the query string instead of the access token: it only
+opens streams and expires after EVENTS_STREAM_TOKEN_EXPIRES seconds, so the
+copies that end up in access logs are worthless.
+"""
+
+import atexit
+import glob
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+# Largest datagram accepted from a peer worker
+MAX_DATAGRAM = 256 * 1024
+
+
+class StreamLimitReached(RuntimeError):
+    """This worker already holds EVENTS_MAX_STREAMS streams"""
+
+
+def _stream_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='message-stream')
+
+
+def issue_stream_token(user_id):
+    """A short-lived token that lets user_id open streams"""
+    return _stream_serializer().dumps({'u': user_id})
+
+
+def load_stream_token(token):
+    """The user id a stream token was issued to; raises ValueError when it is invalid or expired"""
+    try:
+        return _stream_serializer().loads(
+            token or '', max_age=current_app.config.get('EVENTS_STREAM_TOKEN_EXPIRES', 60)
+        )['u']
+    except BadData:
+        raise ValueError('Invalid or expired stream token')
+
+
+class Subscription:
+    """One open stream: a bounded queue of events for a single user"""
+    
+    def __init__(self, user_id, max_queue):
+        self.user_id = user_id
+        self.opened_at = time.monotonic()
+        self.last_seen = self.opened_at
+        self.dropped = 0
+        self.closed = False
+        self._queue = deque(maxlen=max_queue)
+        self._condition = threading.Condition()
+    
+    def push(self, event):
+        with self._condition:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(event)
+            self._condition.notify()
+    
+    def get(self, timeout):
+        """Next event, or None after timeout or once closed"""
+        with self._condition:
+            self.last_seen = time.monotonic()
+            self._condition.wait_for(lambda: self._queue or self.closed, timeout)
+            self.last_seen = time.monotonic()
+            return self._queue.popleft() if self._queue else None
+    
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class MemoryBackend:
+    """Single-process delivery; publish goes straight to local streams"""
+    
+    name = 'memory'
+    
+    def __init__(self, deliver):
+        self.deliver = deliver
+    
+    def start(self):
+        pass
+    
+    def publish(self, payload):
+        self.deliver(payload)
+    
+    def peers(self):
+        return 0
+    
+    def close(self):
+        pass
+
+
+class SocketBackend:
+    """Cross-worker delivery over Unix datagram sockets in a shared directory"""
+    
+    name = 'socket'
+    
+    def __init__(self, deliver, directory):
+        self.deliver = deliver
+        self.directory = directory
+        self.path = None
+        self._receiver = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self.send_errors = 0
+    
+    def start(self):
+        """Bind this worker's socket; only workers holding streams need one"""
+        with self._lock:
+            if self._receiver is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.bind(self.path)
+            os.chmod(self.path, 0o600)
+            self._receiver = receiver
+            self._thread = threading.Thread(target=self._run, name='event-receiver', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        receiver = self._receiver
+        while True:
+            try:
+                data = receiver.recv(MAX_DATAGRAM)
+            except OSError:
+                return  # Socket closed
+            try:
+                self.deliver(json.loads(data))
+            except (ValueError, TypeError):
+                continue
+    
+    def publish(self, payload):
+        """Deliver locally and send one datagram to every other worker's socket"""
+        self.deliver(payload)
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        for path in glob.glob(os.path.join(self.directory, '*.sock')):
+            if path == self.path:
+                continue
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listens there any more: the worker is gone
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                # Peer buffer full or event too large; the event is lost for that worker
+                self.send_errors += 1
+    
+    def peers(self):
+        return len([path for path in glob.glob(os.path.join(self.directory, '*.sock')) if path != self.path])
+    
+    def close(self):
+        with self._lock:
+            if self._receiver is not None:
+                try:
+                    self._receiver.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._receiver.close()
+                self._receiver = None
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+        self._sender.close()
+
+
+class EventBus:
+    """Flask extension routing published events to subscribed streams"""
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._stop = threading.Event()
+        self._sweeper = None
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.close()
+        self.app = app
+        config = app.config
+        self.queue_size = config.get('EVENTS_QUEUE_SIZE', 100)
+        self.max_streams_per_user = config.get('EVENTS_MAX_STREAMS_PER_USER', 5)
+        self.max_streams = config.get('EVENTS_MAX_STREAMS', 4)
+        self.heartbeat_interval = config.get('EVENTS_HEARTBEAT_INTERVAL', 15)
+        self.idle_timeout = config.get('EVENTS_IDLE_TIMEOUT', 60)
+        self.stream_max_seconds = config.get('EVENTS_STREAM_MAX_SECONDS', 300)
+        
+        backend = config.get('EVENTS_BACKEND', 'memory')
+        if backend == 'socket':
+            self.backend = SocketBackend(self._deliver, config['EVENTS_SOCKET_DIR'])
+        elif backend == 'memory':
+            self.backend = MemoryBackend(self._deliver)
+        else:
+            raise ValueError(f"Unknown events backend: {backend}")
+        
+        self._stop.clear()
+        self.reset_stats()
+        app.extensions['events'] = self
+    
+    def subscribe(self, user_id):
+        """Open a stream for the user, closing their oldest one if they hold too many.
+        
+        Raises StreamLimitReached when the worker is at EVENTS_MAX_STREAMS and
+        the user has no stream of their own to give up.
+        """
+        self.backend.start()
+        self._ensure_sweeper()
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            held = len(self._subscriptions.get(user_id, ()))
+            total = sum(len(streams) for streams in self._subscriptions.values())
+            if total >= self.max_streams and held < self.max_streams_per_user:
+                self._stats['rejected'] += 1
+                raise StreamLimitReached(f"{total} streams open")
+            streams = self._subscriptions.setdefault(user_id, [])
+            while len(streams) >= self.max_streams_per_user:
+                streams.pop(0).close()
+                self._stats['evicted'] += 1
+            streams.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            streams = self._subscriptions.get(subscription.user_id, [])
+            if subscription in streams:
+                streams.remove(subscription)
+            if not streams:
+                self._subscriptions.pop(subscription.user_id, None)
+    
+    def publish(self, user_ids, event_type, data, event_id=None):
+        """Send an event to every stream of the given users, in any worker"""
+        payload = {
+            'users': [int(user_id) for user_id in user_ids],
+            'event': {'type': event_type, 'id': event_id, 'data': data}
+        }
+        with self._lock:
+            self._stats['published'] += 1
+        self.backend.publish(payload)
+    
+    def _deliver(self, payload):
+        event = payload['event']
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in payload['users']
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+            self._stats['delivered'] += len(targets)
+        for subscription in targets:
+            subscription.push(event)
+    
+    def stream(self, subscription):
+        """Generator of SSE frames for a subscription; unsubscribes when it ends"""
+        deadline = time.monotonic() + self.stream_max_seconds
+        try:
+            # Ask the browser to reconnect quickly once the stream ends
+            yield 'retry: 3000\n\n'
+            while not subscription.closed and time.monotonic() < deadline:
+                event = subscription.get(timeout=self.heartbeat_interval)
+                if event is None:
+                    if not subscription.closed:
+                        yield ': keepalive\n\n'
+                    continue
+                frame = f"event: {event['type']}\n"
+                if event.get('id') is not None:
+                    frame += f"id: {event['id']}\n"
+                yield frame + f"data: {json.dumps(event['data'], separators=(',', ':'))}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+    
+    def sweep(self):
+        """Close streams whose consumer stopped polling; returns how many"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                subscription
+                for streams in self._subscriptions.values()
+                for subscription in streams
+                if now - subscription.last_seen > self.idle_timeout
+            ]
+        for subscription in idle:
+            self.unsubscribe(subscription)
+        with self._lock:
+            self._stats['swept'] += len(idle)
+        return len(idle)
+    
+    def _ensure_sweeper(self):
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._run_sweeper, name='event-sweeper', daemon=True)
+            self._sweeper.start()
+    
+    def _run_sweeper(self):
+        while not self._stop.wait(max(1, self.idle_timeout / 2)):
+            self.sweep()
+    
+    def close(self):
+        """Close every stream and release the backend"""
+        self._stop.set()
+        with self._lock:
+            streams = [subscription for streams in self._subscriptions.values() for subscription in streams]
+            self._subscriptions = {}
+        for subscription in streams:
+            subscription.close()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+        if self.backend is not None:
+            self.backend.close()
+    
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'published': 0, 'delivered': 0, 'evicted': 0, 'swept': 0, 'rejected': 0}
+    
+    def stats(self):
+        """Stream and delivery metrics for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            subscriptions = [subscription for streams in self._subscriptions.values() for subscription in streams]
+        stats['backend'] = self.backend.name if self.backend else None
+        stats['streams'] = len(subscriptions)
+        stats['users'] = len({subscription.user_id for subscription in subscriptions})
+        stats['dropped'] = sum(subscription.dropped for subscription in subscriptions)
+        stats['peers'] = self.backend.peers() if self.backend else 0
+        return stats
+
+
+def _close_at_exit():
+    from extensions import events
+    try:
+        events.close()
+    except Exception:
+        pass
+
+
+atexit.register(_close_at_exit)
@@ -0,0 +1,160 @@
+"""
+Home feed built from precomputed per-user timelines.
+
+Fan-out on write: when a post is created, one INSERT ... SELECT copies it
+into the timeline of the author and of every follower, so reading a feed
+page is a single range scan on (user_id, created_at, post_id).
+
+Hybrid fan-out on read: authors with more than FEED_FANOUT_MAX_FOLLOWERS
+followers are not fanned out (one post would mean millions of rows).
+Their recent posts are fetched at read time and merged into the page.
+"""
+
+from datetime import datetime
+from flask import current_app
+from extensions import db
+from models.feed import TimelineEntry
+from models.follow import Follow
+from models.connection import Connection
+from models.post import Post
+from models.user import User
+from utils import encode_cursor
+
+# Posts copied into a timeline when the user starts following someone
+FOLLOW_BACKFILL_POSTS = 50
+
+
+def fanout_limit():
+    return current_app.config.get('FEED_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def is_fanout_author(author_id):
+    """Whether the author's posts are pushed to followers at write time"""
+    followers = db.session.scalar(db.select(User.followers_count).where(User.id == author_id)) or 0
+    return followers <= fanout_limit()
+
+
+def fan_out_post(post):
+    """Push a new post into the timelines of its author and followers; does not commit"""
+    entries = TimelineEntry.__table__
+    
+    # The author always sees their own post
+    db.session.execute(entries.insert().values(
+        user_id=post.user_id, post_id=post.id, author_id=post.user_id, created_at=post.created_at
+    ))
+    
+    if post.visibility == 'private' or not is_fanout_author(post.user_id):
+        return
+    
+    followers = db.select(
+        Follow.follower_id,
+        db.literal(post.id),
+        db.literal(post.user_id),
+        db.literal(post.created_at, type_=db.DateTime)
+    ).where(Follow.followed_id == post.user_id)
+    if post.visibility == 'connections':
+        # Only followers who are also connections may see it
+        followers = followers.where(Follow.follower_id.in_(Connection.connected_ids_query(post.user_id)))
+    db.session.execute(
+        entries.insert().from_select(['user_id', 'post_id', 'author_id', 'created_at'], followers)
+    )
+
+
+def backfill_follow(follower_id, followed_id, limit=FOLLOW_BACKFILL_POSTS):
+    """Copy the followed author's recent posts into the follower's timeline; does not commit"""
+    if not is_fanout_author(followed_id):
+        return
+    
+    already = db.select(TimelineEntry.post_id).where(
+        TimelineEntry.user_id == follower_id, TimelineEntry.author_id == followed_id
+    )
+    recent = db.select(
+        db.literal(follower_id), Post.id, Post.user_id, Post.created_at
+    ).where(
+        Post.user_id == followed_id,
+        Post.is_active == True,
+        Post.visible_to(follower_id),
+        Post.id.not_in(already)
+    ).order_by(Post.created_at.desc()).limit(limit)
+    db.session.execute(
+        TimelineEntry.__table__.insert().from_select(['user_id', 'post_id', 'author_id', 'created_at'], recent)
+    )
+
+
+def remove_follow(follower_id, followed_id):
+    """Drop the unfollowed author's posts from the follower's timeline; does not commit"""
+    db.session.execute(
+        db.delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id, TimelineEntry.author_id == followed_id
+        )
+    )
+
+
+def _keyset(created_at_column, id_column, cursor):
+    """Filter for rows strictly after the cursor in (created_at desc, id desc) order"""
+    created_at = datetime.fromisoformat(cursor['t'])
+    return db.or_(
+        created_at_column < created_at,
+        db.and_(created_at_column == created_at, id_column < cursor['id'])
+    )
+
+
+def read_home_feed(user_id, per_page=20, cursor=None):
+    """One page of the user's home feed: (posts, next_cursor)"""
+    # Fan-out-on-write part: a range scan of the precomputed timeline
+    timeline = db.select(TimelineEntry.post_id, TimelineEntry.created_at)\
+        .where(TimelineEntry.user_id == user_id)
+    if cursor:
+        timeline = timeline.where(_keyset(TimelineEntry.created_at, TimelineEntry.post_id, cursor))
+    timeline = timeline.order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())\
+        .limit(per_page + 1)
+    candidates = [(row.created_at, row.post_id) for row in db.session.execute(timeline)]
+    
+    # Fan-out-on-read part: recent posts of followed high-follower authors
+    heavy_authors = db.select(Follow.followed_id)\
+        .join(User, User.id == Follow.followed_id)\
+        .where(Follow.follower_id == user_id, User.followers_count > fanout_limit())
+    pulled = db.select(Post.id, Post.created_at).where(
+        Post.user_id.in_(heavy_authors),
+        Post.is_active == True,
+        Post.visible_to(user_id)
+    )
+    if cursor:
+        pulled = pulled.where(_keyset(Post.created_at, Post.id, cursor))
+    pulled = pulled.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1)
+    candidates.extend((row.created_at, row.id) for row in db.session.execute(pulled))
+    
+    # Merge both sources in (created_at, id) order. Rows pushed before a
+    # post was deleted or a connection was removed are dropped at load time,
+    # so such a page may come back a little short.
+    candidates = sorted(set(candidates), reverse=True)[:per_page + 1]
+    has_more = len(candidates) > per_page
+    candidates = candidates[:per_page]
+    
+    posts_by_id = {
+        post.id: post for post in
+        Post.listing_query().filter(
+            Post.id.in_([post_id for _, post_id in candidates]), Post.visible_to(user_id)
+        ).all()
+    } if candidates else {}
+    posts = [posts_by_id[post_id] for _, post_id in candidates if post_id in posts_by_id]
+    
+    next_cursor = None
+    if has_more:
+        created_at, post_id = candidates[-1]
+        next_cursor = encode_cursor({'t': created_at.isoformat(), 'id': post_id})
+    return posts, next_cursor
+
+
+def read_user_feed(author_id, viewer_id, per_page=20, cursor=None):
+    """One page of a single author's posts as seen by the viewer: (posts, next_cursor)"""
+    query = Post.listing_query().filter(Post.user_id == author_id, Post.visible_to(viewer_id))
+    if cursor:
+        query = query.filter(_keyset(Post.created_at, Post.id, cursor))
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1).all()
+    
+    next_cursor = None
+    if len(posts) > per_page:
+        posts = posts[:per_page]
+        next_cursor = encode_cursor({'t': posts[-1].created_at.isoformat(), 'id': posts[-1].id})
+    return posts, next_cursor
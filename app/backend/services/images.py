@@ -0,0 +1,201 @@
+"""
+Responsive image variants, rendered through the media pipeline (services/media.py).
+
+Each image upload is decoded once and resized, largest first, into the
+named variants of its kind (thumb, card, full). Every variant is encoded
+as JPEG and WebP and stored content-addressed (services/blobs.py):
+identical bytes land on the same path and are written once, and a URL
+never changes content, so it can be cached forever.
+
+The variants map is kept as JSON on the row it belongs to
+(users.profile_image_variants, posts.media_variants) and returned by
+to_dict() together with srcset strings (utils.image_variants_dict).
+A user holds a reference to each of its variant files. Post variants are
+cached on the blob of the original image, which holds their references:
+posting the same bytes again reuses them without rendering anything.
+"""
+
+import io
+import json
+import os
+from functools import partial
+from flask import current_app
+from PIL import Image, ImageOps
+from extensions import db, media
+from models.media import MediaBlob, MediaJob
+from models.post import Post
+from models.user import User
+from services.blobs import (
+    store_content, is_content_addressed, acquire_paths, release_paths, discard_unreferenced, local_source
+)
+from utils import flatten_image, generate_unique_filename, get_file_url, get_file_path, delete_file
+
+# Variant name -> longest edge in pixels; originals are never upscaled
+PROFILE_IMAGE_VARIANTS = (('thumb', 96), ('card', 320), ('full', 800))
+POST_IMAGE_VARIANTS = (('thumb', 160), ('card', 640), ('full', 1600))
+
+# Map key, Pillow format, file extension
+VARIANT_FORMATS = (('jpeg', 'JPEG', 'jpg'), ('webp', 'WEBP', 'webp'))
+VARIANT_QUALITY = 82
+
+PROFILE_IMAGE_KIND = 'profile_image'
+POST_IMAGE_KIND = 'post_image'
+
+
+def render_variants(source_path, upload_folder, variants, quality=VARIANT_QUALITY):
+    """Worker side: decode once, store every variant in every format; returns the map with storage paths"""
+    largest = max(edge for _, edge in variants)
+    with Image.open(source_path) as original:
+        # JPEGs can be decoded straight at a reduced scale
+        original.draft('RGB', (largest, largest))
+        image = flatten_image(ImageOps.exif_transpose(original))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.load()
+    
+    rendered = {}
+    # Largest first, so each resize starts from the previous, smaller image
+    for name, edge in sorted(variants, key=lambda variant: -variant[1]):
+        if max(image.size) > edge:
+            image = image.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for key, image_format, extension in VARIANT_FORMATS:
+            output = io.BytesIO()
+            if image_format == 'JPEG':
+                image.save(output, format=image_format, quality=quality, optimize=True, progressive=True)
+            else:
+                image.save(output, format=image_format, quality=quality, method=4)
+            entry[key] = store_content(upload_folder, output.getvalue(), extension)
+        rendered[name] = entry
+    return rendered
+
+
+def rendered_paths(kind, rendered):
+    return MediaBlob.variant_paths({kind: rendered})
+
+
+def stored_variant_paths(raw_variants):
+    """File paths behind a stored variants column (URLs, see variants_json)"""
+    try:
+        sizes = json.loads(raw_variants) if raw_variants else {}
+    except (json.JSONDecodeError, TypeError):
+        sizes = {}
+    return {get_file_path(url) for url in MediaBlob.variant_paths({'stored': sizes})}
+
+
+def variants_json(rendered):
+    """The rendered map with storage paths turned into URLs, serialized for a variants column"""
+    formats = {key for key, _, _ in VARIANT_FORMATS}
+    return json.dumps({
+        name: {key: get_file_url(value) if key in formats else value for key, value in entry.items()}
+        for name, entry in rendered.items()
+    })
+
+
+def finish_profile_image(job, rendered):
+    """App side: point the user at the new variants once the worker is done; does not commit"""
+    delete_file(job.source_path)
+    paths = rendered_paths(PROFILE_IMAGE_KIND, rendered)
+    
+    if job.status == MediaJob.CANCELLED:
+        # A newer upload or a delete superseded this one while it was processing
+        discard_unreferenced(paths)
+        return
+    
+    user = db.session.get(User, job.user_id)
+    if user is None:
+        job.finish(MediaJob.FAILED, error='User not found')
+        discard_unreferenced(paths)
+        return
+    
+    # Files from before content-addressed storage belong to this user alone
+    old_path = get_file_path(user.profile_image_url or '')
+    if old_path and not is_content_addressed(old_path):
+        delete_file(old_path)
+    
+    # Acquire first, so files shared by the old and new set keep their references
+    acquire_paths(paths)
+    release_paths(stored_variant_paths(user.profile_image_variants))
+    user.profile_image_variants = variants_json(rendered)
+    user.profile_image_url = get_file_url(rendered['full']['jpeg'])
+    job.finish(MediaJob.DONE, result_url=user.profile_image_url)
+
+
+def queue_profile_image(user_id, temp_path, filename):
+    """Move a streamed upload (services.blobs.stream_to_temp) into place and queue its variants;
+    returns the committed MediaJob"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    source_path = os.path.join('incoming', generate_unique_filename(filename))
+    os.makedirs(os.path.join(upload_folder, 'incoming'), exist_ok=True)
+    os.replace(temp_path, os.path.join(upload_folder, source_path))
+    
+    MediaJob.cancel_pending(user_id, PROFILE_IMAGE_KIND)
+    job = MediaJob(user_id=user_id, kind=PROFILE_IMAGE_KIND, source_path=source_path)
+    db.session.add(job)
+    db.session.commit()
+    
+    media.submit(
+        job.id,
+        render_variants,
+        (os.path.join(upload_folder, source_path), upload_folder, PROFILE_IMAGE_VARIANTS),
+        finish_profile_image
+    )
+    return job
+
+
+def finish_post_image(post_id, media_url, job, rendered):
+    """App side: cache variants on the original's blob and attach them to the post; does not commit"""
+    if job.source_path:
+        delete_file(job.source_path)
+    paths = rendered_paths(POST_IMAGE_KIND, rendered)
+    source = MediaBlob.find_by_path(get_file_path(media_url))
+    if source is None:
+        # The original was released while this job ran
+        discard_unreferenced(paths)
+        job.finish(MediaJob.CANCELLED)
+        return
+    
+    cached = source.cached_variants(POST_IMAGE_KIND)
+    if cached is None:
+        acquire_paths(paths - {source.path})
+        source.cache_variants(POST_IMAGE_KIND, rendered)
+    else:
+        # Rendered twice concurrently; keep the set that was cached first
+        discard_unreferenced(paths)
+        rendered = cached
+    
+    post = db.session.get(Post, post_id)
+    if post is None or post.media_url != media_url:
+        job.finish(MediaJob.CANCELLED)
+        return
+    post.media_variants = variants_json(rendered)
+    job.finish(MediaJob.DONE, result_url=get_file_url(rendered['full']['jpeg']))
+
+
+def queue_post_image(post):
+    """Attach variants of the post's original image, rendering them in the background
+    unless the same bytes were rendered before; returns the MediaJob or None"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    original = get_file_path(post.media_url)
+    
+    source = MediaBlob.find_by_path(original)
+    cached = source.cached_variants(POST_IMAGE_KIND) if source else None
+    if cached:
+        post.media_variants = variants_json(cached)
+        db.session.commit()
+        return None
+    
+    # The original is kept; only a copy fetched from remote storage needs cleaning up
+    source_path, staging_path = local_source(original)
+    job = MediaJob(user_id=post.user_id, kind=POST_IMAGE_KIND, source_path=staging_path)
+    db.session.add(job)
+    db.session.commit()
+    
+    media.submit(
+        job.id,
+        render_variants,
+        (source_path, upload_folder, POST_IMAGE_VARIANTS),
+        partial(finish_post_image, post.id, post.media_url)
+    )
+    return job
@@ -0,0 +1,129 @@
+"""
+Jobs board search with facet counts.
+
+Filters are OR within a facet and AND across facets, except skills, where
+a job must require every selected skill (matched through the job_skills
+inverted index). Facet counts follow the usual drill-down rule: each
+facet's counts apply every filter except its own, so selecting a location
+still shows how many jobs the other locations have. Skills are the
+exception here too: they refine rather than widen, so their counts apply
+the skills already selected and say how many results adding each skill
+would leave.
+
+All facet counts and the total come back from one UNION ALL of grouped
+queries, i.e. one database round trip however many facets there are.
+"""
+
+from extensions import db
+from models.job import Job, JobSkill, EXPERIENCE_BUCKETS
+
+# Skill values returned in the skills facet
+SKILL_FACET_LIMIT = 30
+
+FACETS = ('location', 'company_size', 'experience', 'skills')
+
+
+def parse_filters(args):
+    """Build a filters dict from request query args"""
+    def values(name):
+        return [value.strip() for value in args.get(name, '').split(',') if value.strip()]
+    
+    buckets = {name for name, _, _ in EXPERIENCE_BUCKETS}
+    experience = values('experience')
+    if any(bucket not in buckets for bucket in experience):
+        raise ValueError("Invalid experience bucket")
+    
+    return {
+        'q': args.get('q', '').strip(),
+        'location': values('location'),
+        'company_size': values('company_size'),
+        'experience': experience,
+        'skills': JobSkill.normalize(values('skills')),
+        'employment_type': values('employment_type'),
+    }
+
+
+def _with_all_skills(skills):
+    """Jobs carrying every skill: one grouped semi-join on the inverted index"""
+    return Job.id.in_(
+        db.select(JobSkill.job_id)
+          .where(JobSkill.skill.in_(skills))
+          .group_by(JobSkill.job_id)
+          .having(db.func.count() == len(skills))
+    )
+
+
+def _conditions(filters, exclude=None):
+    """WHERE clauses for the filters, leaving out the facet named by exclude"""
+    conditions = [Job.is_active == True]
+    if filters.get('q'):
+        pattern = f"%{filters['q']}%"
+        conditions.append(db.or_(Job.title.ilike(pattern), Job.company.ilike(pattern)))
+    if filters.get('employment_type'):
+        conditions.append(Job.employment_type.in_(filters['employment_type']))
+    if filters.get('location') and exclude != 'location':
+        conditions.append(Job.location.in_(filters['location']))
+    if filters.get('company_size') and exclude != 'company_size':
+        conditions.append(Job.company_size.in_(filters['company_size']))
+    if filters.get('experience') and exclude != 'experience':
+        conditions.append(Job.experience_bucket().in_(filters['experience']))
+    if filters.get('skills') and exclude != 'skills':
+        conditions.append(_with_all_skills(filters['skills']))
+    return conditions
+
+
+def search_jobs(filters, page=1, per_page=20):
+    """One page of matching jobs, newest first"""
+    return Job.query.filter(*_conditions(filters))\
+                    .order_by(Job.created_at.desc(), Job.id.desc())\
+                    .limit(per_page)\
+                    .offset((page - 1) * per_page)\
+                    .all()
+
+
+def facet_counts(filters):
+    """(total, {facet: [{'value', 'count'}, ...]}) in a single query"""
+    count = db.func.count().label('count')
+    
+    def grouped(facet, column, exclude):
+        return db.select(db.literal(facet).label('facet'), column.label('value'), count)\
+            .where(*_conditions(filters, exclude=exclude), column.isnot(None))\
+            .group_by(column)
+    
+    bucket = Job.experience_bucket()
+    # Skills are AND-ed, so their counts keep the skills selection (see the module docstring)
+    top_skills = db.select(db.literal('skills').label('facet'), JobSkill.skill.label('value'), count)\
+        .join(Job, Job.id == JobSkill.job_id)\
+        .where(*_conditions(filters))\
+        .group_by(JobSkill.skill)\
+        .order_by(db.desc('count'), JobSkill.skill)\
+        .limit(SKILL_FACET_LIMIT)\
+        .subquery()
+    
+    union = db.union_all(
+        db.select(db.literal('total').label('facet'), db.null().label('value'), count)
+          .where(*_conditions(filters)),
+        grouped('location', Job.location, 'location'),
+        grouped('company_size', Job.company_size, 'company_size'),
+        db.select(db.literal('experience').label('facet'), bucket.label('value'), count)
+          .where(*_conditions(filters, exclude='experience'))
+          .group_by(bucket),
+        # LIMIT inside a UNION member must sit in a subquery on SQLite
+        db.select(top_skills.c.facet, top_skills.c.value, top_skills.c.count),
+    )
+    
+    total = 0
+    facets = {facet: [] for facet in FACETS}
+    for facet, value, number in db.session.execute(union):
+        if facet == 'total':
+            total = number
+        else:
+            facets[facet].append({'value': value, 'count': number})
+    
+    bucket_order = [name for name, _, _ in EXPERIENCE_BUCKETS]
+    for facet, entries in facets.items():
+        if facet == 'experience':
+            entries.sort(key=lambda entry: bucket_order.index(entry['value']))
+        else:
+            entries.sort(key=lambda entry: (-entry['count'], entry['value']))
+    return total, facets
@@ -0,0 +1,243 @@
+"""
+Job/candidate matching on skill bitsets.
+
+Skills are normalized (JobSkill.normalize) and indexed in job_skills and
+user_skills. To score one side against many, skills are mapped to columns
+of a shared vocabulary and packed into uint64 bitsets, so the number of
+shared skills for every (job, user) pair is a bitwise AND plus a popcount
+over a few words, computed for whole batches with NumPy.
+
+    score = coverage * experience_fit
+    coverage = shared skills / skills the job asks for
+    experience_fit = 1 - JOB_MATCH_EXPERIENCE_PENALTY per year short (floor 0)
+
+Matches are stored in job_matches and kept current incrementally:
+saving a job rescores only that job against the users who share one of
+its skills (found through the user_skills index), and a profile edit
+rescores only that user against the jobs sharing one of theirs. The
+read endpoints are index range scans; build_job_matches.py rebuilds the
+whole table in vectorized batches.
+"""
+
+import time
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from extensions import db
+from models.job import Job, JobSkill
+from models.match import JobMatch, UserSkill
+from models.user import User
+
+
+def min_score():
+    return current_app.config.get('JOB_MATCH_MIN_SCORE', 0.2)
+
+
+def experience_penalty():
+    return current_app.config.get('JOB_MATCH_EXPERIENCE_PENALTY', 0.15)
+
+
+def bitsets(skill_sets, vocabulary):
+    """(rows, words) uint64 matrix with bit vocabulary[skill] set for each row's skills"""
+    matrix = np.zeros((len(skill_sets), max(len(vocabulary), 1)), dtype=bool)
+    for row, skills in enumerate(skill_sets):
+        matrix[row, [vocabulary[skill] for skill in skills if skill in vocabulary]] = True
+    packed = np.packbits(matrix, axis=1)
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def shared_counts(job_bits, user_bits):
+    """(jobs, users) matrix of shared skill counts: popcount(job & user), word by word"""
+    counts = np.zeros((job_bits.shape[0], user_bits.shape[0]), dtype=np.uint16)
+    for word in range(job_bits.shape[1]):
+        counts += np.bitwise_count(job_bits[:, word, None] & user_bits[None, :, word])
+    return counts
+
+
+def match_scores(shared, job_sizes, required_years, user_years):
+    """(jobs, users) scores from shared counts, job skill counts and experience"""
+    coverage = shared / np.maximum(job_sizes, 1)[:, None]
+    shortfall = np.maximum(required_years[:, None] - user_years[None, :], 0)
+    return coverage * np.clip(1.0 - experience_penalty() * shortfall, 0.0, 1.0)
+
+
+def _vocabulary(skills):
+    return {skill: column for column, skill in enumerate(sorted(skills))}
+
+
+def _insert_matches(rows):
+    if rows:
+        db.session.execute(JobMatch.__table__.insert(), rows)
+
+
+def index_user_skills(user_id, skills):
+    """Replace the user's user_skills rows; does not commit"""
+    db.session.execute(db.delete(UserSkill).where(UserSkill.user_id == user_id))
+    normalized = JobSkill.normalize(skills)
+    if normalized:
+        db.session.execute(UserSkill.__table__.insert(),
+                           [{'user_id': user_id, 'skill': skill} for skill in normalized])
+
+
+def refresh_job_matches(job_id):
+    """Rescore one job against the users sharing any of its skills; does not commit"""
+    db.session.execute(db.delete(JobMatch).where(JobMatch.job_id == job_id))
+    
+    job = db.session.execute(
+        db.select(Job.poster_id, Job.experience_years).where(Job.id == job_id, Job.is_active == True)
+    ).first()
+    skills = db.session.scalars(db.select(JobSkill.skill).where(JobSkill.job_id == job_id)).all()
+    if job is None or not skills:
+        return 0
+    
+    # Only the job's own skills can be shared, so they are the whole vocabulary
+    users = {}
+    for user_id, years, skill in db.session.execute(
+        db.select(UserSkill.user_id, User.experience_years, UserSkill.skill)
+          .join(User, User.id == UserSkill.user_id)
+          .where(UserSkill.skill.in_(skills), User.is_active == True, User.id != job.poster_id)
+    ):
+        users.setdefault(user_id, (years or 0, set()))[1].add(skill)
+    if not users:
+        return 0
+    
+    user_ids = list(users)
+    vocabulary = _vocabulary(skills)
+    shared = shared_counts(bitsets([skills], vocabulary), bitsets([users[u][1] for u in user_ids], vocabulary))
+    scores = match_scores(shared, np.array([len(skills)]), np.array([job.experience_years or 0]),
+                          np.array([users[u][0] for u in user_ids]))[0]
+    
+    now = datetime.utcnow()
+    rows = [
+        {'job_id': job_id, 'user_id': user_ids[i], 'score': float(scores[i]),
+         'matched_skills': int(shared[0, i]), 'computed_at': now}
+        for i in np.flatnonzero(scores >= min_score())
+    ]
+    _insert_matches(rows)
+    return len(rows)
+
+
+def refresh_user_matches(user_id):
+    """Rescore one user against the active jobs sharing any of their skills; does not commit"""
+    db.session.execute(db.delete(JobMatch).where(JobMatch.user_id == user_id))
+    
+    skills = db.session.scalars(db.select(UserSkill.skill).where(UserSkill.user_id == user_id)).all()
+    if not skills:
+        return 0
+    years = db.session.scalar(db.select(User.experience_years).where(User.id == user_id)) or 0
+    
+    jobs = {}
+    for job_id, required, skill in db.session.execute(
+        db.select(JobSkill.job_id, Job.experience_years, JobSkill.skill)
+          .join(Job, Job.id == JobSkill.job_id)
+          .where(JobSkill.skill.in_(skills), Job.is_active == True, Job.poster_id != user_id)
+    ):
+        jobs.setdefault(job_id, (required or 0, set()))[1].add(skill)
+    if not jobs:
+        return 0
+    
+    # Coverage needs every candidate job's full skill count, not just the shared ones
+    job_ids = list(jobs)
+    sizes = dict(db.session.execute(
+        db.select(JobSkill.job_id, db.func.count()).where(JobSkill.job_id.in_(job_ids)).group_by(JobSkill.job_id)
+    ).all())
+    
+    vocabulary = _vocabulary(skills)
+    shared = shared_counts(bitsets([jobs[j][1] for j in job_ids], vocabulary), bitsets([skills], vocabulary))
+    scores = match_scores(shared, np.array([sizes[j] for j in job_ids]),
+                          np.array([jobs[j][0] for j in job_ids]), np.array([years]))[:, 0]
+    
+    now = datetime.utcnow()
+    rows = [
+        {'job_id': job_ids[i], 'user_id': user_id, 'score': float(scores[i]),
+         'matched_skills': int(shared[i, 0]), 'computed_at': now}
+        for i in np.flatnonzero(scores >= min_score())
+    ]
+    _insert_matches(rows)
+    return len(rows)
+
+
+def rebuild_job_matches(batch_size=128):
+    """Recompute job_matches for every active job, committing one batch of jobs at a time"""
+    started = time.monotonic()
+    
+    jobs = {}
+    for job_id, poster_id, required, skill in db.session.execute(
+        db.select(Job.id, Job.poster_id, Job.experience_years, JobSkill.skill)
+          .join(JobSkill, JobSkill.job_id == Job.id)
+          .where(Job.is_active == True)
+    ):
+        jobs.setdefault(job_id, (poster_id, required or 0, set()))[2].add(skill)
+    
+    users = {}
+    for user_id, years, skill in db.session.execute(
+        db.select(UserSkill.user_id, User.experience_years, UserSkill.skill)
+          .join(User, User.id == UserSkill.user_id)
+          .where(User.is_active == True)
+    ):
+        users.setdefault(user_id, (years or 0, set()))[1].add(skill)
+    
+    job_ids = sorted(jobs)
+    user_ids = np.array(sorted(users), dtype=np.int64)
+    vocabulary = _vocabulary(set().union(*(entry[2] for entry in jobs.values())) &
+                             set().union(*(entry[1] for entry in users.values())))
+    user_bits = bitsets([users[u][1] for u in user_ids.tolist()], vocabulary)
+    user_years = np.array([users[u][0] for u in user_ids.tolist()])
+    
+    matches = 0
+    for start in range(0, len(job_ids), batch_size):
+        batch = job_ids[start:start + batch_size]
+        shared = shared_counts(bitsets([jobs[j][2] for j in batch], vocabulary), user_bits)
+        scores = match_scores(shared, np.array([len(jobs[j][2]) for j in batch]),
+                              np.array([jobs[j][1] for j in batch]), user_years)
+        # Posters are never candidates for their own jobs
+        scores[user_ids[None, :] == np.array([jobs[j][0] for j in batch])[:, None]] = 0
+        
+        now = datetime.utcnow()
+        job_rows, user_cols = np.nonzero(scores >= min_score())
+        rows = [
+            {'job_id': batch[r], 'user_id': int(user_ids[c]), 'score': float(scores[r, c]),
+             'matched_skills': int(shared[r, c]), 'computed_at': now}
+            for r, c in zip(job_rows.tolist(), user_cols.tolist())
+        ]
+        db.session.execute(db.delete(JobMatch).where(JobMatch.job_id.in_(batch)))
+        _insert_matches(rows)
+        db.session.commit()
+        matches += len(rows)
+    
+    # Jobs closed or stripped of skills since the last build
+    db.session.execute(db.delete(JobMatch).where(JobMatch.job_id.not_in(job_ids)))
+    db.session.commit()
+    
+    return {
+        'jobs': len(job_ids),
+        'users': len(user_ids),
+        'skills': len(vocabulary),
+        'matches': matches,
+        'seconds': round(time.monotonic() - started, 2)
+    }
+
+
+def recommended_jobs(user_id, limit=20):
+    """[(job, match)] best first for the user"""
+    return db.session.execute(
+        db.select(Job, JobMatch)
+          .join(JobMatch, JobMatch.job_id == Job.id)
+          .where(JobMatch.user_id == user_id, Job.is_active == True)
+          .order_by(JobMatch.score.desc(), JobMatch.job_id.desc())
+          .limit(limit)
+    ).all()
+
+
+def top_candidates(job_id, limit=20):
+    """[(user, match)] best first for the job"""
+    return db.session.execute(
+        db.select(User, JobMatch)
+          .join(JobMatch, JobMatch.user_id == User.id)
+          .where(JobMatch.job_id == job_id, User.is_active == True)
+          .order_by(JobMatch.score.desc(), JobMatch.user_id)
+          .limit(limit)
+    ).all()
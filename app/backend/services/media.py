@@ -0,0 +1,140 @@
+"""
+Background execution of CPU-heavy media work (image decode/resize etc.).
+
+Request handlers store the raw upload, create a MediaJob row and call
+`media.submit(...)`, then answer 202 straight away. The work function runs
+in a pool selected by MEDIA_EXECUTOR:
+
+- 'process': a ProcessPoolExecutor of MEDIA_WORKERS spawned processes, so
+  Pillow work never holds the web worker's GIL
+- 'thread': a thread pool in the web worker
+- 'sync': inline, for tests and one-off scripts
+
+Work functions run without an app or database; they take file paths and
+return a picklable result. When one finishes, its `on_done(job, result)`
+callback runs in this process inside an app context and records the
+outcome on the MediaJob row, which clients poll; if the work raised, the
+job is failed and its raw upload removed instead. A job whose worker dies
+before reporting back is failed on the next poll after MEDIA_JOB_TIMEOUT.
+
+Each pipeline reads its settings under a config prefix, so slow work can get
+a pool of its own: `media` uses MEDIA_*, `videos` (transcoding) VIDEO_*.
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class MediaPipeline:
+    """Flask extension running media jobs off the request thread"""
+    
+    def __init__(self, app=None, config_prefix='MEDIA'):
+        self.app = None
+        self.config_prefix = config_prefix
+        self.mode = 'sync'
+        self.workers = 2
+        self._executor = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Bind to an app; the pool starts on the first submit, after any fork"""
+        self.shutdown()
+        self.app = app
+        prefix = self.config_prefix
+        self.mode = app.config.get(f'{prefix}_EXECUTOR', 'process')
+        if self.mode not in ('process', 'thread', 'sync'):
+            raise ValueError(f"Unknown {prefix.lower()} executor: {self.mode}")
+        self.workers = app.config.get(f'{prefix}_WORKERS', 2)
+        self.reset_stats()
+        app.extensions[prefix.lower()] = self
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.mode == 'process':
+                    # Spawned, not forked: the web worker may already be running threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.config_prefix.lower())
+            return self._executor
+    
+    def submit(self, job_id, work, args, on_done):
+        """Run work(*args) in the background, then on_done(job, result) in an app context"""
+        with self._lock:
+            self._stats['submitted'] += 1
+        if self.mode == 'sync':
+            future = Future()
+            try:
+                future.set_result(work(*args))
+            except Exception as e:
+                future.set_exception(e)
+            self._finish(job_id, future, on_done)
+            return future
+        future = self._get_executor().submit(work, *args)
+        future.add_done_callback(lambda done: self._finish(job_id, done, on_done))
+        return future
+    
+    def _finish(self, job_id, future, on_done):
+        from extensions import db
+        from models.media import MediaJob
+        from utils import delete_file
+        
+        with self.app.app_context():
+            try:
+                job = db.session.get(MediaJob, job_id)
+                if job is None:
+                    return
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.app.logger.error(f"Media job {job_id} ({job.kind}) failed: {str(e)}")
+                    job.finish(MediaJob.FAILED, error=str(e) or e.__class__.__name__)
+                    if job.source_path:
+                        delete_file(job.source_path)
+                    outcome = 'failed'
+                else:
+                    on_done(job, result)
+                    outcome = 'failed' if job.status == MediaJob.FAILED else 'completed'
+                db.session.commit()
+                with self._lock:
+                    self._stats[outcome] += 1
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Error recording media job {job_id}: {str(e)}")
+    
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+    
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['mode'] = self.mode
+        stats['workers'] = self.workers
+        stats['in_flight'] = stats['submitted'] - stats['completed'] - stats['failed']
+        return stats
+
+
+def _shutdown_at_exit():
+    from extensions import media, videos
+    for pipeline in (media, videos):
+        try:
+            pipeline.shutdown(wait=False)
+        except Exception:
+            pass
+
+
+atexit.register(_shutdown_at_exit)
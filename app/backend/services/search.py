@@ -0,0 +1,167 @@
+"""
+Full-text search over post content.
+
+Each supported database gets its own backend behind the same small API:
+- PostgreSQL: generated tsvector column on posts with a GIN index
+- SQLite: FTS5 virtual table kept in sync with posts by triggers
+- anything else: the original ILIKE scan
+
+Existing databases get the index, with every existing post indexed, from
+migration e9b3c5d71a46; a posts table built by db.create_all() gets it as it
+is created (install_on_create). From then on the database maintains it
+itself, so every write path (ORM, bulk updates, migrations) keeps search
+results current.
+"""
+
+import re
+from sqlalchemy import text, Integer, Float
+from extensions import db
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize_query(term):
+    """Split user input into plain word tokens, dropping search operators"""
+    return _TOKEN_PATTERN.findall(term or '')
+
+
+class PostSearchBackend:
+    """Common interface for post search backends"""
+    name = 'base'
+    DDL = []
+    
+    def install(self, connection):
+        """Create the index on a new, empty posts table"""
+        for statement in self.DDL:
+            connection.execute(text(statement))
+    
+    def match_ids(self, term):
+        """Select of post ids matching term, or None when no index can be used"""
+        return None
+    
+    def ranked_matches(self, term):
+        """Subquery of (post_id, score) for matching posts; higher scores rank first"""
+        return None
+
+
+class SqliteFtsBackend(PostSearchBackend):
+    """SQLite FTS5 external-content table over posts.content"""
+    name = 'sqlite-fts5'
+    DDL = [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts
+           USING fts5(content, content='posts', content_rowid='id', tokenize='porter unicode61')""",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+             INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+             INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF content ON posts BEGIN
+             INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+             INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content);
+           END""",
+    ]
+    
+    def _match_expression(self, term):
+        """Quote every token so user input can never form FTS5 syntax;
+        the last token matches as a prefix for search-as-you-type"""
+        tokens = tokenize_query(term)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"' for token in tokens) + '*'
+    
+    def match_ids(self, term):
+        match = self._match_expression(term)
+        if match is None:
+            return None
+        return text("SELECT rowid AS post_id FROM posts_fts WHERE posts_fts MATCH :match")\
+            .bindparams(match=match)\
+            .columns(post_id=Integer)
+    
+    def ranked_matches(self, term):
+        match = self._match_expression(term)
+        if match is None:
+            return None
+        return text(
+            "SELECT rowid AS post_id, -bm25(posts_fts) AS score "
+            "FROM posts_fts WHERE posts_fts MATCH :match"
+        ).bindparams(match=match)\
+         .columns(post_id=Integer, score=Float)\
+         .subquery('search_matches')
+
+
+class PostgresFtsBackend(PostSearchBackend):
+    """PostgreSQL tsvector generated column with a GIN index"""
+    name = 'postgresql-tsvector'
+    DDL = [
+        """ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+           GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED""",
+        """CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)""",
+    ]
+    
+    def _match_expression(self, term):
+        """AND every token together; the last one matches as a prefix"""
+        tokens = tokenize_query(term)
+        if not tokens:
+            return None
+        return ' & '.join(tokens) + ':*'
+    
+    def match_ids(self, term):
+        match = self._match_expression(term)
+        if match is None:
+            return None
+        return text("SELECT id AS post_id FROM posts WHERE search_vector @@ to_tsquery('english', :match)")\
+            .bindparams(match=match)\
+            .columns(post_id=Integer)
+    
+    def ranked_matches(self, term):
+        match = self._match_expression(term)
+        if match is None:
+            return None
+        return text(
+            "SELECT id AS post_id, ts_rank(search_vector, to_tsquery('english', :match)) AS score "
+            "FROM posts WHERE search_vector @@ to_tsquery('english', :match)"
+        ).bindparams(match=match)\
+         .columns(post_id=Integer, score=Float)\
+         .subquery('search_matches')
+
+
+class LikeBackend(PostSearchBackend):
+    """Fallback that keeps the original unindexed ILIKE behaviour"""
+    name = 'ilike'
+
+
+_BACKENDS = {
+    'sqlite': SqliteFtsBackend,
+    'postgresql': PostgresFtsBackend,
+}
+
+
+def get_search_backend(dialect_name=None):
+    """Return the search backend for the current database"""
+    dialect_name = dialect_name or db.engine.dialect.name
+    return _BACKENDS.get(dialect_name, LikeBackend)()
+
+
+def install_on_create(target, connection, **kw):
+    """after_create hook for the posts table; migrations handle existing tables"""
+    get_search_backend(connection.dialect.name).install(connection)
+
+
+def search_posts(query, term, rank=False):
+    """Restrict a Post query to matches for term, optionally ordered by relevance"""
+    from models.post import Post
+    
+    backend = get_search_backend()
+    if rank:
+        matches = backend.ranked_matches(term)
+        if matches is not None:
+            query = query.join(matches, Post.id == matches.c.post_id)
+            return query.order_by(matches.c.score.desc(), Post.id.desc())
+    else:
+        # A plain semi-join skips scoring every match
+        match_ids = backend.match_ids(term)
+        if match_ids is not None:
+            return query.filter(Post.id.in_(match_ids))
+    
+    return query.filter(Post.content.ilike(f'%{term}%'))
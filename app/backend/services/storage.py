@@ -0,0 +1,431 @@
+"""
+Where uploaded files are kept, selected by STORAGE_BACKEND.
+
+Backends:
+- 'filesystem': files stay in UPLOAD_FOLDER on local disk and are served by
+  the /uploads route (services/uploads.py). Fine for one instance.
+- 's3': any S3-compatible object store (AWS S3, MinIO, R2...), reached over
+  plain HTTP with AWS Signature V4 through `requests`, so no SDK is needed.
+  Every instance sees the same files, and reads can be redirected to
+  presigned URLs (or a public/CDN base URL) instead of passing through a
+  web worker.
+
+UPLOAD_FOLDER stays the local working area in both cases. Uploads are
+streamed there, media workers read their inputs and write their outputs
+there, and files are then published to the backend. With 's3', publish
+uploads the file (multipart above STORAGE_S3_PART_SIZE, one part in memory
+at a time) and removes the local copy. fetch() brings a stored file back
+for a worker.
+
+Deletes can run on a background thread (STORAGE_ASYNC_DELETE, on by default
+for 's3' only), so a request that releases media does not wait on the
+object store.
+"""
+
+import base64
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import threading
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+import requests
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+
+class StorageError(RuntimeError):
+    """The storage backend refused or failed an operation"""
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _quote(value, safe='-_.~'):
+    return quote(str(value), safe=safe)
+
+
+def sha256_checksum(hex_digest):
+    """x-amz-checksum-sha256 value (base64) for a hex SHA-256 digest"""
+    return base64.b64encode(bytes.fromhex(hex_digest)).decode('ascii')
+
+
+def signing_key(secret_key, date, region, service='s3'):
+    key = _hmac(('AWS4' + secret_key).encode('utf-8'), date)
+    key = _hmac(key, region)
+    key = _hmac(key, service)
+    return _hmac(key, 'aws4_request')
+
+
+def canonical_request(method, path, params, headers, payload_hash):
+    """The SigV4 canonical request; headers must already be lower-cased"""
+    query = '&'.join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(params.items()))
+    names = sorted(headers)
+    canonical_headers = ''.join(f"{name}:{' '.join(str(headers[name]).split())}\n" for name in names)
+    return '\n'.join([method, _quote(path, safe='/-_.~'), query, canonical_headers, ';'.join(names), payload_hash])
+
+
+def signature(secret_key, region, amz_date, request_text, service='s3'):
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(request_text.encode('utf-8')).hexdigest()
+    ])
+    return hmac.new(signing_key(secret_key, amz_date[:8], region, service),
+                    string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+class FilesystemBackend:
+    """Files live in UPLOAD_FOLDER itself; publishing and fetching are no-ops"""
+    
+    name = 'filesystem'
+    is_local = True
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def put_file(self, local_path, path, content_type=None):
+        pass
+    
+    def get_file(self, path, local_path):
+        pass
+    
+    def delete(self, path):
+        full_path = os.path.join(self.root, path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+    
+    def size(self, path):
+        full_path = os.path.join(self.root, path)
+        return os.path.getsize(full_path) if os.path.isfile(full_path) else None
+    
+    def get_head(self, path, local_path, length):
+        with open(os.path.join(self.root, path), 'rb') as source, open(local_path, 'wb') as output:
+            output.write(source.read(length))
+    
+    def copy(self, source, path):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        shutil.copyfile(os.path.join(self.root, source), full_path)
+    
+    def read_url(self, path, expires):
+        return None
+    
+    def upload_url(self, path, content_type, expires, size=None, sha256=None):
+        # Nothing stands between the client and this disk but the app itself
+        return None
+
+
+class S3Backend:
+    """S3-compatible object store, path-style addressing (<endpoint>/<bucket>/<key>)"""
+    
+    name = 's3'
+    is_local = False
+    
+    def __init__(self, endpoint, bucket, access_key, secret_key, region='us-east-1', prefix='',
+                 part_size=8 * 1024 * 1024, public_url=None, timeout=60):
+        self.endpoint = endpoint.rstrip('/')
+        self.host = urlparse(self.endpoint).netloc
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix
+        self.part_size = part_size
+        self.public_url = public_url.rstrip('/') + '/' if public_url else None
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def _path(self, path):
+        return f"/{self.bucket}/{self.prefix}{path}"
+    
+    def _request(self, method, path, params=None, data=None, headers=None, ok=(200,), stream=False):
+        params = params or {}
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        signed = {'host': self.host, 'x-amz-content-sha256': UNSIGNED_PAYLOAD, 'x-amz-date': amz_date}
+        signed.update({name.lower(): value for name, value in (headers or {}).items()})
+        url_path = self._path(path)
+        request_signature = signature(
+            self.secret_key, self.region, amz_date,
+            canonical_request(method, url_path, params, signed, UNSIGNED_PAYLOAD)
+        )
+        signed['authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request, "
+            f"SignedHeaders={';'.join(sorted(name for name in signed if name != 'authorization'))}, "
+            f"Signature={request_signature}"
+        )
+        del signed['host']
+        query = '&'.join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(params.items()))
+        url = self.endpoint + _quote(url_path, safe='/-_.~') + (f"?{query}" if query else '')
+        try:
+            response = self.session.request(method, url, data=data, headers=signed,
+                                            timeout=self.timeout, stream=stream)
+        except requests.RequestException as e:
+            raise StorageError(f"{method} {path}: {e}")
+        if response.status_code not in ok:
+            raise StorageError(f"{method} {path}: HTTP {response.status_code}")
+        return response
+    
+    def put_file(self, local_path, path, content_type=None):
+        headers = {'content-type': content_type} if content_type else {}
+        size = os.path.getsize(local_path)
+        if size <= self.part_size:
+            with open(local_path, 'rb') as source:
+                # A file object with a known length is streamed, not read into memory
+                self._request('PUT', path, data=source, headers={**headers, 'content-length': str(size)})
+            return
+        self._put_multipart(local_path, path, headers)
+    
+    def _put_multipart(self, local_path, path, headers):
+        response = self._request('POST', path, params={'uploads': ''}, headers=headers)
+        upload_id = self._xml_text(response.content, 'UploadId')
+        try:
+            etags = []
+            with open(local_path, 'rb') as source:
+                for number, chunk in enumerate(iter(lambda: source.read(self.part_size), b''), start=1):
+                    response = self._request('PUT', path, params={'partNumber': number, 'uploadId': upload_id},
+                                             data=chunk)
+                    etags.append((number, response.headers.get('ETag', '')))
+            manifest = ''.join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in etags
+            )
+            self._request('POST', path, params={'uploadId': upload_id},
+                          data=f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode('utf-8'))
+        except Exception:
+            try:
+                self._request('DELETE', path, params={'uploadId': upload_id}, ok=(200, 204, 404))
+            except StorageError:
+                pass
+            raise
+    
+    @staticmethod
+    def _xml_text(content, tag):
+        for element in ElementTree.fromstring(content).iter():
+            if element.tag.rsplit('}', 1)[-1] == tag:
+                return element.text
+        raise StorageError(f"No {tag} in response")
+    
+    def get_file(self, path, local_path):
+        response = self._request('GET', path, stream=True)
+        with open(local_path, 'wb') as output:
+            for chunk in response.iter_content(64 * 1024):
+                output.write(chunk)
+    
+    def exists(self, path):
+        return self._request('HEAD', path, ok=(200, 404)).status_code == 200
+    
+    def size(self, path):
+        response = self._request('HEAD', path, ok=(200, 404))
+        return int(response.headers['Content-Length']) if response.status_code == 200 else None
+    
+    def get_head(self, path, local_path, length):
+        response = self._request('GET', path, headers={'range': f"bytes=0-{length - 1}"}, ok=(200, 206))
+        with open(local_path, 'wb') as output:
+            output.write(response.content[:length])
+    
+    def copy(self, source, path):
+        """Server-side CopyObject: the bytes never leave the store; the content type is kept"""
+        response = self._request('PUT', path, headers={'x-amz-copy-source': _quote(self._path(source), safe='/-_.~')})
+        # S3 can report a failed copy in the body of a 200
+        if b'<Error>' in response.content:
+            raise StorageError(f"COPY {source} to {path}: {response.content[:200]!r}")
+    
+    def delete(self, path):
+        self._request('DELETE', path, ok=(200, 204, 404))
+    
+    def presign(self, method, path, expires, headers=None):
+        """URL valid for expires seconds that performs method on path without credentials"""
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        signed = {'host': self.host}
+        signed.update({name.lower(): value for name, value in (headers or {}).items()})
+        params = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f"{self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request",
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(int(expires)),
+            'X-Amz-SignedHeaders': ';'.join(sorted(signed))
+        }
+        url_path = self._path(path)
+        params['X-Amz-Signature'] = signature(
+            self.secret_key, self.region, amz_date,
+            canonical_request(method, url_path, params, signed, UNSIGNED_PAYLOAD)
+        )
+        query = '&'.join(f"{_quote(k)}={_quote(v)}" for k, v in params.items())
+        return f"{self.endpoint}{_quote(url_path, safe='/-_.~')}?{query}"
+    
+    def read_url(self, path, expires):
+        if self.public_url:
+            return f"{self.public_url}{self.prefix}{path}"
+        return self.presign('GET', path, expires)
+    
+    def upload_url(self, path, content_type, expires, size=None, sha256=None):
+        """Presigned PUT; the client must send the same Content-Type, Content-Length when size is
+        given, and x-amz-checksum-sha256 when sha256 is, which the store checks against the body"""
+        headers = {'content-type': content_type} if content_type else {}
+        if size is not None:
+            headers['content-length'] = str(size)
+        if sha256 is not None:
+            headers['x-amz-checksum-sha256'] = sha256_checksum(sha256)
+        return self.presign('PUT', path, expires, headers=headers)
+
+
+class Storage:
+    """Flask extension holding the configured backend"""
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self.root = None
+        self.async_delete = True
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.app = app
+        self.root = config['UPLOAD_FOLDER']
+        name = config.get('STORAGE_BACKEND', 'filesystem')
+        if name == 'filesystem':
+            self.backend = FilesystemBackend(self.root)
+        elif name == 's3':
+            self.backend = S3Backend(
+                endpoint=config['STORAGE_S3_ENDPOINT'],
+                bucket=config['STORAGE_S3_BUCKET'],
+                access_key=config['STORAGE_S3_ACCESS_KEY'],
+                secret_key=config['STORAGE_S3_SECRET_KEY'],
+                region=config.get('STORAGE_S3_REGION', 'us-east-1'),
+                prefix=config.get('STORAGE_S3_PREFIX', ''),
+                part_size=config.get('STORAGE_S3_PART_SIZE', 8 * 1024 * 1024),
+                public_url=config.get('STORAGE_S3_PUBLIC_URL')
+            )
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {name}")
+        self.async_delete = config.get('STORAGE_ASYNC_DELETE', name != 'filesystem')
+        self.presign_expires = config.get('STORAGE_PRESIGN_EXPIRES', 900)
+        self.reset_stats()
+        app.extensions['storage'] = self
+    
+    @property
+    def is_local(self):
+        return self.backend.is_local
+    
+    def local_path(self, path):
+        return os.path.join(self.root, path)
+    
+    def publish(self, path, new=True, content_type=None):
+        """Make the file at UPLOAD_FOLDER/path durable; new=False when the backend already holds it"""
+        if self.backend.is_local:
+            return
+        local_path = self.local_path(path)
+        try:
+            if new:
+                # Served as stored, so presigned reads need the right type
+                self.backend.put_file(local_path, path, content_type or mimetypes.guess_type(path)[0])
+                with self._lock:
+                    self._stats['published'] += 1
+        finally:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+    
+    def fetch(self, path, local_path):
+        """Copy a stored file to local_path (a no-op on the filesystem, where it already is)"""
+        self.backend.get_file(path, local_path)
+    
+    def fetch_head(self, path, local_path, length):
+        """Copy the first length bytes of a stored file to local_path, e.g. to read an image header"""
+        self.backend.get_head(path, local_path, length)
+    
+    def size(self, path):
+        """Size in bytes of a stored file, or None when there is none"""
+        return self.backend.size(path)
+    
+    def copy(self, source, path):
+        """Copy a stored file to path inside the backend (server-side on object stores)"""
+        self.backend.copy(source, path)
+    
+    def read_url(self, path):
+        """Where clients read path directly from the store, or None to serve it from /uploads"""
+        return self.backend.read_url(path, self.presign_expires)
+    
+    def upload_url(self, path, content_type=None, size=None, expires=None, sha256=None):
+        """Presigned direct-to-storage PUT for path, or None when uploads must go through the app"""
+        return self.backend.upload_url(path, content_type, expires or self.presign_expires, size, sha256)
+    
+    def delete(self, paths, keep=None):
+        """Remove stored files, on a background thread when STORAGE_ASYNC_DELETE is set.
+        
+        keep(path) is asked again right before each file goes, under an app
+        context; a true answer leaves that file alone. Callers use it to
+        spare a file that was stored again after they decided to delete it.
+        """
+        paths = list(paths)
+        if not paths:
+            return
+        if not self.async_delete:
+            self._delete(paths, keep)
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='storage-delete')
+            future = self._executor.submit(self._run_delete, paths, keep)
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+    
+    def _forget(self, future):
+        with self._lock:
+            self._pending.discard(future)
+    
+    def _run_delete(self, paths, keep):
+        if self.app is None:
+            return self._delete(paths, keep)
+        with self.app.app_context():
+            return self._delete(paths, keep)
+    
+    def _delete(self, paths, keep=None):
+        backend = self.backend
+        for path in paths:
+            try:
+                if keep is not None and keep(path):
+                    continue
+                backend.delete(path)
+                if not backend.is_local and os.path.exists(self.local_path(path)):
+                    os.remove(self.local_path(path))
+                outcome = 'deleted'
+            except Exception:
+                outcome = 'delete_errors'
+            with self._lock:
+                self._stats[outcome] += 1
+    
+    def wait(self, timeout=None):
+        """Block until queued deletes have run (shutdown, tests)"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout)
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'published': 0, 'deleted': 0, 'delete_errors': 0}
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending_deletes'] = len(self._pending)
+        stats['backend'] = self.backend.name if self.backend else None
+        return stats
@@ -0,0 +1,178 @@
+"""
+Offline "people you may know" computation.
+
+The whole connection graph is loaded once into a compressed sparse row
+(CSR) adjacency: `indices[indptr[u]:indptr[u + 1]]` are u's connections,
+sorted. For each user, the neighbour lists of their connections are
+concatenated and counted with np.unique, which gives every
+second-degree user together with the number of mutual connections (one
+row of A @ A, without materialising the matrix). Direct connections,
+pending requests and the user themselves are masked out with np.isin.
+
+Ties are broken by profile similarity: +0.5 for the same Profile.industry
+and +0.09 per shared User.skills entry (up to 5), so the bonus stays below
+one mutual connection. Results are written to connection_suggestions in
+batches, each batch replacing the previous rows for its users, and read
+back with a single index range scan.
+"""
+
+import json
+import time
+from datetime import datetime
+import numpy as np
+from extensions import db
+from models.connection import Connection, ConnectionRequest
+from models.profile import Profile
+from models.suggestion import ConnectionSuggestion
+from models.user import User
+
+INDUSTRY_BONUS = 0.5
+SKILL_BONUS = 0.09
+MAX_SHARED_SKILLS = 5
+
+
+def load_adjacency():
+    """(user_ids, indptr, indices): the graph in CSR form over dense row numbers"""
+    edges = np.array(
+        db.session.execute(db.select(Connection.user_id, Connection.connected_id)).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    user_ids = np.unique(edges)
+    if not len(user_ids):
+        return user_ids, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    rows = np.searchsorted(user_ids, edges[:, 0])
+    cols = np.searchsorted(user_ids, edges[:, 1])
+    order = np.lexsort((cols, rows))
+    indices = cols[order]
+    indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(user_ids)), out=indptr[1:])
+    return user_ids, indptr, indices
+
+
+def load_pending(user_ids):
+    """Row number -> row numbers with a pending request in either direction"""
+    pending = {}
+    for requester_id, addressee_id in db.session.execute(
+        db.select(ConnectionRequest.requester_id, ConnectionRequest.addressee_id)
+    ):
+        a, b = np.searchsorted(user_ids, [requester_id, addressee_id])
+        if a < len(user_ids) and b < len(user_ids) \
+                and user_ids[a] == requester_id and user_ids[b] == addressee_id:
+            pending.setdefault(int(a), []).append(int(b))
+            pending.setdefault(int(b), []).append(int(a))
+    return pending
+
+
+def load_attributes():
+    """user_id -> (industry, skill set) for the tie-break bonus, for users in the graph"""
+    in_graph = db.select(Connection.user_id)
+    industries = dict(db.session.execute(
+        db.select(Profile.user_id, Profile.industry)
+          .where(Profile.industry.isnot(None), Profile.user_id.in_(in_graph))
+    ).all())
+    attributes = {}
+    for user_id, raw_skills in db.session.execute(db.select(User.id, User.skills).where(User.id.in_(in_graph))):
+        try:
+            skills = {str(skill).strip().lower() for skill in json.loads(raw_skills)} if raw_skills else set()
+        except (json.JSONDecodeError, TypeError):
+            skills = set()
+        industry = (industries.get(user_id) or '').strip().lower() or None
+        attributes[user_id] = (industry, skills)
+    return attributes
+
+
+def mutual_counts(row, indptr, indices, excluded=()):
+    """(candidate rows, mutual counts) for one user's second-degree neighbours"""
+    neighbours = indices[indptr[row]:indptr[row + 1]]
+    if not len(neighbours):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Gather all neighbour lists of the neighbours in one fancy-indexing step
+    starts, lengths = indptr[neighbours], indptr[neighbours + 1] - indptr[neighbours]
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    second = indices[positions]
+    candidates, counts = np.unique(second, return_counts=True)
+
+    mask = ~np.isin(candidates, neighbours, assume_unique=True) & (candidates != row)
+    if excluded:
+        mask &= ~np.isin(candidates, excluded)
+    return candidates[mask], counts[mask]
+
+
+def similarity_bonus(attributes, user_id, other_id):
+    industry, skills = attributes.get(user_id, (None, set()))
+    other_industry, other_skills = attributes.get(other_id, (None, set()))
+    bonus = INDUSTRY_BONUS if industry and industry == other_industry else 0.0
+    return bonus + SKILL_BONUS * min(len(skills & other_skills), MAX_SHARED_SKILLS)
+
+
+def build_suggestions(per_user=50, batch_size=500):
+    """Recompute every user's suggestions; returns a stats dict"""
+    started = time.perf_counter()
+    user_ids, indptr, indices = load_adjacency()
+    pending = load_pending(user_ids)
+    attributes = load_attributes()
+    computed_at = datetime.utcnow()
+
+    written = 0
+    table = ConnectionSuggestion.__table__
+    for start in range(0, len(user_ids), batch_size):
+        batch = range(start, min(start + batch_size, len(user_ids)))
+        rows = []
+        for row in batch:
+            user_id = int(user_ids[row])
+            candidates, counts = mutual_counts(row, indptr, indices, pending.get(row, ()))
+            if not len(candidates):
+                continue
+
+            # Only the best few need the per-pair bonus: keep more than we
+            # store so ties at the cut-off are resolved by similarity
+            keep = np.argsort(-counts, kind='stable')[:per_user * 2]
+            scored = sorted(
+                ((int(counts[i]) + similarity_bonus(attributes, user_id, int(user_ids[candidates[i]])),
+                  int(user_ids[candidates[i]]), int(counts[i])) for i in keep),
+                key=lambda item: (-item[0], item[1])
+            )[:per_user]
+            rows.extend(
+                {'user_id': user_id, 'suggested_id': suggested_id, 'mutual_count': mutual,
+                 'score': score, 'computed_at': computed_at}
+                for score, suggested_id, mutual in scored
+            )
+
+        batch_user_ids = [int(user_ids[row]) for row in batch]
+        db.session.execute(db.delete(ConnectionSuggestion).where(ConnectionSuggestion.user_id.in_(batch_user_ids)))
+        if rows:
+            db.session.execute(table.insert(), rows)
+        db.session.commit()
+        written += len(rows)
+
+    # Users who lost all their connections keep no stale suggestions
+    db.session.execute(db.delete(ConnectionSuggestion).where(ConnectionSuggestion.computed_at < computed_at))
+    db.session.commit()
+
+    return {
+        'users': int(len(user_ids)),
+        'edges': int(len(indices)),
+        'suggestions': written,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def get_suggestions(user_id, limit=20):
+    """Stored suggestions for the user, minus anyone they connected with since the last build"""
+    connected = Connection.adjacency(user_id)
+    suggestions = [
+        suggestion for suggestion in ConnectionSuggestion.for_user(user_id, limit + len(connected))
+        if suggestion.suggested_id not in connected
+    ][:limit]
+    if not suggestions:
+        return []
+
+    users = {user.id: user for user in User.query.filter(
+        User.id.in_([suggestion.suggested_id for suggestion in suggestions])
+    )}
+    return [
+        (users[suggestion.suggested_id], suggestion)
+        for suggestion in suggestions if suggestion.suggested_id in users
+    ]
@@ -0,0 +1,96 @@
+"""
+Serving stored files under /uploads (UPLOAD_URL_PREFIX).
+
+Content-addressed files (services/blobs.py) never change: they go out with
+their sha256 as a strong ETag and `Cache-Control: public, max-age=<1 year>,
+immutable`, so browsers reuse them without revalidating on every feed
+render. Files named per upload (stored before content addressing) get
+werkzeug's ETag and are cached for UPLOADS_MAX_AGE seconds. Either way
+If-None-Match / If-Modified-Since are answered with 304, and Range requests
+(video seeking) with 206 partial content, honouring If-Range.
+
+UPLOADS_SENDFILE hands the bytes to a front proxy instead of streaming them
+from a web worker:
+
+- 'x-sendfile' (Apache mod_xsendfile, lighttpd): X-Sendfile: <absolute path>
+- 'x-accel-redirect' (nginx): X-Accel-Redirect: UPLOADS_ACCEL_PREFIX + <path>,
+  which must be an `internal` location aliased to UPLOAD_FOLDER
+
+The worker still answers 304s itself; ranges are left to the proxy.
+
+With a remote STORAGE_BACKEND there is nothing on local disk to send: the
+route redirects to the store (a presigned GET, or STORAGE_S3_PUBLIC_URL).
+Setting UPLOAD_URL_PREFIX to that public URL skips the redirect entirely.
+"""
+
+import mimetypes
+import os
+from zlib import adler32
+from flask import current_app, redirect, request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from extensions import storage
+from services.blobs import CONTENT_FOLDER, is_content_addressed, digest_of
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Raw uploads waiting for the media pipeline and half-written files are never served
+PRIVATE_FOLDERS = ('incoming/', f'{CONTENT_FOLDER}/tmp/')
+
+SENDFILE_MODES = ('x-sendfile', 'x-accel-redirect')
+
+
+def _cache_policy(response, immutable):
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config.get('UPLOADS_MAX_AGE', 3600)
+
+
+def _sendfile_response(mode, filename, full_path, etag):
+    stat = os.stat(full_path)
+    response = current_app.response_class(
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    )
+    if mode == 'x-sendfile':
+        response.headers['X-Sendfile'] = full_path
+    else:
+        response.headers['X-Accel-Redirect'] = current_app.config.get('UPLOADS_ACCEL_PREFIX', '/internal-uploads/') + filename
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.last_modified = stat.st_mtime
+    # Same shape as werkzeug's own file ETags
+    response.set_etag(etag or f"{stat.st_mtime}-{stat.st_size}-{adler32(full_path.encode('utf-8')) & 0xFFFFFFFF}")
+    return response
+
+
+def send_upload(filename):
+    """Response for GET /uploads/<filename>; raises NotFound"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    full_path = safe_join(upload_folder, filename)
+    if full_path is None:
+        raise NotFound()
+    # Check the normalized path, so incoming/x and ./incoming/x are the same file
+    filename = os.path.relpath(full_path, upload_folder).replace(os.sep, '/')
+    if filename.startswith(PRIVATE_FOLDERS):
+        raise NotFound()
+    if not storage.is_local:
+        return redirect(storage.read_url(filename))
+    if not os.path.isfile(full_path):
+        raise NotFound()
+    
+    immutable = is_content_addressed(filename)
+    # The name already is the content hash: a strong ETag without reading the file
+    etag = digest_of(filename) if immutable else None
+    
+    mode = current_app.config.get('UPLOADS_SENDFILE')
+    if mode in SENDFILE_MODES:
+        response = _sendfile_response(mode, filename, full_path, etag)
+        _cache_policy(response, immutable)
+        return response.make_conditional(request)
+    
+    response = send_file(full_path, etag=etag or True, conditional=True)
+    _cache_policy(response, immutable)
+    return response
@@ -0,0 +1,229 @@
+"""
+Video transcoding for post media, run by the `videos` media pipeline.
+
+Uploaded videos (AVI, WMV, MOV, MP4...) are stored as-is first, like any
+post media. A background job then normalizes each one to H.264/AAC in an
+MP4 container with the index (moov atom) at the front, so browsers can
+start playback before the download ends. It also extracts a poster frame
+and probes the duration and dimensions of the result.
+
+When the job is done, the post's media_url points at the normalized file.
+media_poster_url, media_duration, media_width and media_height are filled
+in, and the post's reference to the original is released. As with image
+variants (services/images.py), the result is cached on the original's blob
+while that blob lives, so a concurrent repost of the same bytes is not
+transcoded twice.
+
+The encoder is chosen by VIDEO_ENCODER: 'ffmpeg' shells out to
+ffmpeg/ffprobe, and 'stub' copies the file and draws a flat poster frame,
+for tests. 'none' (the default where ffmpeg is not installed) queues no
+job: posts keep the video as uploaded, without poster or metadata.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from functools import partial
+from flask import current_app
+from PIL import Image
+from extensions import db, videos
+from models.media import MediaBlob, MediaJob
+from models.post import Post
+from services.blobs import (
+    CONTENT_FOLDER, store_file, acquire_paths, release_paths, discard_unreferenced, local_source
+)
+from utils import get_file_url, get_file_path, delete_file
+
+POST_VIDEO_KIND = 'post_video'
+
+# Poster frames come from this far in, or from the middle of shorter clips
+POSTER_FRAME_SECONDS = 1.0
+
+
+class EncoderError(RuntimeError):
+    """The encoder could not read or convert a video"""
+
+
+class FfmpegEncoder:
+    """Transcodes with the ffmpeg and ffprobe command line tools"""
+    
+    def __init__(self, max_width=1280, timeout=1800, ffmpeg='ffmpeg', ffprobe='ffprobe'):
+        self.max_width = max_width
+        self.timeout = timeout
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+    
+    def _run(self, command):
+        try:
+            return subprocess.run(command, check=True, capture_output=True, timeout=self.timeout)
+        except subprocess.CalledProcessError as e:
+            message = e.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise EncoderError(message[-1] if message else f"{command[0]} failed")
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise EncoderError(str(e))
+    
+    def probe(self, path):
+        """Duration in seconds and size of the first video stream"""
+        output = self._run([
+            self.ffprobe, '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height:format=duration', '-of', 'json', path
+        ]).stdout
+        try:
+            info = json.loads(output)
+            stream = info['streams'][0]
+            return {
+                'duration': float(info['format']['duration']),
+                'width': int(stream['width']),
+                'height': int(stream['height'])
+            }
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise EncoderError("No video stream found")
+    
+    def transcode(self, source_path, output_path):
+        """H.264/AAC MP4, at most max_width wide, index at the front (faststart)"""
+        self._run([
+            self.ffmpeg, '-nostdin', '-v', 'error', '-y', '-i', source_path,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            # Even dimensions, as yuv420p requires
+            '-vf', f"scale='min({self.max_width},trunc(iw/2)*2)':-2",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-b:a', '128k',
+            '-movflags', '+faststart', '-f', 'mp4', output_path
+        ])
+    
+    def poster(self, video_path, output_path, at_seconds):
+        self._run([
+            self.ffmpeg, '-nostdin', '-v', 'error', '-y', '-ss', f"{at_seconds:.3f}", '-i', video_path,
+            '-frames:v', '1', '-q:v', '3', '-f', 'image2', output_path
+        ])
+
+
+class StubEncoder:
+    """Stand-in encoder: keeps the bytes as they are and reports fixed metadata"""
+    
+    DURATION = 2.0
+    SIZE = (640, 360)
+    
+    def __init__(self, **kwargs):
+        pass
+    
+    def probe(self, path):
+        if not os.path.getsize(path):
+            raise EncoderError("No video stream found")
+        return {'duration': self.DURATION, 'width': self.SIZE[0], 'height': self.SIZE[1]}
+    
+    def transcode(self, source_path, output_path):
+        shutil.copyfile(source_path, output_path)
+    
+    def poster(self, video_path, output_path, at_seconds):
+        Image.new('RGB', self.SIZE, (40, 40, 40)).save(output_path, format='JPEG')
+
+
+ENCODERS = {'ffmpeg': FfmpegEncoder, 'stub': StubEncoder}
+
+
+def transcode_video(source_path, upload_folder, encoder_name, options):
+    """Worker side: normalize the video and grab a poster frame; returns the result map with storage paths"""
+    encoder = ENCODERS[encoder_name](**options)
+    temp_folder = os.path.join(upload_folder, CONTENT_FOLDER, 'tmp')
+    os.makedirs(temp_folder, exist_ok=True)
+    
+    with tempfile.TemporaryDirectory(dir=temp_folder) as work:
+        video_path = os.path.join(work, 'video.mp4')
+        poster_path = os.path.join(work, 'poster.jpg')
+        encoder.transcode(source_path, video_path)
+        # Metadata of what clients will play, not of the upload
+        info = encoder.probe(video_path)
+        encoder.poster(video_path, poster_path, min(POSTER_FRAME_SECONDS, info['duration'] / 2))
+        
+        return {
+            'video': {
+                'mp4': store_file(upload_folder, video_path, 'mp4'),
+                'width': info['width'],
+                'height': info['height'],
+                'duration': info['duration']
+            },
+            'poster': {
+                'jpeg': store_file(upload_folder, poster_path, 'jpg'),
+                'width': info['width'],
+                'height': info['height']
+            }
+        }
+
+
+def apply_video(post, media_url, result):
+    """Point the post at the normalized video; does not commit"""
+    # Acquire first: the original's release may drop the cached copy's references
+    acquire_paths(MediaBlob.variant_paths({POST_VIDEO_KIND: result}))
+    release_paths([get_file_path(media_url)])
+    
+    video = result['video']
+    post.media_url = get_file_url(video['mp4'])
+    post.media_poster_url = get_file_url(result['poster']['jpeg'])
+    post.media_duration = video['duration']
+    post.media_width = video['width']
+    post.media_height = video['height']
+
+
+def finish_post_video(post_id, media_url, job, result):
+    """App side: cache the result on the original's blob and switch the post over; does not commit"""
+    if job.source_path:
+        delete_file(job.source_path)
+    paths = MediaBlob.variant_paths({POST_VIDEO_KIND: result})
+    source = MediaBlob.find_by_path(get_file_path(media_url))
+    if source is None:
+        # The original was released while this job ran
+        discard_unreferenced(paths)
+        job.finish(MediaJob.CANCELLED)
+        return
+    
+    cached = source.cached_variants(POST_VIDEO_KIND)
+    if cached is None:
+        acquire_paths(paths - {source.path})
+        source.cache_variants(POST_VIDEO_KIND, result)
+    else:
+        discard_unreferenced(paths)
+        result = cached
+    
+    post = db.session.get(Post, post_id)
+    if post is None or post.media_url != media_url:
+        job.finish(MediaJob.CANCELLED)
+        return
+    apply_video(post, media_url, result)
+    job.finish(MediaJob.DONE, result_url=post.media_url)
+
+
+def queue_post_video(post):
+    """Normalize the post's uploaded video in the background unless the same bytes
+    were transcoded before or no encoder is configured; returns the MediaJob or None"""
+    if current_app.config['VIDEO_ENCODER'] == 'none':
+        return None
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    original = get_file_path(post.media_url)
+    
+    source = MediaBlob.find_by_path(original)
+    cached = source.cached_variants(POST_VIDEO_KIND) if source else None
+    if cached:
+        apply_video(post, post.media_url, cached)
+        db.session.commit()
+        return None
+    
+    # Keeps the original until the job reports back
+    source_path, staging_path = local_source(original)
+    job = MediaJob(user_id=post.user_id, kind=POST_VIDEO_KIND, source_path=staging_path)
+    db.session.add(job)
+    db.session.commit()
+    
+    options = {
+        'max_width': current_app.config.get('VIDEO_MAX_WIDTH', 1280),
+        'timeout': current_app.config.get('VIDEO_JOB_TIMEOUT', 1800)
+    }
+    videos.submit(
+        job.id,
+        transcode_video,
+        (source_path, upload_folder, current_app.config['VIDEO_ENCODER'], options),
+        partial(finish_post_video, post.id, post.media_url)
+    )
+    return job
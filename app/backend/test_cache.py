@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable cache layer in services/cache.py
+"""
+
+from extensions import cache
+import threading
+import time
+
+from services.cache import Cache, MemoryLRUBackend, SQLiteBackend, _MISSING
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(backend):
+    instance = Cache()
+    instance.backend = backend
+    return instance
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """The LRU keeps the most recently touched entries"""
+    backend = MemoryLRUBackend(max_entries=2)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    backend.get('a')
+    backend.set('c', 3)
+
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+    assert backend.get('b') is _MISSING
+
+
+def test_ttl_is_per_key():
+    """Keys expire independently of each other"""
+    clock = FakeClock()
+    store = make_cache(MemoryLRUBackend(clock=clock))
+    store.set('short', 'x', ttl=10)
+    store.set('long', 'y', ttl=100)
+
+    clock.now += 50
+
+    assert store.get('short') is None
+    assert store.get('long') == 'y'
+
+
+def test_invalidation_reaches_every_worker_on_sqlite(tmp_path):
+    """Two processes sharing a SQLite file see each other's invalidations"""
+    path = str(tmp_path / 'cache.sqlite')
+    worker_a = make_cache(SQLiteBackend(path))
+    worker_b = make_cache(SQLiteBackend(path))
+
+    worker_a.set('categories', [{'name': 'general', 'count': 1}], namespace='posts')
+    worker_a.set('other', 'kept', namespace='jobs')
+    assert worker_b.get('categories', namespace='posts') == [{'name': 'general', 'count': 1}]
+
+    worker_b.invalidate('posts')
+
+    assert worker_a.get('categories', namespace='posts') is None
+    assert worker_a.get('other', namespace='jobs') == 'kept'
+
+
+def test_stats_count_hits_and_misses():
+    """Lookups are reported in the metrics"""
+    store = make_cache(MemoryLRUBackend())
+    calls = []
+
+    for _ in range(3):
+        store.get_or_set('key', lambda: calls.append(1) or 'value')
+
+    stats = store.stats()
+    assert calls == [1]
+    assert (stats['hits'], stats['misses'], stats['sets']) == (2, 1, 1)
+    assert stats['hit_rate'] == round(2 / 3, 4)
+
+
+def test_categories_are_cached_until_a_post_is_created(client, make_user, auth_headers, count_queries):
+    """A post write invalidates the categories entry"""
+    user = make_user()
+    headers = auth_headers(user)
+    client.post('/api/posts', data={'content': 'First', 'category': 'career'}, headers=headers)
+
+    assert client.get('/api/posts/categories', headers=headers).get_json()['categories'] == [{'name': 'career', 'count': 1}]
+    with count_queries() as statements:
+        client.get('/api/posts/categories', headers=headers)
+    assert statements == []
+
+    client.post('/api/posts', data={'content': 'Second', 'category': 'career'}, headers=headers)
+
+    # The pre-write list is served while one background refresh runs
+    assert client.get('/api/posts/categories', headers=headers).get_json()['categories'] == [{'name': 'career', 'count': 1}]
+    cache.join_refreshes(timeout=5)
+    assert client.get('/api/posts/categories', headers=headers).get_json()['categories'] == [{'name': 'career', 'count': 2}]
+    assert cache.stats()['invalidations'] >= 2
+    assert cache.stats()['refreshes'] == 1
+
+
+def run_concurrently(count, target):
+    """Start count threads on target at the same moment and wait for them"""
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(target())
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_compute(calls, value='value', delay=0.2):
+    """Compute function that records its calls"""
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        return value
+    return compute
+
+
+def test_concurrent_misses_compute_once():
+    """Threads missing the same key share a single computation"""
+    store = make_cache(MemoryLRUBackend())
+    calls = []
+
+    results = run_concurrently(20, lambda: store.get_or_set('key', slow_compute(calls)))
+
+    assert results == ['value'] * 20
+    assert calls == [1]
+    assert store.stats()['coalesced'] == 19
+
+
+def test_concurrent_misses_compute_once_across_workers(tmp_path):
+    """Caches sharing a SQLite file coordinate through the lease table"""
+    path = str(tmp_path / 'cache.sqlite')
+    workers = [make_cache(SQLiteBackend(path)) for _ in range(4)]
+    calls = []
+    counter = iter(range(100))
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            worker = workers[next(counter) % len(workers)]
+        return worker.get_or_set('key', slow_compute(calls))
+
+    results = run_concurrently(12, request)
+
+    assert results == ['value'] * 12
+    assert calls == [1]
+
+
+def test_stale_value_is_served_while_refreshing():
+    """After invalidation the old value is returned and refreshed in the background"""
+    store = make_cache(MemoryLRUBackend())
+    store.get_or_set('key', lambda: 'old', stale_ttl=60)
+    store.invalidate('default')
+    calls = []
+
+    results = run_concurrently(10, lambda: store.get_or_set('key', slow_compute(calls, 'new'), stale_ttl=60))
+    store.join_refreshes(timeout=5)
+
+    assert results == ['old'] * 10
+    assert calls == [1]
+    assert store.get_or_set('key', lambda: 'unused', stale_ttl=60) == 'new'
+
+
+def test_expired_value_without_stale_window_is_recomputed():
+    """Without stale_ttl an expired entry is a plain miss"""
+    clock = FakeClock()
+    store = make_cache(MemoryLRUBackend(clock=clock))
+    store.get_or_set('key', lambda: 'old', ttl=10)
+
+    clock.now += 11
+
+    assert store.get_or_set('key', lambda: 'new', ttl=10) == 'new'
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the "people you may know" batch job and endpoint
+"""
+
+import json
+
+import numpy as np
+
+from extensions import db
+from models.connection import Connection, ConnectionRequest
+from models.profile import Profile
+from services.suggestions import build_suggestions, load_adjacency, mutual_counts
+
+
+def link(*pairs):
+    for a, b in pairs:
+        db.session.add(Connection(a.id, b.id))
+        db.session.add(Connection(b.id, a.id))
+    db.session.commit()
+
+
+def test_mutual_counts_match_matrix_square(app, make_user):
+    """CSR neighbour counting equals the off-diagonal of A @ A"""
+    users = [make_user() for _ in range(8)]
+    rng = np.random.default_rng(3)
+    pairs = {(i, j) for i in range(8) for j in range(i + 1, 8) if rng.random() < 0.4}
+    link(*((users[i], users[j]) for i, j in pairs))
+
+    user_ids, indptr, indices = load_adjacency()
+    size = len(user_ids)
+    matrix = np.zeros((size, size), dtype=np.int64)
+    for row in range(size):
+        matrix[row, indices[indptr[row]:indptr[row + 1]]] = 1
+    square = matrix @ matrix
+
+    for row in range(size):
+        candidates, counts = mutual_counts(row, indptr, indices)
+        expected = {col: square[row, col] for col in range(size)
+                    if col != row and not matrix[row, col] and square[row, col]}
+        assert dict(zip(candidates.tolist(), counts.tolist())) == expected
+
+
+def test_suggestions_rank_by_mutuals_then_similarity(client, make_user, auth_headers):
+    """More mutual connections win; industry and skills break ties"""
+    me, hub1, hub2, strong, similar, plain, pending = [make_user() for _ in range(7)]
+    link((me, hub1), (me, hub2),
+         (hub1, strong), (hub2, strong),
+         (hub1, similar), (hub1, plain), (hub1, pending))
+    db.session.add(ConnectionRequest(me.id, pending.id))
+    db.session.add(Profile(user_id=me.id, industry='Software'))
+    db.session.add(Profile(user_id=similar.id, industry='software'))
+    me.skills = json.dumps(['Python'])
+    plain.skills = json.dumps(['Cooking'])
+    db.session.commit()
+    strong_id, similar_id, plain_id = strong.id, similar.id, plain.id
+
+    stats = build_suggestions()
+
+    assert stats['users'] == 7
+    response = client.get('/api/profile/suggestions', headers=auth_headers(me))
+    suggestions = response.get_json()['suggestions']
+    assert [user['id'] for user in suggestions] == [strong_id, similar_id, plain_id]
+    assert [user['mutual_connections'] for user in suggestions] == [2, 1, 1]
+
+
+def test_rebuild_replaces_and_read_filters_new_connections(client, make_user, auth_headers):
+    """Connecting hides a suggestion at once; a rebuild drops stale rows"""
+    me, hub, other = make_user(), make_user(), make_user()
+    link((me, hub), (hub, other))
+    headers = auth_headers(me)
+    build_suggestions()
+    assert len(client.get('/api/profile/suggestions', headers=headers).get_json()['suggestions']) == 1
+
+    link((me, other))
+    Connection._forget(me.id)
+    assert client.get('/api/profile/suggestions', headers=headers).get_json()['suggestions'] == []
+
+    db.session.query(Connection).delete()
+    db.session.commit()
+    build_suggestions()
+    assert db.session.execute(db.text('SELECT COUNT(*) FROM connection_suggestions')).scalar() == 0
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for connections and 'connections' post visibility
+"""
+
+from extensions import db
+from models.connection import Connection
+from models.post import Post
+
+
+def connect(client, headers_a, headers_b, user_a_id, user_b_id):
+    assert client.post(f'/api/connections/{user_b_id}', headers=headers_a).status_code == 201
+    response = client.post(f'/api/connections/{user_a_id}/accept', headers=headers_b)
+    assert response.status_code == 200
+
+
+def test_request_accept_and_remove(client, make_user, auth_headers):
+    """A request is pending until accepted; removal disconnects both sides"""
+    alice, bob = make_user(), make_user()
+    alice_headers, bob_headers = auth_headers(alice), auth_headers(bob)
+    alice_id, bob_id = alice.id, bob.id
+
+    response = client.post(f'/api/connections/{bob_id}', headers=alice_headers)
+    assert response.get_json()['status'] == 'pending'
+    assert not Connection.are_connected(alice_id, bob_id)
+
+    incoming = client.get('/api/connections/requests', headers=bob_headers).get_json()['requests']
+    assert [request['requester']['username'] for request in incoming] == ['user1']
+
+    assert client.post(f'/api/connections/{alice_id}/accept', headers=bob_headers).status_code == 200
+    assert Connection.are_connected(alice_id, bob_id)
+    assert Connection.are_connected(bob_id, alice_id)
+    listed = client.get('/api/connections', headers=alice_headers).get_json()['connections']
+    assert [user['id'] for user in listed] == [bob_id]
+    assert 'email' not in listed[0]
+
+    assert client.delete(f'/api/connections/{alice_id}', headers=bob_headers).status_code == 200
+    assert not Connection.are_connected(alice_id, bob_id)
+    assert client.delete(f'/api/connections/{alice_id}', headers=bob_headers).status_code == 404
+
+
+def test_crossed_requests_connect(client, make_user, auth_headers):
+    """Asking someone who already asked you connects straight away"""
+    alice, bob = make_user(), make_user()
+    alice_id, bob_id = alice.id, bob.id
+    client.post(f'/api/connections/{bob_id}', headers=auth_headers(alice))
+
+    response = client.post(f'/api/connections/{alice_id}', headers=auth_headers(bob))
+
+    assert response.get_json()['status'] == 'connected'
+    assert Connection.adjacency(alice_id) == {bob_id}
+
+
+def test_cannot_connect_with_yourself(client, make_user, auth_headers):
+    user = make_user()
+
+    response = client.post(f'/api/connections/{user.id}', headers=auth_headers(user))
+
+    assert response.status_code == 400
+
+
+def test_connections_posts_are_filtered(client, make_user, auth_headers):
+    """'connections' posts reach connections and the author, nobody else"""
+    author, friend, stranger = make_user(), make_user(), make_user()
+    author_headers, friend_headers = auth_headers(author), auth_headers(friend)
+    stranger_headers = auth_headers(stranger)
+    connect(client, friend_headers, author_headers, friend.id, author.id)
+    author_id = author.id
+
+    public = Post(user_id=author_id, content='Everyone', visibility='public')
+    restricted = Post(user_id=author_id, content='Friends only', visibility='connections')
+    private = Post(user_id=author_id, content='Me only', visibility='private')
+    for post in (public, restricted, private):
+        post.save()
+    public_id, restricted_id, private_id = public.id, restricted.id, private.id
+
+    def listed(headers):
+        response = client.get(f'/api/posts?user_id={author_id}', headers=headers)
+        return {post['id'] for post in response.get_json()['posts']}
+
+    assert listed(author_headers) == {public_id, restricted_id, private_id}
+    assert listed(friend_headers) == {public_id, restricted_id}
+    assert listed(stranger_headers) == {public_id}
+
+    assert client.get(f'/api/posts/{restricted_id}', headers=friend_headers).status_code == 200
+    assert client.get(f'/api/posts/{restricted_id}', headers=stranger_headers).status_code == 404
+    assert client.get(f'/api/posts/{private_id}', headers=friend_headers).status_code == 404
+    assert {post.id for post in Post.get_feed_posts(stranger.id)} == {public_id}
+
+
+def test_connections_posts_fan_out_only_to_connections(client, make_user, auth_headers):
+    """Followers who are not connections do not get 'connections' posts"""
+    author, friend, follower = make_user(), make_user(), make_user()
+    author_headers, friend_headers = auth_headers(author), auth_headers(friend)
+    follower_headers = auth_headers(follower)
+    author_id = author.id
+    connect(client, friend_headers, author_headers, friend.id, author_id)
+    client.post(f'/api/feed/follow/{author_id}', headers=friend_headers)
+    client.post(f'/api/feed/follow/{author_id}', headers=follower_headers)
+
+    response = client.post('/api/posts', headers=author_headers,
+                           data={'content': 'Friends only', 'visibility': 'connections'})
+    post_id = response.get_json()['post']['id']
+
+    def feed(headers):
+        return [post['id'] for post in client.get('/api/feed', headers=headers).get_json()['posts']]
+
+    assert feed(friend_headers) == [post_id]
+    assert feed(follower_headers) == []
+
+    # Disconnecting hides it again even though the timeline row remains
+    client.delete(f'/api/connections/{author_id}', headers=friend_headers)
+    assert feed(friend_headers) == []
+
+
+def test_visibility_filter_is_a_single_query(client, make_user, auth_headers, count_queries):
+    """Many connections do not add queries or bound parameters to the listing"""
+    viewer = make_user()
+    headers = auth_headers(viewer)
+    viewer_id = viewer.id
+    others = [make_user() for _ in range(30)]
+    for other in others:
+        db.session.add(Connection(viewer_id, other.id))
+        db.session.add(Connection(other.id, viewer_id))
+        db.session.add(Post(user_id=other.id, content='Hi', visibility='connections'))
+    db.session.commit()
+
+    with count_queries() as statements:
+        response = client.get('/api/posts?per_page=50', headers=headers)
+
+    assert len(response.get_json()['posts']) == 30
+    listing = [statement for statement in statements if 'FROM posts' in statement and 'connections' in statement]
+    assert listing and all(statement.count('?') < 10 for statement in listing)
+
+
+def test_visibility_ignores_stale_cached_adjacency(client, make_user, auth_headers):
+    """A removal made by another worker takes effect at once, whatever this worker has cached"""
+    author, friend = make_user(), make_user()
+    author_headers, friend_headers = auth_headers(author), auth_headers(friend)
+    author_id, friend_id = author.id, friend.id
+    connect(client, friend_headers, author_headers, friend_id, author_id)
+    restricted = Post(user_id=author_id, content='Friends only', visibility='connections')
+    restricted.save()
+    restricted_id = restricted.id
+    assert Connection.adjacency(friend_id) == {author_id}
+
+    # Another worker removes the connection; its cache invalidation never reaches this one
+    Connection.query.delete()
+    db.session.commit()
+
+    assert Connection.adjacency(friend_id) == {author_id}
+    assert client.get(f'/api/posts/{restricted_id}', headers=friend_headers).status_code == 404
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind counter buffer in services/counters.py
+"""
+
+from extensions import counters, db
+from models.post import Post
+
+
+def create_post(user, content='Counted'):
+    post = Post(user_id=user.id, content=content)
+    post.save()
+    return post
+
+
+def stored(post_id, field='views_count'):
+    return db.session.scalar(db.select(getattr(Post, field)).where(Post.id == post_id))
+
+
+def test_views_are_buffered_until_flush(app, make_user):
+    """Recording views writes nothing until the buffer flushes"""
+    user = make_user()
+    post = create_post(user)
+
+    for _ in range(50):
+        Post.record_view(post.id)
+
+    assert stored(post.id) == 0
+    assert counters.pending(post.id, 'views_count') == 50
+    assert counters.flush() == 1
+    assert stored(post.id) == 50
+    assert counters.stats()['pending_rows'] == 0
+
+
+def test_flush_is_one_bulk_statement_per_counter(app, make_user, count_queries):
+    """Many posts and increments collapse into one executemany UPDATE per column"""
+    user = make_user()
+    posts = [create_post(user, f'Post {i}') for i in range(20)]
+    post_ids = [post.id for post in posts]
+    for post_id in post_ids:
+        for _ in range(5):
+            counters.add(post_id, 'views_count')
+        counters.add(post_id, 'comments_count', 2)
+
+    with count_queries() as statements:
+        counters.flush()
+
+    assert len([s for s in statements if s.startswith('UPDATE')]) == 2
+    assert {stored(post_id) for post_id in post_ids} == {5}
+    assert {stored(post_id, 'comments_count') for post_id in post_ids} == {2}
+
+
+def test_get_post_counts_views(client, make_user, auth_headers):
+    """Fetching a post records a view without a write per request"""
+    user = make_user()
+    headers = auth_headers(user)
+    post = create_post(user)
+
+    for _ in range(3):
+        assert client.get(f'/api/posts/{post.id}', headers=headers).status_code == 200
+    counters.flush()
+    # The test shares one session with the requests it makes
+    db.session.expire_all()
+
+    assert client.get(f'/api/posts/{post.id}', headers=headers).get_json()['post']['views_count'] == 3
+
+
+def test_views_count_sort_is_usable(client, make_user, auth_headers):
+    """sort_by=views_count works now that the column exists"""
+    user = make_user()
+    quiet = create_post(user, 'Quiet')
+    popular = create_post(user, 'Popular')
+    counters.add(popular.id, 'views_count', 10)
+    counters.flush()
+
+    response = client.get('/api/posts?sort_by=views_count&cursor=', headers=auth_headers(user))
+
+    assert [post['id'] for post in response.get_json()['posts']] == [popular.id, quiet.id]
+
+
+def test_failed_flush_keeps_deltas(app, make_user, monkeypatch):
+    """Deltas survive a failed flush and are written by the next one"""
+    user = make_user()
+    post = create_post(user)
+    counters.add(post.id, 'views_count', 4)
+
+    def fail(by_field):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(counters, '_write', fail)
+    assert counters.flush() == 0
+    monkeypatch.undo()
+
+    counters.add(post.id, 'views_count', 1)
+    counters.flush()
+
+    assert stored(post.id) == 5
+    stats = counters.stats()
+    assert stats['flush_errors'] == 1
+    assert stats['last_flush_lag_seconds'] >= 0
+
+
+def test_threshold_triggers_flush(app, make_user):
+    """Reaching the pending-row threshold flushes immediately"""
+    user = make_user()
+    posts = [create_post(user, f'Post {i}') for i in range(3)]
+    counters.flush_threshold = 3
+
+    for post in posts:
+        counters.add(post.id, 'views_count')
+
+    assert [stored(post.id) for post in posts] == [1, 1, 1]
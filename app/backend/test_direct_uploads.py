@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for two-phase post media uploads (ticket, direct PUT, attach)
+"""
+
+import hashlib
+import io
+import os
+import requests
+from PIL import Image
+from extensions import db
+from models.media import MediaBlob, MediaUploadClaim
+from services.direct_uploads import load_ticket
+
+
+def jpeg_bytes(size=(800, 400), color=(20, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def request_ticket(client, headers, data, filename='photo.jpg', content_type='image/jpeg'):
+    return client.post('/api/posts/media-uploads', headers=headers, json={
+        'filename': filename, 'content_type': content_type, 'size': len(data),
+        'sha256': hashlib.sha256(data).hexdigest()
+    })
+
+
+def staged_files(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'incoming', 'uploads')
+    return [name for _, _, names in os.walk(root) for name in names]
+
+
+def test_upload_through_ticket_and_attach(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = jpeg_bytes()
+
+    response = request_ticket(client, headers, data)
+    assert response.status_code == 201
+    upload = response.get_json()['upload']
+    # No object store on the filesystem backend: the app takes the raw body itself
+    assert upload['url'].startswith('/api/posts/media-uploads/')
+    assert (upload['method'], upload['media_type'], upload['size']) == ('PUT', 'image', len(data))
+
+    response = client.put(upload['url'], data=data, headers=upload['headers'])
+    assert response.status_code == 204
+
+    response = client.post('/api/posts', headers=headers,
+                           json={'content': 'Look', 'tags': ['travel'], 'media_upload': upload['token']})
+    assert response.status_code == 201, response.get_json()
+    post = response.get_json()['post']
+    assert post['media_type'] == 'image'
+    assert post['media_url'].startswith('/uploads/media/')
+    assert post['tags'] == ['travel']
+    assert post['media_variants']['sizes']['card']['width'] == 640
+    assert staged_files(app) == []
+    assert MediaBlob.find_by_path(post['media_url'][len('/uploads/'):]).ref_count == 1
+
+    # The staged file went to the first post
+    response = client.post('/api/posts', headers=headers, json={'content': 'Again', 'media_upload': upload['token']})
+    assert response.status_code == 400
+
+
+def test_ticket_constraints(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    assert request_ticket(client, headers, b'x', filename='notes.txt').status_code == 400
+    assert request_ticket(client, headers, b'x', content_type='video/mp4').status_code == 400
+    assert client.post('/api/posts/media-uploads', headers=headers,
+                       json={'filename': 'a.jpg', 'content_type': 'image/jpeg', 'size': 0}).status_code == 400
+    assert client.post('/api/posts/media-uploads', headers=headers,
+                       json={'filename': 'a.jpg', 'content_type': 'image/jpeg', 'size': 10}).status_code == 400
+    assert client.post('/api/posts/media-uploads', headers=headers, json={
+        'filename': 'a.jpg', 'content_type': 'image/jpeg', 'size': 10, 'sha256': 'abc'
+    }).status_code == 400
+    response = client.post('/api/posts/media-uploads', headers=headers,
+                           json={'filename': 'a.mp4', 'content_type': 'video/mp4', 'size': 50 * 1024 * 1024})
+    assert response.status_code == 413
+
+
+def test_uploads_must_match_their_ticket(app, client, make_user, auth_headers):
+    owner_headers = auth_headers(make_user())
+    other_headers = auth_headers(make_user())
+    data = jpeg_bytes()
+    upload = request_ticket(client, owner_headers, data).get_json()['upload']
+
+    assert client.put(upload['url'], data=data, headers={'Content-Type': 'image/png'}).status_code == 400
+    assert client.put(upload['url'], data=data + b'!', headers=upload['headers']).status_code == 400
+    assert client.put(upload['url'], data=data[:-1] + b'!', headers=upload['headers']).status_code == 400
+    assert client.put(upload['url'] + 'x', data=data, headers=upload['headers']).status_code == 400
+    assert staged_files(app) == []
+
+    assert client.put(upload['url'], data=data, headers=upload['headers']).status_code == 204
+    response = client.post('/api/posts', headers=other_headers, json={'content': 'Mine', 'media_upload': upload['token']})
+    assert response.status_code == 400
+    assert staged_files(app) != []
+
+
+def test_invalid_image_is_rejected_on_attach(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = b'not really a jpeg'
+    upload = request_ticket(client, headers, data).get_json()['upload']
+    client.put(upload['url'], data=data, headers=upload['headers'])
+
+    response = client.post('/api/posts', headers=headers, json={'content': 'Look', 'media_upload': upload['token']})
+
+    assert response.status_code == 400
+    assert 'Invalid image' in response.get_json()['error']
+    assert staged_files(app) == []
+    assert MediaBlob.query.count() == 0
+
+
+def test_direct_upload_to_object_store(app, client, s3_storage, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = b'RIFF fake video payload'
+    upload = request_ticket(client, headers, data, filename='clip.mp4', content_type='video/mp4').get_json()['upload']
+    assert upload['url'].startswith(s3_storage.endpoint)
+
+    # Presigned over the declared size and type; the app never sees these bytes
+    assert requests.put(upload['url'], data=data + b'!', headers=upload['headers']).status_code == 403
+    assert requests.put(upload['url'], data=data, headers={'Content-Type': 'video/avi'}).status_code == 403
+    assert requests.put(upload['url'], data=data[:-1] + b'!', headers=upload['headers']).status_code == 400
+    assert requests.put(upload['url'], data=data, headers=upload['headers']).status_code == 200
+    assert client.put(f"/api/posts/media-uploads/{upload['token']}", data=data,
+                      headers=upload['headers']).status_code == 404
+
+    del s3_storage.requests[:]
+    response = client.post('/api/posts', headers=headers, json={'content': 'Watch', 'media_upload': upload['token']})
+    assert response.status_code == 201, response.get_json()
+    post = response.get_json()['post']
+    # Attached by a server-side copy: the app never downloads the staged object
+    staged = load_ticket(upload['token'])['p']
+    assert [method for method, key, _ in s3_storage.requests if key == staged] == ['HEAD', 'DELETE']
+
+    db.session.expire_all()
+    assert post['media_url'].endswith('.mp4')
+    assert post['media_poster_url'] is not None
+    bucket = os.path.join(s3_storage.root, s3_storage.bucket)
+    assert not os.listdir(os.path.join(bucket, 'incoming', 'uploads'))
+    assert os.path.isfile(os.path.join(bucket, post['media_url'][len('/uploads/'):]))
+
+
+def test_object_store_upload_is_claimed_once(app, client, s3_storage, make_user, auth_headers):
+    """The claim row, not the fetch and delete, decides which attach gets a remotely staged upload"""
+    headers = auth_headers(make_user())
+    data = b'RIFF fake video payload'
+    upload = request_ticket(client, headers, data, filename='clip.mp4', content_type='video/mp4').get_json()['upload']
+    assert requests.put(upload['url'], data=data, headers=upload['headers']).status_code == 200
+    path = load_ticket(upload['token'])['p']
+
+    # A concurrent attach has claimed it but not yet fetched or deleted the staged object
+    assert MediaUploadClaim.claim(path)
+    db.session.commit()
+
+    response = client.post('/api/posts', headers=headers, json={'content': 'Watch', 'media_upload': upload['token']})
+    assert response.status_code == 400
+    assert os.path.isfile(os.path.join(s3_storage.root, s3_storage.bucket, path))
+
+
+def test_object_store_images_are_checked_from_their_header(app, client, s3_storage, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = jpeg_bytes(size=(1600, 1200))
+    bad = b'not really a jpeg'
+    upload, bad_upload = (request_ticket(client, headers, payload).get_json()['upload'] for payload in (data, bad))
+    for ticket, payload in ((upload, data), (bad_upload, bad)):
+        assert requests.put(ticket['url'], data=payload, headers=ticket['headers']).status_code == 200
+
+    response = client.post('/api/posts', headers=headers, json={'content': 'Bad', 'media_upload': bad_upload['token']})
+    assert response.status_code == 400
+    assert 'Invalid image' in response.get_json()['error']
+
+    response = client.post('/api/posts', headers=headers, json={'content': 'Look', 'media_upload': upload['token']})
+    assert response.status_code == 201, response.get_json()
+    post = response.get_json()['post']
+    assert post['media_url'].endswith(f"{hashlib.sha256(data).hexdigest()}.jpg")
+    assert post['media_variants']['sizes']['card']['width'] == 640
+    assert not os.listdir(os.path.join(s3_storage.root, s3_storage.bucket, 'incoming', 'uploads'))
+
+
+def test_json_post_fields_must_have_the_right_types(client, make_user, auth_headers):
+    """Malformed JSON bodies are rejected with 400 instead of failing with 500"""
+    headers = auth_headers(make_user())
+    post_id = client.post('/api/posts', headers=headers, json={'content': 'Hello'}).get_json()['post']['id']
+    for body in ({'content': 5}, {'content': 'Hi', 'rich_content': ['x']}, {'content': 'Hi', 'tags': {'a': 1}},
+                 {'content': 'Hi', 'tags': [1]}, {'content': 'Hi', 'visibility': True},
+                 {'content': 'Hi', 'media_upload': 7}, ['content']):
+        assert client.post('/api/posts', headers=headers, json=body).status_code == 400, body
+        assert client.put(f'/api/posts/{post_id}', headers=headers, json=body).status_code == 400, body
+
+    response = client.put(f'/api/posts/{post_id}', headers=headers, json={'content': 'Edited', 'category': None})
+    assert response.status_code == 200
+    assert response.get_json()['post']['category'] == 'general'
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for the home feed: fan-out on write, follow/unfollow, hybrid reads
+"""
+
+from datetime import datetime, timedelta
+
+from extensions import db
+from models.feed import TimelineEntry
+from models.post import Post
+from models.user import User
+
+
+def create_post(client, headers, content, visibility='public'):
+    response = client.post('/api/posts', headers=headers,
+                           data={'content': content, 'visibility': visibility})
+    assert response.status_code == 201
+    return response.get_json()['post']['id']
+
+
+def follow(client, headers, user_id):
+    response = client.post(f'/api/feed/follow/{user_id}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def feed_ids(client, headers, url='/api/feed'):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return [post['id'] for post in response.get_json()['posts']]
+
+
+def test_new_post_fans_out_to_followers(client, make_user, auth_headers):
+    """Followers see a post once it is created; non-followers do not"""
+    author, follower, stranger = make_user(), make_user(), make_user()
+    author_headers, follower_headers = auth_headers(author), auth_headers(follower)
+    stranger_headers = auth_headers(stranger)
+    follow(client, follower_headers, author.id)
+
+    post_id = create_post(client, author_headers, 'Hello followers')
+
+    assert feed_ids(client, follower_headers) == [post_id]
+    assert feed_ids(client, author_headers) == [post_id]
+    assert feed_ids(client, stranger_headers) == []
+
+
+def test_post_and_fan_out_commit_together(client, make_user, auth_headers, monkeypatch):
+    """A failed fan-out leaves no post behind that the timelines never got"""
+    author = make_user()
+
+    def fail(post):
+        raise RuntimeError('timeline write failed')
+    monkeypatch.setattr('api.posts.fan_out_post', fail)
+
+    response = client.post('/api/posts', headers=auth_headers(author), data={'content': 'Lost'})
+    assert response.status_code == 500
+    assert Post.query.filter_by(user_id=author.id).count() == 0
+
+
+def test_private_posts_stay_with_the_author(client, make_user, auth_headers):
+    """Private posts are not fanned out or shown on the user feed to others"""
+    author, follower = make_user(), make_user()
+    author_headers, follower_headers = auth_headers(author), auth_headers(follower)
+    author_id = author.id
+    follow(client, follower_headers, author_id)
+
+    post_id = create_post(client, author_headers, 'Just for me', visibility='private')
+
+    assert feed_ids(client, follower_headers) == []
+    assert feed_ids(client, author_headers) == [post_id]
+    assert feed_ids(client, follower_headers, f'/api/feed/user/{author_id}') == []
+    assert feed_ids(client, author_headers, f'/api/feed/user/{author_id}') == [post_id]
+
+
+def test_follow_backfills_and_unfollow_removes(client, make_user, auth_headers):
+    """Following pulls in recent posts; unfollowing drops them again"""
+    author, follower = make_user(), make_user()
+    author_headers, follower_headers = auth_headers(author), auth_headers(follower)
+    author_id = author.id
+    first = create_post(client, author_headers, 'Before the follow')
+
+    data = follow(client, follower_headers, author_id)
+    assert data['following'] is True
+    assert follow(client, follower_headers, author_id)['message'] == 'Already following'
+    assert db.session.get(User, author_id).followers_count == 1
+    assert feed_ids(client, follower_headers) == [first]
+
+    response = client.delete(f'/api/feed/follow/{author_id}', headers=follower_headers)
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(User, author_id).followers_count == 0
+    assert feed_ids(client, follower_headers) == []
+
+
+def test_cannot_follow_yourself(client, make_user, auth_headers):
+    user = make_user()
+
+    response = client.post(f'/api/feed/follow/{user.id}', headers=auth_headers(user))
+
+    assert response.status_code == 400
+
+
+def test_popular_authors_are_merged_at_read_time(app, client, make_user, auth_headers):
+    """Authors above the fan-out limit get no timeline rows but still appear"""
+    app.config['FEED_FANOUT_MAX_FOLLOWERS'] = 1
+    celebrity, regular, reader, other = make_user(), make_user(), make_user(), make_user()
+    celebrity_headers, regular_headers = auth_headers(celebrity), auth_headers(regular)
+    reader_headers = auth_headers(reader)
+    celebrity_id, reader_id = celebrity.id, reader.id
+    follow(client, reader_headers, celebrity_id)
+    follow(client, auth_headers(other), celebrity_id)
+    follow(client, reader_headers, regular.id)
+
+    famous = create_post(client, celebrity_headers, 'Famous post')
+    ordinary = create_post(client, regular_headers, 'Ordinary post')
+
+    fanned_out = db.session.scalars(
+        db.select(TimelineEntry.post_id).where(TimelineEntry.user_id == reader_id)
+    ).all()
+    assert fanned_out == [ordinary]
+    assert feed_ids(client, reader_headers) == [ordinary, famous]
+
+
+def test_cursor_pages_merge_both_sources(app, client, make_user, auth_headers):
+    """Pages interleave pushed and pulled posts in time order without repeats"""
+    app.config['FEED_FANOUT_MAX_FOLLOWERS'] = 0
+    celebrity, regular, reader = make_user(), make_user(), make_user()
+    reader_headers = auth_headers(reader)
+    follow(client, reader_headers, celebrity.id)
+    app.config['FEED_FANOUT_MAX_FOLLOWERS'] = 1
+    follow(client, reader_headers, regular.id)
+    app.config['FEED_FANOUT_MAX_FOLLOWERS'] = 0
+
+    base_time = datetime(2025, 1, 1)
+    expected = []
+    for i in range(9):
+        author = celebrity if i % 2 else regular
+        post = Post(user_id=author.id, content=f'Post {i}')
+        post.created_at = base_time + timedelta(minutes=i // 2)
+        post.save()
+        if author is regular:
+            db.session.add(TimelineEntry(user_id=reader.id, post_id=post.id,
+                                         author_id=author.id, created_at=post.created_at))
+        expected.append((post.created_at, post.id))
+    db.session.commit()
+    expected_ids = [post_id for _, post_id in sorted(expected, reverse=True)]
+
+    ids, url = [], '/api/feed?per_page=4'
+    while True:
+        response = client.get(url, headers=reader_headers)
+        data = response.get_json()
+        ids.extend(post['id'] for post in data['posts'])
+        if not data['pagination']['has_more']:
+            break
+        url = f"/api/feed?per_page=4&cursor={data['pagination']['next_cursor']}"
+
+    assert ids == expected_ids
+
+
+def test_feed_query_count_is_constant(app, client, make_user, auth_headers, count_queries):
+    """Reading a page costs the same number of queries however large it is"""
+    author, reader = make_user(), make_user()
+    author_headers, reader_headers = auth_headers(author), auth_headers(reader)
+    follow(client, reader_headers, author.id)
+    create_post(client, author_headers, 'One')
+
+    with count_queries() as small:
+        client.get('/api/feed', headers=reader_headers)
+    for i in range(10):
+        create_post(client, author_headers, f'More {i}')
+    with count_queries() as large:
+        client.get('/api/feed', headers=reader_headers)
+
+    assert len(large) == len(small) <= 4
+
+
+def test_invalid_feed_cursor_is_rejected(client, make_user, auth_headers):
+    user = make_user()
+
+    response = client.get('/api/feed?cursor=garbage', headers=auth_headers(user))
+
+    assert response.status_code == 400
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for responsive image variants in content-addressed storage
+"""
+
+import hashlib
+import io
+import os
+from PIL import Image
+from services.images import render_variants, POST_IMAGE_VARIANTS
+
+
+def jpeg_bytes(size=(2000, 1000), color=(20, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def create_image_post(client, headers, data, name='photo.jpg'):
+    response = client.post('/api/posts', data={'content': 'Look', 'media': (io.BytesIO(data), name)},
+                           headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['post']
+
+
+def stored_path(app, url):
+    return os.path.join(app.config['UPLOAD_FOLDER'], url.replace(app.config['UPLOAD_URL_PREFIX'], ''))
+
+
+def test_render_variants_sizes_and_hashes(tmp_path):
+    """Variants keep the aspect ratio, never upscale and live at their content hash"""
+    source = tmp_path / 'source.jpg'
+    source.write_bytes(jpeg_bytes(size=(1000, 500)))
+
+    rendered = render_variants(str(source), str(tmp_path), POST_IMAGE_VARIANTS)
+
+    assert {name: (entry['width'], entry['height']) for name, entry in rendered.items()} == {
+        'thumb': (160, 80), 'card': (640, 320), 'full': (1000, 500)
+    }
+    for entry in rendered.values():
+        for key in ('jpeg', 'webp'):
+            data = (tmp_path / entry[key]).read_bytes()
+            assert entry[key].startswith('media/')
+            assert hashlib.sha256(data).hexdigest() in entry[key]
+        with Image.open(tmp_path / entry['webp']) as image:
+            assert image.format == 'WEBP'
+
+
+def test_post_exposes_variants_and_srcset(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    post = create_image_post(client, headers, jpeg_bytes())
+
+    variants = post['media_variants']
+    assert set(variants['sizes']) == {'thumb', 'card', 'full'}
+    assert variants['sizes']['full']['width'] == 1600
+    assert variants['srcset']['webp'].endswith(' 1600w')
+    assert variants['srcset']['webp'].count('w,') == 2
+    # The original stays available as media_url
+    assert os.path.exists(stored_path(app, post['media_url']))
+
+    listed = client.get('/api/posts', headers=headers).get_json()['posts'][0]
+    assert listed['media_variants'] == variants
+
+
+def test_identical_uploads_share_variant_files(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = jpeg_bytes(size=(300, 300))
+
+    first = create_image_post(client, headers, data)
+    second = create_image_post(client, headers, data, name='again.jpg')
+
+    assert first['media_url'] == second['media_url']
+    assert first['media_variants'] == second['media_variants']
+    # Variants larger than a small original are the same file, listed once in the srcset
+    sizes = first['media_variants']['sizes']
+    assert sizes['card']['jpeg'] == sizes['full']['jpeg']
+    assert first['media_variants']['srcset']['jpeg'].split(', ')[1].endswith(' 300w')
+    assert len(first['media_variants']['srcset']['jpeg'].split(', ')) == 2
+
+
+def test_profile_image_variants_on_user(client, make_user, auth_headers):
+    user = make_user()
+    headers = auth_headers(user)
+
+    response = client.post('/api/profile/image', data={'image': (io.BytesIO(jpeg_bytes()), 'me.jpg')},
+                           headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    profile = client.get('/api/profile', headers=headers).get_json()
+    profile = profile.get('profile', profile)
+    variants = profile['profile_image_variants']
+    assert variants['sizes']['thumb']['width'] == 96
+    assert profile['profile_image_url'] == variants['sizes']['full']['jpeg']
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for job/candidate matching on skill bitsets
+"""
+
+import numpy as np
+from extensions import db
+from models.match import JobMatch
+from services.matching import bitsets, shared_counts, rebuild_job_matches
+
+
+def post_job(client, headers, **fields):
+    data = {'title': 'Engineer', 'company': 'Acme', 'description': 'Build things'}
+    data.update(fields)
+    response = client.post('/api/jobs', json=data, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['job']['id']
+
+
+def set_profile(client, headers, **fields):
+    response = client.put('/api/profile', json=fields, headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+
+def recommended(client, headers):
+    return client.get('/api/jobs/recommended', headers=headers).get_json()['jobs']
+
+
+def test_shared_counts_popcount_bitsets():
+    """Shared skills are counted across word boundaries"""
+    vocabulary = {f'skill{i}': i for i in range(70)}
+    jobs = bitsets([{'skill0', 'skill65', 'skill69'}, set()], vocabulary)
+    users = bitsets([{'skill0', 'skill69'}, {'skill1'}, {'skill0', 'skill65', 'skill69', 'skill3'}], vocabulary)
+
+    assert jobs.dtype == np.uint64 and jobs.shape == (2, 2)
+    assert shared_counts(jobs, users).tolist() == [[2, 0, 3], [0, 0, 0]]
+
+
+def test_job_changes_refresh_its_candidates(client, make_user, auth_headers):
+    """Posting or editing a job rescores it against users sharing its skills"""
+    poster, senior, junior, other = make_user(), make_user(), make_user(), make_user()
+    poster_headers, senior_headers = auth_headers(poster), auth_headers(senior)
+    set_profile(client, senior_headers, skills=['Python', 'SQL'], experience_years=6)
+    set_profile(client, auth_headers(junior), skills=['python'], experience_years=0)
+    set_profile(client, auth_headers(other), skills=['Cooking'])
+
+    job_id = post_job(client, poster_headers, skills=['Python', 'SQL'], experience_years=3)
+
+    candidates = client.get(f'/api/jobs/{job_id}/candidates', headers=poster_headers).get_json()['candidates']
+    assert [candidate['username'] for candidate in candidates] == ['user2', 'user3']
+    assert candidates[0]['match']['score'] == 1.0
+    assert candidates[0]['match']['matched_skills'] == 2
+    # Half the skills, three years short
+    assert abs(candidates[1]['match']['score'] - 0.5 * 0.55) < 1e-9
+    assert client.get(f'/api/jobs/{job_id}/candidates', headers=senior_headers).status_code == 403
+
+    client.put(f'/api/jobs/{job_id}', json={'skills': ['Cooking']}, headers=poster_headers)
+    candidates = client.get(f'/api/jobs/{job_id}/candidates', headers=poster_headers).get_json()['candidates']
+    assert [candidate['username'] for candidate in candidates] == ['user4']
+
+    client.delete(f'/api/jobs/{job_id}', headers=poster_headers)
+    assert JobMatch.query.count() == 0
+
+
+def test_profile_changes_refresh_recommendations(client, make_user, auth_headers):
+    """Editing skills or experience rescores only that user"""
+    poster, seeker = make_user(), make_user()
+    poster_headers, seeker_headers = auth_headers(poster), auth_headers(seeker)
+    go_job = post_job(client, poster_headers, title='Go dev', skills=['Go'])
+    python_job = post_job(client, poster_headers, title='Python dev', skills=['Python', 'Django'], experience_years=2)
+    assert recommended(client, seeker_headers) == []
+
+    set_profile(client, seeker_headers, skills=['python', 'go'])
+    jobs = recommended(client, seeker_headers)
+    assert [job['id'] for job in jobs] == [go_job, python_job]
+    assert abs(jobs[1]['match']['score'] - 0.5 * 0.7) < 1e-9
+
+    set_profile(client, seeker_headers, experience_years=5)
+    jobs = recommended(client, seeker_headers)
+    assert jobs[1]['match']['score'] == 0.5
+
+    set_profile(client, seeker_headers, skills=['Django'])
+    assert [job['id'] for job in recommended(client, seeker_headers)] == [python_job]
+
+
+def test_recommendations_do_not_scan_users(client, make_user, auth_headers, count_queries):
+    """Reading recommendations is one query against the precomputed rows"""
+    poster, seeker = make_user(), make_user()
+    seeker_headers = auth_headers(seeker)
+    set_profile(client, seeker_headers, skills=['Rust'])
+    post_job(client, auth_headers(poster), skills=['Rust'])
+
+    with count_queries() as statements:
+        jobs = recommended(client, seeker_headers)
+
+    assert len(jobs) == 1
+    assert len(statements) == 1
+
+
+def test_rebuild_matches_incremental_results(app, client, make_user, auth_headers):
+    """The batch rebuild produces the same rows as the incremental path"""
+    users = [make_user() for _ in range(5)]
+    headers = [auth_headers(user) for user in users]
+    set_profile(client, headers[1], skills=['a', 'b', 'c'], experience_years=1)
+    set_profile(client, headers[2], skills=['b'], experience_years=10)
+    set_profile(client, headers[3], skills=['c', 'd'])
+    for skills, years in ((['a', 'b'], 0), (['b', 'c', 'd'], 4), (['d'], 0), (['a', 'e'], 1)):
+        post_job(client, headers[0], skills=skills, experience_years=years)
+    post_job(client, headers[1], skills=['a'])
+
+    def snapshot():
+        db.session.expire_all()
+        return sorted((m.job_id, m.user_id, round(m.score, 6), m.matched_skills) for m in JobMatch.query.all())
+
+    incremental = snapshot()
+    db.session.query(JobMatch).delete()
+    db.session.commit()
+
+    stats = rebuild_job_matches(batch_size=2)
+
+    assert snapshot() == incremental
+    assert stats['matches'] == len(incremental)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the jobs board: faceted search, applications and permissions
+"""
+
+from services.jobs import facet_counts, parse_filters
+
+
+def post_job(client, headers, **fields):
+    data = {'title': 'Engineer', 'company': 'Acme', 'description': 'Build things'}
+    data.update(fields)
+    response = client.post('/api/jobs', json=data, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['job']['id']
+
+
+def seed_board(client, headers):
+    post_job(client, headers, location='Berlin', company_size='11-50', experience_years=1,
+             skills=['Python', 'SQL'])
+    post_job(client, headers, location='Berlin', company_size='51-200', experience_years=3,
+             skills=['python', 'Go'])
+    post_job(client, headers, location='Remote', company_size='11-50', experience_years=6,
+             skills=['Python'])
+    post_job(client, headers, location='London', company_size='1000+', experience_years=12,
+             skills=['SQL'])
+
+
+def counts(facets, name):
+    return {entry['value']: entry['count'] for entry in facets[name]}
+
+
+def test_facets_are_counted_in_one_query(client, make_user, auth_headers, count_queries):
+    """Total and every facet come back from a single database round trip"""
+    headers = auth_headers(make_user())
+    seed_board(client, headers)
+
+    with count_queries() as statements:
+        total, facets = facet_counts(parse_filters({}))
+
+    assert len(statements) == 1
+    assert total == 4
+    assert counts(facets, 'location') == {'Berlin': 2, 'Remote': 1, 'London': 1}
+    assert counts(facets, 'company_size') == {'11-50': 2, '51-200': 1, '1000+': 1}
+    assert [entry['value'] for entry in facets['experience']] == ['0-1', '2-4', '5-9', '10+']
+    assert counts(facets, 'skills') == {'python': 3, 'sql': 2, 'go': 1}
+
+
+def test_filters_narrow_results_and_other_facets(client, make_user, auth_headers):
+    """A facet's own counts ignore its selection; the others apply it"""
+    headers = auth_headers(make_user())
+    seed_board(client, headers)
+
+    body = client.get('/api/jobs?location=Berlin', headers=headers).get_json()
+
+    assert body['pagination']['total_count'] == 2
+    assert {job['location'] for job in body['jobs']} == {'Berlin'}
+    assert counts(body['facets'], 'location') == {'Berlin': 2, 'Remote': 1, 'London': 1}
+    assert counts(body['facets'], 'company_size') == {'11-50': 1, '51-200': 1}
+
+
+def test_skills_filter_requires_every_skill(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    seed_board(client, headers)
+
+    body = client.get('/api/jobs?skills=python,sql', headers=headers).get_json()
+    assert body['pagination']['total_count'] == 1
+    assert body['jobs'][0]['skills'] == ['python', 'sql']
+
+    body = client.get('/api/jobs?experience=5-9,10%2B', headers=headers).get_json()
+    assert {job['location'] for job in body['jobs']} == {'Remote', 'London'}
+
+    assert client.get('/api/jobs?experience=3-7', headers=headers).status_code == 400
+
+
+def test_apply_once(client, make_user, auth_headers):
+    """A second application is rejected and the counter moves once"""
+    poster, seeker = make_user(), make_user()
+    poster_headers, seeker_headers = auth_headers(poster), auth_headers(seeker)
+    job_id = post_job(client, poster_headers)
+
+    first = client.post(f'/api/jobs/{job_id}/apply', json={'cover_letter': 'Hi'}, headers=seeker_headers)
+    second = client.post(f'/api/jobs/{job_id}/apply', headers=seeker_headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 409
+    job = client.get(f'/api/jobs/{job_id}', headers=seeker_headers).get_json()['job']
+    assert job['applications_count'] == 1
+    assert job['has_applied'] is True
+    applications = client.get(f'/api/jobs/{job_id}/applications', headers=poster_headers).get_json()
+    assert [application['applicant']['username'] for application in applications['applications']] == ['user2']
+
+
+def test_only_the_poster_can_manage_a_job(client, make_user, auth_headers):
+    poster, other = make_user(), make_user()
+    poster_headers, other_headers = auth_headers(poster), auth_headers(other)
+    job_id = post_job(client, poster_headers, skills=['Python'])
+
+    assert client.put(f'/api/jobs/{job_id}', json={'title': 'Hacked'}, headers=other_headers).status_code == 403
+    assert client.delete(f'/api/jobs/{job_id}', headers=other_headers).status_code == 403
+    assert client.get(f'/api/jobs/{job_id}/applications', headers=other_headers).status_code == 403
+    assert client.post(f'/api/jobs/{job_id}/apply', headers=poster_headers).status_code == 400
+
+    response = client.put(f'/api/jobs/{job_id}', json={'skills': ['Go']}, headers=poster_headers)
+    assert response.get_json()['job']['skills'] == ['go']
+    assert client.get('/api/jobs?skills=python', headers=poster_headers).get_json()['jobs'] == []
+
+    assert client.delete(f'/api/jobs/{job_id}', headers=poster_headers).status_code == 200
+    assert client.get(f'/api/jobs/{job_id}', headers=other_headers).status_code == 404
+
+
+def test_invalid_job_is_rejected(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    response = client.post('/api/jobs', json={'title': 'No company', 'description': 'x'}, headers=headers)
+
+    assert response.status_code == 400
+
+
+def test_skills_facet_refines_the_selection(client, make_user, auth_headers):
+    """Skill counts apply the selected skills: each is the total after adding that skill"""
+    headers = auth_headers(make_user())
+    seed_board(client, headers)
+
+    body = client.get('/api/jobs?skills=python', headers=headers).get_json()
+    assert body['pagination']['total_count'] == 3
+    assert counts(body['facets'], 'skills') == {'python': 3, 'sql': 1, 'go': 1}
+
+    body = client.get('/api/jobs?skills=python,sql', headers=headers).get_json()
+    assert counts(body['facets'], 'skills') == {'python': 1, 'sql': 1}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the Like model, toggle semantics and atomic like counters
+"""
+
+import threading
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.like import Like
+from models.post import Post
+from models.user import User
+
+
+def test_like_endpoint_toggles(client, make_user, auth_headers):
+    """Liking twice unlikes, and the counter follows"""
+    user = make_user()
+    headers = auth_headers(user)
+    post = Post(user_id=user.id, content='Like me')
+    post.save()
+
+    first = client.post(f'/api/posts/{post.id}/like', headers=headers).get_json()
+    second = client.post(f'/api/posts/{post.id}/like', headers=headers).get_json()
+
+    assert (first['liked'], first['likes_count']) == (True, 1)
+    assert (second['liked'], second['likes_count']) == (False, 0)
+    assert Like.query.count() == 0
+
+
+def test_counter_never_goes_negative(app, make_user):
+    """Decrementing an empty counter leaves it at zero"""
+    user = make_user()
+    post = Post(user_id=user.id, content='Nobody likes me')
+    post.save()
+
+    post.decrement_likes()
+
+    assert post.likes_count == 0
+    assert db.session.scalar(db.select(Post.likes_count).where(Post.id == post.id)) == 0
+
+
+def test_counter_update_does_not_touch_updated_at(app, make_user):
+    """A like is not an edit of the post"""
+    user = make_user()
+    post = Post(user_id=user.id, content='Timestamped')
+    post.save()
+    updated_at = post.updated_at
+
+    post.increment_likes()
+    db.session.expire_all()
+
+    assert Post.query.get(post.id).updated_at == updated_at
+
+
+def test_parallel_likes_lose_no_updates(file_app, make_user):
+    """Hundreds of concurrent likes by different users all count"""
+    author = make_user('author')
+    post = Post(user_id=author.id, content='Viral post')
+    post.save()
+    post_id = post.id
+    user_ids = [make_user().id for _ in range(200)]
+    barrier = threading.Barrier(20)
+    errors = []
+
+    def like_all(ids):
+        with file_app.app_context():
+            barrier.wait()
+            for user_id in ids:
+                try:
+                    Like.toggle(user_id, post_id)
+                except Exception as e:
+                    errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=like_all, args=(user_ids[i::20],)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert errors == []
+    assert Post.query.get(post_id).likes_count == 200
+    assert Like.query.filter_by(post_id=post_id).count() == 200
+
+
+def test_duplicate_like_rows_are_rejected(app, make_user):
+    """The unique constraint allows one like per user and post"""
+    user = make_user()
+    post = Post(user_id=user.id, content='Once only')
+    post.save()
+
+    Like.toggle(user.id, post.id)
+    db.session.add(Like(user_id=user.id, post_id=post.id))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+    assert Like.liked_post_ids(user.id, [post.id]) == {post.id}
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for content-hash deduplication and garbage collection of uploaded media
+"""
+
+import hashlib
+import io
+import os
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from extensions import db
+from models.media import MediaBlob, MediaJob
+import pytest
+from services.blobs import CHUNK_SIZE, UploadTooLarge, stream_to_temp, store_upload, release_paths
+
+
+def jpeg_bytes(size=(900, 600), color=(20, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def create_post(client, headers, data, name='photo.jpg'):
+    response = client.post('/api/posts', data={'content': 'Look', 'media': (io.BytesIO(data), name)},
+                           headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['post']
+
+
+def stored_files(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'media')
+    return {
+        os.path.relpath(os.path.join(folder, name), app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        for folder, _, names in os.walk(root) for name in names
+    }
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def blob(app, url):
+    return MediaBlob.find_by_path(url.replace(app.config['UPLOAD_URL_PREFIX'], ''))
+
+
+def test_store_upload_streams_and_dedups(app):
+    data = os.urandom(CHUNK_SIZE * 3 + 17)
+    digest = hashlib.sha256(data).hexdigest()
+
+    first, created = store_upload(FileStorage(io.BytesIO(data), 'a.bin'), 'bin')
+    second, created_again = store_upload(FileStorage(io.BytesIO(data), 'b.bin'), 'bin')
+    db.session.commit()
+
+    assert (created, created_again) == (True, False)
+    assert first == second == f"media/{digest[:2]}/{digest}.bin"
+    row = MediaBlob.find_by_path(first)
+    assert (row.ref_count, row.size, row.sha256) == (2, len(data), digest)
+    # Only the blob itself is on disk; temporary files are renamed or removed
+    assert stored_files(app) == {first}
+
+
+def test_repeat_post_reuses_blob_and_variants(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = jpeg_bytes()
+
+    first = create_post(client, headers, data)
+    files = stored_files(app)
+    second = create_post(client, headers, data, name='again.jpg')
+
+    assert second['media_url'] == first['media_url']
+    assert second['media_variants'] == first['media_variants']
+    assert blob(app, first['media_url']).ref_count == 2
+    # Nothing new was written or rendered for the repost
+    assert stored_files(app) == files
+    assert MediaJob.query.filter_by(kind='post_image').count() == 1
+
+
+def test_last_reference_collects_blob_and_variants(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    data = jpeg_bytes()
+    first = create_post(client, headers, data)
+    second = create_post(client, headers, data)
+    assert stored_files(app)
+
+    assert client.delete(f"/api/posts/{first['id']}", headers=headers).status_code == 200
+    assert blob(app, first['media_url']).ref_count == 1
+    assert stored_files(app)
+
+    assert client.delete(f"/api/posts/{second['id']}", headers=headers).status_code == 200
+    assert blob(app, first['media_url']) is None
+    assert MediaBlob.query.count() == 0
+    assert stored_files(app) == set()
+
+
+def test_update_post_media_releases_old_blob(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    post = create_post(client, headers, jpeg_bytes())
+    old_url = post['media_url']
+
+    # Re-uploading the same bytes keeps a single reference
+    response = client.put(f"/api/posts/{post['id']}", headers=headers, content_type='multipart/form-data',
+                          data={'content': 'Same', 'media': (io.BytesIO(jpeg_bytes()), 'photo.jpg')})
+    assert response.status_code == 200
+    assert blob(app, old_url).ref_count == 1
+
+    response = client.put(f"/api/posts/{post['id']}", headers=headers, content_type='multipart/form-data',
+                          data={'content': 'New', 'media': (io.BytesIO(jpeg_bytes(color=(0, 0, 0))), 'new.jpg')})
+    updated = response.get_json()['post']
+
+    assert updated['media_url'] != old_url
+    assert blob(app, old_url) is None
+    assert updated['media_variants']['sizes']['full']['width'] == 900
+    assert old_url.replace(app.config['UPLOAD_URL_PREFIX'], '') not in stored_files(app)
+
+
+def test_profile_variants_are_reference_counted(app, client, make_user, auth_headers):
+    alice, bob = make_user(), make_user()
+    data = jpeg_bytes(size=(120, 120))
+    for user in (alice, bob):
+        response = client.post('/api/profile/image', data={'image': (io.BytesIO(data), 'me.jpg')},
+                               headers=auth_headers(user), content_type='multipart/form-data')
+        assert response.status_code == 202
+    db.session.expire_all()
+    url = db.session.get(type(alice), alice.id).profile_image_url
+    assert blob(app, url).ref_count == 2
+
+    client.delete('/api/profile/image', headers=auth_headers(alice))
+    assert blob(app, url).ref_count == 1
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], url.replace(app.config['UPLOAD_URL_PREFIX'], '')))
+
+    client.delete('/api/profile/image', headers=auth_headers(bob))
+    assert MediaBlob.query.count() == 0
+    assert stored_files(app) == set()
+
+
+def test_rollback_keeps_released_files(app):
+    path, _ = store_upload(FileStorage(io.BytesIO(b'kept'), 'a.txt'), 'txt')
+    db.session.commit()
+
+    assert release_paths([path]) == [path]
+    db.session.rollback()
+
+    assert MediaBlob.find_by_path(path).ref_count == 1
+    assert stored_files(app) == {path}
+
+
+def test_size_limit_is_enforced_while_reading(app):
+    stream = CountingStream(b'x' * (CHUNK_SIZE * 20))
+
+    with pytest.raises(UploadTooLarge):
+        stream_to_temp(FileStorage(stream, 'big.bin'), max_size=CHUNK_SIZE * 2)
+
+    # Reading stopped at the first chunk over the limit and nothing was left behind
+    assert stream.bytes_read == CHUNK_SIZE * 3
+    assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'media', 'tmp')) == []
+
+
+def test_profile_image_dimensions_checked_from_header(app, client, make_user, auth_headers):
+    app.config['MAX_IMAGE_PIXELS'] = 100 * 100
+    headers = auth_headers(make_user())
+
+    response = client.post('/api/profile/image', data={'image': (io.BytesIO(jpeg_bytes(size=(101, 100))), 'me.jpg')},
+                           headers=headers, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert 'megapixels' in response.get_json()['error']
+    assert MediaJob.query.count() == 0
+    assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'media', 'tmp')) == []
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for background profile image processing and job status polling
+"""
+
+import io
+import os
+import time
+from datetime import datetime, timedelta
+from PIL import Image
+from extensions import db, media
+from models.media import MediaJob
+from models.user import User
+
+
+def png_upload(size=(1200, 900), name='photo.png'):
+    buffer = io.BytesIO()
+    Image.new('RGBA', size, (200, 30, 30, 128)).save(buffer, format='PNG')
+    buffer.seek(0)
+    return {'image': (buffer, name)}
+
+
+def upload(client, headers, **kwargs):
+    return client.post('/api/profile/image', data=png_upload(**kwargs), headers=headers,
+                       content_type='multipart/form-data')
+
+
+def poll(client, headers, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        # The test client shares this session; see rows the worker committed
+        db.session.expire_all()
+        job = client.get(f'/api/media/jobs/{job_id}', headers=headers).get_json()['job']
+        if job['status'] != MediaJob.PENDING or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def upload_path(app, url):
+    return os.path.join(app.config['UPLOAD_FOLDER'], url.replace(app.config['UPLOAD_URL_PREFIX'], ''))
+
+
+def test_upload_returns_job_and_sets_image(app, client, make_user, auth_headers):
+    user = make_user()
+    headers = auth_headers(user)
+
+    response = upload(client, headers)
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status_url'] == f"/api/media/jobs/{body['job']['id']}"
+    job = poll(client, headers, body['job']['id'])
+    assert job['status'] == 'done'
+    with Image.open(upload_path(app, job['result_url'])) as image:
+        assert image.format == 'JPEG'
+        assert max(image.size) == 800
+    assert db.session.get(User, user.id).profile_image_url == job['result_url']
+    # The raw upload is not kept
+    assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'incoming')) == []
+
+
+def test_new_upload_replaces_legacy_file(app, client, make_user, auth_headers):
+    """An image stored before content addressing belongs to the user alone and is removed"""
+    user = make_user()
+    headers = auth_headers(user)
+    legacy = os.path.join(app.config['UPLOAD_FOLDER'], 'profile_images', 'old.jpg')
+    os.makedirs(os.path.dirname(legacy))
+    with open(legacy, 'wb') as f:
+        f.write(b'old')
+    user.profile_image_url = app.config['UPLOAD_URL_PREFIX'] + 'profile_images/old.jpg'
+    db.session.commit()
+
+    job = poll(client, headers, upload(client, headers, size=(100, 100)).get_json()['job']['id'])
+
+    assert job['status'] == 'done'
+    assert not os.path.exists(legacy)
+    assert os.path.exists(upload_path(app, job['result_url']))
+
+
+def test_jobs_are_private_and_expire(client, make_user, auth_headers):
+    owner, other = make_user(), make_user()
+    owner_headers = auth_headers(owner)
+    job = MediaJob(user_id=owner.id, kind='profile_image', created_at=datetime.utcnow() - timedelta(hours=1))
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    assert client.get(f'/api/media/jobs/{job_id}', headers=auth_headers(other)).status_code == 404
+    response = client.get(f'/api/media/jobs/{job_id}', headers=owner_headers).get_json()
+    assert response['job']['status'] == 'failed'
+    assert response['job']['error'] == 'Processing timed out'
+
+
+def test_invalid_image_is_rejected_up_front(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    response = client.post('/api/profile/image', data={'image': (io.BytesIO(b'not an image'), 'photo.png')},
+                           headers=headers, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert MediaJob.query.count() == 0
+
+
+def test_process_pool_runs_off_the_request(file_app, make_user, auth_headers):
+    """With a real process pool the request returns before the image exists"""
+    file_app.config['MEDIA_EXECUTOR'] = 'process'
+    media.init_app(file_app)
+    try:
+        client = file_app.test_client()
+        user = make_user()
+        headers = auth_headers(user)
+
+        response = upload(client, headers)
+
+        assert response.status_code == 202
+        assert response.get_json()['job']['status'] == 'pending'
+        job = poll(client, headers, response.get_json()['job']['id'])
+        assert job['status'] == 'done'
+        assert os.path.exists(upload_path(file_app, job['result_url']))
+    finally:
+        media.shutdown()
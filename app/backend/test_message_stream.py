@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the event bus and the server-sent message stream
+"""
+
+import json
+import os
+import socket
+import time
+
+from flask import Flask
+
+from extensions import events
+from services.events import EventBus
+from flask_jwt_extended import create_access_token
+
+
+def make_bus(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(EVENTS_BACKEND='socket', EVENTS_SOCKET_DIR=str(tmp_path / 'events'), **config)
+    return EventBus(app)
+
+
+def stream_url(client, headers):
+    response = client.post('/api/messages/stream-token', headers=headers)
+    assert response.status_code == 201
+    return f"/api/messages/stream?token={response.get_json()['token']}"
+
+
+def wait_for(subscription, timeout=2):
+    return subscription.get(timeout=timeout)
+
+
+def test_stream_pushes_sent_messages(client, make_user, auth_headers):
+    """A recipient's open stream receives the message without polling"""
+    alice, bob = make_user(), make_user()
+    alice_headers = auth_headers(alice)
+    bob_headers = {'Authorization': f'Bearer {create_access_token(identity=str(bob.id))}'}
+    conversation_id = client.post('/api/messages/conversations', headers=alice_headers,
+                                  json={'user_id': bob.id}).get_json()['conversation']['id']
+    events.heartbeat_interval = 0.05
+
+    response = client.get(stream_url(client, bob_headers), buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    frames = (frame.decode('utf-8') for frame in response.response)
+    assert next(frames).startswith('retry:')
+    assert events.stats()['streams'] == 1
+
+    client.post(f'/api/messages/{conversation_id}', headers=alice_headers, json={'content': 'Ping'})
+
+    frame = next(frame for frame in frames if not frame.startswith(':'))
+    lines = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    assert lines['event'] == 'message'
+    assert json.loads(lines['data'])['content'] == 'Ping'
+
+    response.close()
+    assert events.stats()['streams'] == 0
+
+
+def test_stream_requires_a_stream_token(app, client, make_user, auth_headers):
+    """Access tokens are refused in the URL, where they would land in access logs"""
+    headers = auth_headers(make_user())
+    access_token = headers['Authorization'].split()[1]
+    assert client.get('/api/messages/stream').status_code == 401
+    assert client.get(f'/api/messages/stream?jwt={access_token}').status_code == 401
+    assert client.get(f'/api/messages/stream?token={access_token}').status_code == 401
+    assert client.post('/api/messages/stream-token').status_code == 401
+
+    app.config['EVENTS_STREAM_TOKEN_EXPIRES'] = -1
+    assert client.get(stream_url(client, headers)).status_code == 401
+
+
+def test_queues_are_bounded_and_streams_capped(tmp_path):
+    """Slow consumers lose the oldest events; extra streams evict the oldest"""
+    bus = EventBus(Flask(__name__))
+    bus.queue_size, bus.max_streams_per_user = 2, 2
+    first = bus.subscribe(1)
+    for i in range(5):
+        bus.publish([1], 'tick', i)
+    assert first.dropped == 3
+    assert [wait_for(first)['data'] for _ in range(2)] == [3, 4]
+
+    bus.subscribe(1)
+    bus.subscribe(1)
+    assert first.closed
+    assert bus.stats()['streams'] == 2
+    bus.close()
+
+
+def test_sweeper_closes_idle_streams():
+    bus = EventBus(Flask(__name__))
+    bus.idle_timeout = 0
+    subscription = bus.subscribe(7)
+    time.sleep(0.01)
+
+    assert bus.sweep() == 1
+    assert subscription.closed
+    assert bus.stats()['streams'] == 0
+    bus.close()
+
+
+def test_socket_backend_crosses_workers(tmp_path):
+    """Events published by one bus reach streams held by another"""
+    worker_a, worker_b = make_bus(tmp_path), make_bus(tmp_path)
+    subscription = worker_b.subscribe(42)
+
+    # A socket file whose worker died is cleaned up on the next publish
+    stale_path = str(tmp_path / 'events' / 'stale.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stale.bind(stale_path)
+    stale.close()
+
+    worker_a.publish([42, 43], 'message', {'content': 'Across workers'}, event_id=9)
+
+    event = wait_for(subscription)
+    assert event == {'type': 'message', 'id': 9, 'data': {'content': 'Across workers'}}
+    assert not os.path.exists(stale_path)
+    worker_a.close()
+    worker_b.close()
+    assert not os.listdir(tmp_path / 'events')
+
+
+def test_worker_stream_limit_returns_503(app, client, make_user, auth_headers):
+    """Streams past EVENTS_MAX_STREAMS are refused so API requests keep their threads"""
+    events.max_streams, events.max_streams_per_user = 1, 1
+    alice, bob = make_user(), make_user()
+    alice_url = stream_url(client, auth_headers(alice))
+    bob_url = stream_url(client, auth_headers(bob))
+
+    first = client.get(alice_url, buffered=False)
+    assert first.status_code == 200
+
+    refused = client.get(bob_url, buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '30'
+    # A user at their own cap replaces their oldest stream without a free slot
+    second = client.get(alice_url, buffered=False)
+    assert second.status_code == 200
+    assert events.stats()['rejected'] == 1
+    first.close()
+    second.close()
+    assert client.get(bob_url, buffered=False).status_code == 200
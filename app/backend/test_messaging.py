@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for conversations, message history paging and unread counts
+"""
+
+from extensions import db
+from models.profile import Profile
+
+
+def start(client, headers, user_id):
+    response = client.post('/api/messages/conversations', headers=headers, json={'user_id': user_id})
+    assert response.status_code in (200, 201)
+    return response.get_json()['conversation']['id']
+
+
+def send(client, headers, conversation_id, content):
+    response = client.post(f'/api/messages/{conversation_id}', headers=headers, json={'content': content})
+    assert response.status_code == 201
+    return response.get_json()['message']['id']
+
+
+def conversations(client, headers):
+    return client.get('/api/messages/conversations', headers=headers).get_json()['conversations']
+
+
+def test_send_updates_last_message_and_unread(client, make_user, auth_headers):
+    """The conversation list carries the latest message and per-user unread counts"""
+    alice, bob = make_user(), make_user()
+    alice_headers, bob_headers = auth_headers(alice), auth_headers(bob)
+    bob_id = bob.id
+
+    conversation_id = start(client, alice_headers, bob_id)
+    assert start(client, bob_headers, alice.id) == conversation_id
+    send(client, alice_headers, conversation_id, 'Hi Bob')
+    send(client, alice_headers, conversation_id, 'Are you there?')
+
+    listed = conversations(client, bob_headers)
+    assert len(listed) == 1
+    assert listed[0]['unread_count'] == 2
+    assert listed[0]['last_message']['content'] == 'Are you there?'
+    assert listed[0]['participant']['username'] == 'user1'
+    assert conversations(client, alice_headers)[0]['unread_count'] == 0
+    assert conversations(client, alice_headers)[0]['participant']['id'] == bob_id
+
+    client.get(f'/api/messages/{conversation_id}', headers=bob_headers)
+    assert conversations(client, bob_headers)[0]['unread_count'] == 0
+
+
+def test_late_send_does_not_rewind_last_message(client, make_user, auth_headers):
+    """A send that lands after a newer message still counts as unread but is not shown as the latest"""
+    from models.message import ConversationParticipant
+
+    alice, bob = make_user(), make_user()
+    alice_headers, bob_headers = auth_headers(alice), auth_headers(bob)
+    conversation_id = start(client, alice_headers, bob.id)
+    first_id = send(client, alice_headers, conversation_id, 'First')
+
+    # A concurrent send with a higher id has already updated the participant rows
+    db.session.execute(db.update(ConversationParticipant)
+                         .values(last_message_id=first_id + 1000, last_message_preview='Newer'))
+    db.session.commit()
+    send(client, alice_headers, conversation_id, 'Late')
+
+    listed = conversations(client, bob_headers)[0]
+    assert listed['last_message']['id'] == first_id + 1000
+    assert listed['last_message']['content'] == 'Newer'
+    assert listed['unread_count'] == 2
+
+
+def test_history_pages_by_cursor(client, make_user, auth_headers):
+    """Walking next_cursor returns every message once, newest first"""
+    alice, bob = make_user(), make_user()
+    alice_headers = auth_headers(alice)
+    conversation_id = start(client, alice_headers, bob.id)
+    sent = [send(client, alice_headers, conversation_id, f'Message {i}') for i in range(7)]
+
+    ids, url = [], f'/api/messages/{conversation_id}?per_page=3'
+    while True:
+        data = client.get(url, headers=alice_headers).get_json()
+        ids.extend(message['id'] for message in data['messages'])
+        if not data['pagination']['has_more']:
+            break
+        url = f"/api/messages/{conversation_id}?per_page=3&cursor={data['pagination']['next_cursor']}"
+
+    assert ids == list(reversed(sent))
+
+
+def test_conversation_list_orders_by_activity(client, make_user, auth_headers, count_queries):
+    """Most recently active conversation first, fetched in a single query"""
+    me, first, second = make_user(), make_user(), make_user()
+    headers = auth_headers(me)
+    older = start(client, headers, first.id)
+    newer = start(client, headers, second.id)
+    send(client, headers, older, 'Bump')
+
+    with count_queries() as statements:
+        listed = conversations(client, headers)
+
+    assert [conversation['id'] for conversation in listed] == [older, newer]
+    assert len(statements) == 1
+
+
+def test_outsiders_and_closed_inboxes(client, make_user, auth_headers):
+    """Non-participants cannot read; users with messages off cannot be contacted"""
+    alice, bob, eve, closed = make_user(), make_user(), make_user(), make_user()
+    alice_headers, eve_headers = auth_headers(alice), auth_headers(eve)
+    conversation_id = start(client, alice_headers, bob.id)
+    db.session.add(Profile(user_id=closed.id, allow_messages=False))
+    db.session.commit()
+
+    assert client.get(f'/api/messages/{conversation_id}', headers=eve_headers).status_code == 404
+    assert client.post(f'/api/messages/{conversation_id}', headers=eve_headers,
+                       json={'content': 'Hi'}).status_code == 404
+    response = client.post('/api/messages/conversations', headers=alice_headers, json={'user_id': closed.id})
+    assert response.status_code == 403
+    response = client.post(f'/api/messages/{conversation_id}', headers=alice_headers, json={'content': '  '})
+    assert response.status_code == 400
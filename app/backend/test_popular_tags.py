@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained popular-tags counters
+"""
+
+from models.post import Post, TagCount
+
+
+def counts():
+    """Return the tag counters as a plain dict"""
+    return {row.tag: row.post_count for row in TagCount.query.all() if row.post_count}
+
+
+def test_counters_follow_create_update_and_delete(app, make_user):
+    """Counters change only for tags that were added or removed"""
+    user = make_user()
+    first = Post(user_id=user.id, content='One', tags=['python', 'flask'])
+    first.save()
+    second = Post(user_id=user.id, content='Two', tags=['Python'])
+    second.save()
+    assert counts() == {'python': 2, 'flask': 1}
+
+    first.update(tags=['flask', 'sql'])
+    assert counts() == {'python': 1, 'flask': 1, 'sql': 1}
+
+    second.delete()
+    assert counts() == {'flask': 1, 'sql': 1}
+
+    second.delete()
+    assert counts() == {'flask': 1, 'sql': 1}
+
+
+def test_popular_tags_endpoint_reads_counters(client, make_user, auth_headers, count_queries):
+    """The endpoint is a single top-K query over the counters"""
+    user = make_user()
+    for tags in (['python', 'flask'], ['python'], ['python', 'sql'], ['sql']):
+        Post(user_id=user.id, content='Tagged', tags=tags).save()
+    headers = auth_headers(user)
+
+    with count_queries() as statements:
+        response = client.get('/api/posts/popular-tags', headers=headers)
+
+    assert response.get_json()['tags'] == [
+        {'name': 'python', 'count': 3},
+        {'name': 'sql', 'count': 2},
+        {'name': 'flask', 'count': 1},
+    ]
+    assert len(statements) == 1
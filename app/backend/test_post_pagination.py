@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset (cursor) and offset pagination on GET /api/posts
+"""
+
+from datetime import datetime, timedelta
+
+from extensions import db
+from models.post import Post
+
+
+def create_posts(user, count, base_time=None):
+    """Create posts with distinct, increasing timestamps"""
+    base_time = base_time or datetime(2025, 1, 1)
+    posts = []
+    for i in range(count):
+        post = Post(user_id=user.id, content=f"Post number {i}")
+        post.created_at = base_time + timedelta(minutes=i)
+        post.likes_count = i % 3
+        db.session.add(post)
+        posts.append(post)
+    db.session.commit()
+    return posts
+
+
+def walk_cursor(client, headers, query=''):
+    """Follow next_cursor until the last page and return all post ids"""
+    ids = []
+    url = f'/api/posts?cursor=&per_page=4{query}'
+    while True:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert 'total_count' not in data['pagination']
+        ids.extend(post['id'] for post in data['posts'])
+        if not data['pagination']['has_more']:
+            assert data['pagination']['next_cursor'] is None
+            return ids
+        url = f"/api/posts?cursor={data['pagination']['next_cursor']}&per_page=4"
+
+
+def test_cursor_pages_cover_every_post_once(client, make_user, auth_headers):
+    """Cursor pages return every post exactly once in created_at order"""
+    user = make_user()
+    posts = create_posts(user, 10)
+
+    ids = walk_cursor(client, auth_headers(user))
+
+    assert ids == [post.id for post in reversed(posts)]
+
+
+def test_cursor_breaks_ties_on_id(client, make_user, auth_headers):
+    """Posts sharing a sort value are neither skipped nor repeated"""
+    user = make_user()
+    posts = create_posts(user, 9)
+
+    ids = walk_cursor(client, auth_headers(user), '&sort_by=likes_count&sort_order=asc')
+
+    expected = sorted(posts, key=lambda post: (post.likes_count, post.id))
+    assert ids == [post.id for post in expected]
+
+
+def test_offset_mode_still_reports_totals(client, make_user, auth_headers):
+    """Requests without a cursor keep the page/total_count response"""
+    user = make_user()
+    create_posts(user, 5)
+
+    response = client.get('/api/posts?page=2&per_page=2', headers=auth_headers(user))
+
+    pagination = response.get_json()['pagination']
+    assert pagination['page'] == 2
+    assert pagination['total_count'] == 5
+    assert pagination['has_more'] is True
+
+
+def test_invalid_cursor_is_rejected(client, make_user, auth_headers):
+    """Garbage cursors produce a 400 instead of a server error"""
+    user = make_user()
+
+    response = client.get('/api/posts?cursor=not-a-cursor', headers=auth_headers(user))
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
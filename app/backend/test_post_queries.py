@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Query-count tests proving post listings cost a constant number of round trips
+"""
+
+from extensions import db
+from models.post import Post
+
+
+def create_posts_by_distinct_authors(make_user, count):
+    """Create one post per freshly created author"""
+    posts = []
+    for _ in range(count):
+        author = make_user()
+        post = Post(user_id=author.id, content=f"Hello from {author.username}")
+        db.session.add(post)
+        posts.append(post)
+    db.session.commit()
+    db.session.expire_all()
+    return posts
+
+
+def page_query_count(client, headers, count_queries, url):
+    """Return the number of SQL statements needed to render one page"""
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_get_posts_offset_page_has_constant_query_count(client, make_user, auth_headers, count_queries):
+    """A full offset page needs the same queries as a tiny one"""
+    viewer = make_user('viewer')
+    headers = auth_headers(viewer)
+    create_posts_by_distinct_authors(make_user, 3)
+    small_count, _ = page_query_count(client, headers, count_queries, '/api/posts?per_page=50')
+
+    create_posts_by_distinct_authors(make_user, 12)
+    large_count, data = page_query_count(client, headers, count_queries, '/api/posts?per_page=50')
+
+    assert len(data['posts']) == 15
+    assert all(post['user']['username'] for post in data['posts'])
+    assert large_count == small_count <= 2
+
+
+def test_get_posts_cursor_page_is_single_query(client, make_user, auth_headers, count_queries):
+    """Cursor mode renders a page, authors included, in one statement"""
+    viewer = make_user('viewer')
+    create_posts_by_distinct_authors(make_user, 12)
+
+    statements, data = page_query_count(client, auth_headers(viewer), count_queries, '/api/posts?cursor=&per_page=12')
+
+    assert len(data['posts']) == 12
+    assert statements == 1
+
+
+def test_feed_and_user_listings_load_authors_eagerly(app, make_user, count_queries):
+    """Model listing helpers serialize without lazy author loads"""
+    posts = create_posts_by_distinct_authors(make_user, 10)
+    author_id = posts[0].user_id
+    db.session.expire_all()
+
+    with count_queries() as statements:
+        feed = [post.to_dict() for post in Post.get_feed_posts(user_id=author_id)]
+    assert len(feed) == 10
+    assert len(statements) == 1
+
+    db.session.expire_all()
+    with count_queries() as statements:
+        own = [post.to_dict() for post in Post.find_by_user(author_id)]
+    assert own[0]['user']['id'] == author_id
+    assert len(statements) == 1
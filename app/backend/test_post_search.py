@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for full-text post search behind GET /api/posts?search=
+"""
+
+from extensions import db
+from models.post import Post
+from services.search import get_search_backend, tokenize_query
+
+
+def create_post(user, content):
+    post = Post(user_id=user.id, content=content)
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def search(client, headers, query):
+    response = client.get(f'/api/posts?{query}', headers=headers)
+    assert response.status_code == 200
+    return [post['id'] for post in response.get_json()['posts']]
+
+
+def test_sqlite_uses_fts5_backend(app):
+    """The SQLite dev database is served by the FTS5 backend"""
+    assert get_search_backend().name == 'sqlite-fts5'
+
+
+def test_migration_indexes_existing_posts(app, client, make_user, auth_headers):
+    """Posts written before the index existed are found once the migration has run"""
+    from flask_migrate import downgrade, stamp, upgrade
+
+    user = make_user()
+    headers = auth_headers(user)
+    # The test database is built by create_all, which already has the index
+    stamp(revision='e9b3c5d71a46')
+    downgrade(revision='c4a8e2f17b60')
+    post = create_post(user, 'Written before full-text search existed')
+
+    upgrade()
+
+    assert search(client, headers, 'search=existed') == [post.id]
+
+
+def test_tokenize_query_strips_operators():
+    """Search syntax characters never reach the database"""
+    assert tokenize_query('"python" OR (flask*') == ['python', 'OR', 'flask']
+    assert tokenize_query('  --  ') == []
+
+
+def test_search_follows_inserts_and_edits(client, make_user, auth_headers):
+    """The index is updated on post create and content edits"""
+    user = make_user()
+    headers = auth_headers(user)
+    post = create_post(user, 'Hiring a senior Python engineer')
+    create_post(user, 'Weekend hiking photos')
+
+    assert search(client, headers, 'search=python') == [post.id]
+
+    post.update(content='Hiring a senior Rust engineer')
+    assert search(client, headers, 'search=python') == []
+    assert search(client, headers, 'search=rust') == [post.id]
+
+
+def test_search_requires_all_words_and_completes_the_last(client, make_user, auth_headers):
+    """Every word must match, and the last word matches as a prefix"""
+    user = make_user()
+    headers = auth_headers(user)
+    both = create_post(user, 'Distributed systems reading group')
+    create_post(user, 'Distributed teams and remote work')
+
+    assert search(client, headers, 'search=distributed%20sys') == [both.id]
+
+
+def test_relevance_sort_ranks_better_matches_first(client, make_user, auth_headers):
+    """sort_by=relevance orders results by search score"""
+    user = make_user()
+    headers = auth_headers(user)
+    strong = create_post(user, 'kubernetes kubernetes kubernetes operators')
+    weak = create_post(user, 'A long post about many topics that mentions kubernetes once among other things')
+
+    assert search(client, headers, 'search=kubernetes&sort_by=relevance') == [strong.id, weak.id]
+
+
+def test_soft_deleted_posts_are_not_returned(client, make_user, auth_headers):
+    """Inactive posts stay hidden even though their text is indexed"""
+    user = make_user()
+    headers = auth_headers(user)
+    post = create_post(user, 'Temporary announcement')
+    post.delete()
+
+    assert search(client, headers, 'search=announcement') == []
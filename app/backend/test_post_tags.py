@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the normalized post_tags index and tag filtering on GET /api/posts
+"""
+
+from extensions import db
+from models.post import Post, PostTag
+
+
+def tags_for(post):
+    """Return the indexed tags of a post"""
+    return sorted(row.tag for row in PostTag.query.filter_by(post_id=post.id))
+
+
+def test_tag_index_follows_create_and_update(app, make_user):
+    """Creating and updating a post keeps its post_tags rows in sync"""
+    user = make_user()
+    post = Post(user_id=user.id, content='Tagged', tags=['Python', 'flask', 'python '])
+    post.save()
+    assert tags_for(post) == ['flask', 'python']
+
+    post.update(tags=['flask', 'SQL'])
+    assert tags_for(post) == ['flask', 'sql']
+
+    post.update(tags=[])
+    assert tags_for(post) == []
+
+
+def test_tag_filter_matches_whole_tags_only(client, make_user, auth_headers):
+    """Filtering by 'java' does not return posts tagged 'javascript'"""
+    user = make_user()
+    java = Post(user_id=user.id, content='JVM', tags=['java', 'backend'])
+    javascript = Post(user_id=user.id, content='Browser', tags=['javascript'])
+    db.session.add_all([java, javascript])
+    db.session.commit()
+
+    response = client.get('/api/posts?tags=Java', headers=auth_headers(user))
+
+    assert [post['id'] for post in response.get_json()['posts']] == [java.id]
+
+
+def test_tag_filter_requires_every_tag(client, make_user, auth_headers):
+    """Several tags are combined with AND semantics"""
+    user = make_user()
+    both = Post(user_id=user.id, content='Both', tags=['java', 'backend'])
+    one = Post(user_id=user.id, content='One', tags=['java'])
+    db.session.add_all([both, one])
+    db.session.commit()
+
+    response = client.get('/api/posts?tags=java,backend', headers=auth_headers(user))
+
+    assert [post['id'] for post in response.get_json()['posts']] == [both.id]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for caching, conditional and range requests on /uploads
+"""
+
+import hashlib
+import io
+import os
+from werkzeug.datastructures import FileStorage
+from extensions import db
+from services.blobs import store_upload
+
+
+def stored_blob(app, data=bytes(range(256)) * 40, extension='mp4'):
+    path, _ = store_upload(FileStorage(io.BytesIO(data), 'clip.' + extension), extension)
+    db.session.commit()
+    return '/uploads/' + path, data
+
+
+def legacy_file(app, name='posts/old.jpg', data=b'legacy bytes'):
+    full_path = os.path.join(app.config['UPLOAD_FOLDER'], name)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb') as f:
+        f.write(data)
+    return '/uploads/' + name
+
+
+def test_content_addressed_files_are_immutable(app, client):
+    url, data = stored_blob(app)
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.headers['ETag'] == f'"{hashlib.sha256(data).hexdigest()}"'
+    cache_control = response.headers['Cache-Control']
+    assert 'immutable' in cache_control and 'max-age=31536000' in cache_control
+    assert 'no-cache' not in cache_control
+
+
+def test_conditional_get_returns_304(app, client):
+    url, _ = stored_blob(app)
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_range_requests_for_seeking(app, client):
+    url, data = stored_blob(app)
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == data[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(data)}'
+
+    # A stale If-Range validator gets the whole file instead of a mismatched slice
+    stale = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"other"'})
+    assert stale.status_code == 200 and stale.data == data
+    fresh = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': etag})
+    assert fresh.status_code == 206 and fresh.data == data[:10]
+
+    assert client.get(url, headers={'Range': f'bytes={len(data)}-'}).status_code == 416
+
+
+def test_legacy_files_revalidate(app, client):
+    url = legacy_file(app)
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers['Cache-Control']
+    assert f"max-age={app.config['UPLOADS_MAX_AGE']}" in response.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_private_and_missing_files_are_not_served(app, client):
+    assert client.get(legacy_file(app, name='incoming/raw.png')).status_code == 404
+    assert client.get('/uploads/./incoming/raw.png').status_code == 404
+    assert client.get('/uploads/x/../incoming/raw.png').status_code == 404
+    assert client.get('/uploads/media/ab/missing.jpg').status_code == 404
+    assert client.get('/uploads/../config.py').status_code == 404
+
+
+def test_x_accel_redirect_mode(app, client):
+    app.config['UPLOADS_SENDFILE'] = 'x-accel-redirect'
+    url, data = stored_blob(app)
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == '/internal-uploads/' + url[len('/uploads/'):]
+    assert response.headers['Content-Type'] == 'video/mp4'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_x_sendfile_mode(app, client):
+    app.config['UPLOADS_SENDFILE'] = 'x-sendfile'
+    url = legacy_file(app)
+
+    response = client.get(url)
+
+    assert response.data == b''
+    assert response.headers['X-Sendfile'] == os.path.join(app.config['UPLOAD_FOLDER'], 'posts', 'old.jpg')
+    assert response.headers['ETag']
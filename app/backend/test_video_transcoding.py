@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for background video transcoding and poster frames on posts
+"""
+
+import io
+import json
+import os
+import subprocess
+import time
+import pytest
+from PIL import Image
+from extensions import db, videos
+from models.media import MediaBlob, MediaJob
+from models.post import Post
+from services.videos import EncoderError, FfmpegEncoder
+
+
+def create_video_post(client, headers, data=b'RIFF fake avi payload', name='clip.avi'):
+    response = client.post('/api/posts', data={'content': 'Watch', 'media': (io.BytesIO(data), name)},
+                           headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['post']
+
+
+def stored_path(app, url):
+    return os.path.join(app.config['UPLOAD_FOLDER'], url.replace(app.config['UPLOAD_URL_PREFIX'], ''))
+
+
+def stored_files(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'media')
+    return [name for _, _, names in os.walk(root) for name in names]
+
+
+def test_video_is_normalized_with_poster_and_metadata(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    post = create_video_post(client, headers)
+
+    assert post['media_type'] == 'video'
+    assert post['media_url'].endswith('.mp4')
+    assert (post['media_duration'], post['media_width'], post['media_height']) == (2.0, 640, 360)
+    with Image.open(stored_path(app, post['media_poster_url'])) as poster:
+        assert (poster.format, poster.size) == ('JPEG', (640, 360))
+    assert MediaJob.query.filter_by(kind='post_video').one().status == 'done'
+    # The uploaded AVI was only needed until the transcode finished
+    assert sorted(name.rsplit('.', 1)[1] for name in stored_files(app)) == ['jpg', 'mp4']
+
+
+def test_deleting_video_post_collects_its_files(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    post = create_video_post(client, headers, name='clip.mp4')
+
+    assert client.delete(f"/api/posts/{post['id']}", headers=headers).status_code == 200
+
+    assert MediaBlob.query.count() == 0
+    assert stored_files(app) == []
+
+
+def test_unreadable_video_fails_job_and_keeps_upload(app, client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+
+    post = create_video_post(client, headers, data=b'')
+
+    # The job was failed from the pipeline's own session
+    db.session.expire_all()
+    job = MediaJob.query.filter_by(kind='post_video').one()
+    assert job.status == 'failed'
+    assert job.error == 'No video stream found'
+    assert post['media_url'].endswith('.avi')
+    assert post['media_poster_url'] is None
+
+
+def test_ffmpeg_encoder_commands(monkeypatch, tmp_path):
+    commands = []
+
+    def fake_run(command, **kwargs):
+        commands.append(command)
+        stdout = json.dumps({'streams': [{'width': 1280, 'height': 720}], 'format': {'duration': '12.5'}})
+        return subprocess.CompletedProcess(command, 0, stdout=stdout.encode(), stderr=b'')
+
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+    encoder = FfmpegEncoder(max_width=1280)
+
+    encoder.transcode('in.avi', 'out.mp4')
+    info = encoder.probe('out.mp4')
+
+    transcode = commands[0]
+    assert transcode[transcode.index('-movflags') + 1] == '+faststart'
+    assert transcode[transcode.index('-c:v') + 1] == 'libx264'
+    assert info == {'duration': 12.5, 'width': 1280, 'height': 720}
+
+
+def test_ffmpeg_errors_surface_as_encoder_errors(monkeypatch):
+    def failing_run(command, **kwargs):
+        raise subprocess.CalledProcessError(1, command, stderr=b'in.avi: Invalid data found when processing input\n')
+
+    monkeypatch.setattr(subprocess, 'run', failing_run)
+
+    with pytest.raises(EncoderError) as raised:
+        FfmpegEncoder().transcode('in.avi', 'out.mp4')
+    assert str(raised.value) == 'in.avi: Invalid data found when processing input'
+
+
+def test_videos_are_kept_as_uploaded_without_an_encoder(app, client, make_user, auth_headers):
+    app.config['VIDEO_ENCODER'] = 'none'
+    headers = auth_headers(make_user())
+
+    post = create_video_post(client, headers)
+
+    assert post['media_url'].endswith('.avi')
+    assert post['media_poster_url'] is None
+    assert MediaJob.query.count() == 0
+    assert client.get(post['media_url']).status_code == 200
+
+
+def test_transcodes_run_in_their_own_process_pool(file_app, make_user, auth_headers):
+    file_app.config['VIDEO_EXECUTOR'] = 'process'
+    videos.init_app(file_app)
+    try:
+        client = file_app.test_client()
+        headers = auth_headers(make_user())
+
+        post = create_video_post(client, headers)
+        assert post['media_url'].endswith('.avi')
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            if db.session.get(Post, post['id']).media_poster_url:
+                break
+            time.sleep(0.05)
+        assert db.session.get(Post, post['id']).media_url.endswith('.mp4')
+        assert MediaJob.query.filter_by(kind='post_video').one().status == 'done'
+    finally:
+        videos.shutdown()
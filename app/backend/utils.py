@@ -1,10 +1,11 @@
 import os
 import uuid
+import json
+import base64
 import hashlib
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from PIL import Image
-import io
 from flask import current_app
 import re
 
@@ -13,38 +14,25 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-def validate_file_size(file):
-    """Validate file size"""
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    file.seek(0)  # Reset file pointer
-    
-    max_size = current_app.config['MAX_CONTENT_LENGTH']
-    if size > max_size:
-        return False, f"File size exceeds maximum limit of {max_size // (1024*1024)}MB"
+def probe_image(path):
+    """Validate an image on disk from its header alone; the media pipeline does the one full decode"""
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            width, height = image.size
+    except Exception:
+        # Includes Pillow's DecompressionBombError for absurd dimensions
+        return False, "Invalid image file. Please upload a valid image."
     
-    return True, None
-
-def validate_image_file(file):
-    """Validate image file type and content"""
-    # Check file extension
-    if not allowed_file(file.filename):
-        return False, "File type not allowed. Please upload PNG, JPG, JPEG, GIF, or WebP files."
+    if image_format not in ('PNG', 'JPEG', 'GIF', 'WEBP'):
+        return False, "Invalid image file. Please upload a valid image."
     
-    # Check file size
-    valid, error = validate_file_size(file)
-    if not valid:
-        return False, error
+    # Decoded size, not file size, decides how much memory the worker needs
+    max_pixels = current_app.config['MAX_IMAGE_PIXELS']
+    if width * height > max_pixels:
+        return False, f"Image dimensions too large. Maximum is {max_pixels // 1000000} megapixels."
     
-    # Validate image content
-    try:
-        file.seek(0)
-        image = Image.open(file)
-        image.verify()  # Verify it's actually an image
-        file.seek(0)  # Reset file pointer
-        return True, None
-    except Exception as e:
-        return False, "Invalid image file. Please upload a valid image."
+    return True, None
 
 def generate_unique_filename(original_filename):
     """Generate unique filename with timestamp and UUID"""
@@ -54,59 +42,46 @@ def generate_unique_filename(original_filename):
     
     return f"{timestamp}_{unique_id}.{extension}"
 
-def process_image(image_file, max_size=(800, 800), quality=85):
-    """Process and optimize image"""
-    try:
-        # Open image
-        image = Image.open(image_file)
-        
-        # Convert to RGB if necessary (for JPEG compatibility)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Create white background for transparent images
-            background = Image.new('RGB', image.size)
-            background.paste((255, 255, 255), (0, 0, image.size[0], image.size[1]))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        
-        # Resize if larger than max_size
-        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Save optimized image to bytes
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=quality, optimize=True)
-        output.seek(0)
-        
-        return output
-    except Exception as e:
-        raise ValueError(f"Failed to process image: {str(e)}")
+def flatten_image(image):
+    """Composite transparent images onto white (for JPEG compatibility)"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Create white background for transparent images
+        background = Image.new('RGB', image.size)
+        background.paste((255, 255, 255), (0, 0, image.size[0], image.size[1]))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        return background
+    return image
 
-def save_uploaded_file(file, subfolder=''):
-    """Save uploaded file to disk"""
-    # Ensure upload directory exists
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    if subfolder:
-        upload_folder = os.path.join(upload_folder, subfolder)
-    
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Generate unique filename
-    filename = generate_unique_filename(file.filename)
-    filepath = os.path.join(upload_folder, filename)
-    
-    # Save file
-    file.save(filepath)
-    
-    # Return relative path for URL generation
-    relative_path = os.path.join(subfolder, filename) if subfolder else filename
-    return relative_path
+def image_variants_dict(raw_variants):
+    """Decode a stored variants map and add srcset strings per format, or None"""
+    try:
+        sizes = json.loads(raw_variants) if raw_variants else None
+    except (json.JSONDecodeError, TypeError):
+        sizes = None
+    if not sizes:
+        return None
+    
+    # Small originals give several variants of the same width; list each width once
+    ordered = sorted({variant['width']: variant for variant in sizes.values()}.values(),
+                     key=lambda variant: variant['width'])
+    srcset = {}
+    for image_format in ('webp', 'jpeg'):
+        srcset[image_format] = ', '.join(
+            f"{variant[image_format]} {variant['width']}w" for variant in ordered if variant.get(image_format)
+        )
+    return {'sizes': sizes, 'srcset': srcset}
 
 def get_file_url(filepath):
     """Generate URL for uploaded file"""
     return current_app.config['UPLOAD_URL_PREFIX'] + filepath
 
+def get_file_path(file_url):
+    """Path relative to UPLOAD_FOLDER of a URL built by get_file_url"""
+    prefix = current_app.config['UPLOAD_URL_PREFIX']
+    return file_url[len(prefix):] if file_url.startswith(prefix) else file_url
+
 def delete_file(filepath):
     """Delete file from disk"""
     try:
@@ -118,6 +93,32 @@ def delete_file(filepath):
         print(f"Error deleting file {filepath}: {str(e)}")
         return False
 
+def encode_cursor(payload):
+    """Encode a keyset pagination position as an opaque URL-safe token"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    
+    return payload
+
+def decode_time_cursor(token):
+    """Decode a {'t': ISO timestamp, 'id': int} keyset cursor; raises ValueError"""
+    cursor = decode_cursor(token)
+    if not isinstance(cursor.get('t'), str) or not isinstance(cursor.get('id'), int):
+        raise ValueError("Invalid cursor")
+    datetime.fromisoformat(cursor['t'])
+    return cursor
+
 def validate_phone_number(phone):
     """Validate phone number format"""
     if not phone:
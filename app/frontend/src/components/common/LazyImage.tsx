@@ -2,6 +2,8 @@ import React, { useState, useRef, useEffect } from 'react';
 
 interface LazyImageProps {
   src: string;
+  srcSet?: string;
+  sizes?: string;
   alt: string;
   className?: string;
   placeholder?: string;
@@ -11,6 +13,8 @@ interface LazyImageProps {
 
 const LazyImage: React.FC<LazyImageProps> = ({
   src,
+  srcSet,
+  sizes,
   alt,
   className = '',
   placeholder = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjNmNGY2Ii8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCwgc2Fucy1zZXJpZiIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5YWFhYSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkxvYWRpbmcuLi48L3RleHQ+PC9zdmc+',
@@ -63,6 +67,8 @@ const LazyImage: React.FC<LazyImageProps> = ({
     <img
       ref={imgRef}
       src={isInView && !hasError ? src : placeholder}
+      srcSet={isInView && !hasError ? srcSet : undefined}
+      sizes={srcSet ? sizes : undefined}
       alt={alt}
       className={`transition-opacity duration-300 ${className} ${
         isLoaded ? 'opacity-100' : 'opacity-0'
@@ -1,8 +1,10 @@
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
 
 export const feedApi = {
-  getFeed: async () => {
-    const response = await fetch(`${API_URL}/feed`, {
+  // Newest first; pass the previous page's pagination.next_cursor to load more
+  getFeed: async (cursor?: string) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`${API_URL}/api/feed${query}`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
@@ -10,12 +12,23 @@ export const feedApi = {
     return response.json();
   },
 
-  getFeedByUser: async (userId: number) => {
-    const response = await fetch(`${API_URL}/feed/user/${userId}`, {
+  // Ordered by relevance score instead of time
+  getRankedFeed: async (page = 1) => {
+    const response = await fetch(`${API_URL}/api/feed/ranked?page=${page}`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
     });
     return response.json();
   },
-}; 
\ No newline at end of file
+
+  getFeedByUser: async (userId: number, cursor?: string) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`${API_URL}/api/feed/user/${userId}${query}`, {
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`,
+      },
+    });
+    return response.json();
+  },
+};
\ No newline at end of file
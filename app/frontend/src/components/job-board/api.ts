@@ -1,8 +1,45 @@
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
 
+export interface JobFilters {
+  q?: string;
+  location?: string[];
+  company_size?: string[];
+  experience?: string[];
+  skills?: string[];
+  employment_type?: string[];
+  page?: number;
+  per_page?: number;
+}
+
 export const jobsApi = {
-  getJobs: async () => {
-    const response = await fetch(`${API_URL}/jobs`, {
+  getJobs: async (filters: JobFilters = {}) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (Array.isArray(value)) {
+        if (value.length) params.set(key, value.join(','));
+      } else if (value !== undefined && value !== '') {
+        params.set(key, String(value));
+      }
+    });
+    const response = await fetch(`${API_URL}/api/jobs?${params.toString()}`, {
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`,
+      },
+    });
+    return response.json();
+  },
+
+  getRecommendedJobs: async (limit = 20) => {
+    const response = await fetch(`${API_URL}/api/jobs/recommended?limit=${limit}`, {
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`,
+      },
+    });
+    return response.json();
+  },
+
+  getTopCandidates: async (jobId: number, limit = 20) => {
+    const response = await fetch(`${API_URL}/api/jobs/${jobId}/candidates?limit=${limit}`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
@@ -11,7 +48,7 @@ export const jobsApi = {
   },
 
   getJob: async (jobId: number) => {
-    const response = await fetch(`${API_URL}/jobs/${jobId}`, {
+    const response = await fetch(`${API_URL}/api/jobs/${jobId}`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
@@ -19,13 +56,15 @@ export const jobsApi = {
     return response.json();
   },
 
-  applyForJob: async (jobId: number) => {
-    const response = await fetch(`${API_URL}/jobs/${jobId}/apply`, {
+  applyForJob: async (jobId: number, coverLetter?: string) => {
+    const response = await fetch(`${API_URL}/api/jobs/${jobId}/apply`, {
       method: 'POST',
       headers: {
+        'Content-Type': 'application/json',
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
+      body: JSON.stringify({ cover_letter: coverLetter }),
     });
     return response.json();
   },
-}; 
\ No newline at end of file
+};
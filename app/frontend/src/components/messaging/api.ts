@@ -2,7 +2,7 @@ const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
 
 export const messagingApi = {
   getConversations: async () => {
-    const response = await fetch(`${API_URL}/messages/conversations`, {
+    const response = await fetch(`${API_URL}/api/messages/conversations`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
@@ -11,7 +11,7 @@ export const messagingApi = {
   },
 
   getMessages: async (conversationId: number) => {
-    const response = await fetch(`${API_URL}/messages/${conversationId}`, {
+    const response = await fetch(`${API_URL}/api/messages/${conversationId}`, {
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
       },
@@ -20,7 +20,7 @@ export const messagingApi = {
   },
 
   sendMessage: async (conversationId: number, content: string) => {
-    const response = await fetch(`${API_URL}/messages/${conversationId}`, {
+    const response = await fetch(`${API_URL}/api/messages/${conversationId}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -30,4 +30,47 @@ export const messagingApi = {
     });
     return response.json();
   },
+
+  // Server-sent events: calls onMessage for each new message, returns an unsubscribe function
+  subscribe: (onMessage: (message: any) => void) => {
+    let source: EventSource | undefined;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let stopped = false;
+    const connect = async () => {
+      // EventSource cannot send headers: trade the access token for a short-lived stream token
+      let streamToken = '';
+      try {
+        const response = await fetch(`${API_URL}/api/messages/stream-token`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('token')}`,
+          },
+        });
+        streamToken = (await response.json()).token;
+      } catch {
+        // Offline or signed out: retried below
+      }
+      if (stopped) return;
+      if (!streamToken) {
+        retryTimer = setTimeout(connect, 30000);
+        return;
+      }
+      let opened = false;
+      source = new EventSource(`${API_URL}/api/messages/stream?token=${encodeURIComponent(streamToken)}`);
+      source.onopen = () => { opened = true; };
+      source.addEventListener('message', (event) => onMessage(JSON.parse((event as MessageEvent).data)));
+      // The stream token is only good for a minute, so every reconnect fetches a new one. A stream
+      // that never opened (503: server at its stream limit) waits before trying again
+      source.onerror = () => {
+        source?.close();
+        retryTimer = setTimeout(connect, opened ? 1000 : 30000);
+      };
+    };
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  },
 }; 
\ No newline at end of file
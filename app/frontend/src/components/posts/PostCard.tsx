@@ -36,7 +36,9 @@ const PostCard: React.FC<PostCardProps> = ({ post, onLike, likedPosts }) => {
     if (post.media_type === 'image') {
       return (
         <LazyImage 
-          src={post.media_url} 
+          src={post.media_variants?.sizes.card.jpeg || post.media_url} 
+          srcSet={post.media_variants?.srcset.webp}
+          sizes="(max-width: 640px) 100vw, 640px"
           alt="Post media" 
           className="w-full h-auto rounded-lg max-h-96 object-cover"
         />
@@ -45,6 +47,10 @@ const PostCard: React.FC<PostCardProps> = ({ post, onLike, likedPosts }) => {
       return (
         <video 
           controls 
+          preload={post.media_poster_url ? 'none' : 'metadata'}
+          poster={post.media_poster_url || undefined}
+          width={post.media_width || undefined}
+          height={post.media_height || undefined}
           className="w-full h-auto rounded-lg max-h-96"
         >
           <source src={post.media_url} type="video/mp4" />
@@ -78,7 +84,7 @@ const PostCard: React.FC<PostCardProps> = ({ post, onLike, likedPosts }) => {
           <div className="w-10 h-10 bg-blue-500 rounded-full flex items-center justify-center overflow-hidden">
             {post.user?.profile_image_url ? (
               <LazyImage 
-                src={post.user.profile_image_url} 
+                src={post.user.profile_image_variants?.sizes.thumb.jpeg || post.user.profile_image_url} 
                 alt={post.user.username}
                 className="w-10 h-10 rounded-full object-cover"
               />
@@ -119,7 +119,7 @@ const PostCreate: React.FC<PostCreateProps> = ({ onPostCreated, onCancel }) => {
       formDataToSend.append('visibility', formData.visibility);
       
       if (formData.media) {
-        formDataToSend.append('media', formData.media);
+        formDataToSend.append('media_upload', await postsApi.uploadMedia(formData.media));
       }
 
       await postsApi.createPost(formDataToSend);
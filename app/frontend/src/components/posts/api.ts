@@ -1,3 +1,5 @@
+import type { MediaUploadTicket } from '../../types';
+
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
 
 export const postsApi = {
@@ -18,6 +20,39 @@ export const postsApi = {
     return response.json();
   },
 
+  // Sends the file straight to storage and returns the ticket token to attach as `media_upload`
+  uploadMedia: async (file: File): Promise<string> => {
+    // The storage checks the bytes it receives against this digest
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    const sha256 = Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+    const ticketResponse = await fetch(`${API_URL}/api/posts/media-uploads`, {
+      method: 'POST',
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`,
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ filename: file.name, content_type: file.type, size: file.size, sha256 }),
+    });
+    
+    if (!ticketResponse.ok) {
+      const error = await ticketResponse.json();
+      throw new Error(error.error || 'Failed to start media upload');
+    }
+    
+    const { upload }: { upload: MediaUploadTicket } = await ticketResponse.json();
+    const uploadResponse = await fetch(new URL(upload.url, API_URL).toString(), {
+      method: upload.method,
+      headers: upload.headers,
+      body: file,
+    });
+    
+    if (!uploadResponse.ok) {
+      throw new Error('Failed to upload media');
+    }
+    
+    return upload.token;
+  },
+
   getPosts: async (params?: { 
     page?: number; 
     per_page?: number; 
@@ -37,10 +37,22 @@ export interface ProfileResponse {
   message?: string;
 }
 
+export interface MediaJob {
+  id: number;
+  kind: string;
+  status: 'pending' | 'done' | 'failed' | 'cancelled';
+  result_url: string | null;
+  error: string | null;
+  created_at: string;
+  finished_at: string | null;
+}
+
 export interface ImageUploadResponse {
   success: boolean;
   message: string;
-  image_url: string;
+  image_url: string | null;
+  job: MediaJob;
+  status_url: string;
 }
 
 export interface ErrorResponse {
@@ -121,11 +133,30 @@ export const uploadProfileImage = async (file: File): Promise<string> => {
       throw new Error(data.error || `HTTP ${response.status}: ${response.statusText}`);
     }
     
-    if (data.success) {
-      return data.image_url;
-    } else {
+    if (!data.success) {
       throw new Error('Failed to upload image');
     }
+    
+    // The image is processed in the background; poll until it is ready
+    let job = data.job;
+    const deadline = Date.now() + 60000;
+    while (job && job.status === 'pending') {
+      if (Date.now() > deadline) {
+        throw new Error('Image processing is taking too long. Please try again.');
+      }
+      await new Promise(resolve => setTimeout(resolve, 500));
+      const statusResponse = await fetch(`${API_URL}${data.status_url}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      });
+      job = (await statusResponse.json()).job;
+    }
+    
+    if (!job || job.status !== 'done') {
+      throw new Error(job?.error || 'Failed to process image');
+    }
+    return job.result_url;
   } catch (error) {
     console.error('Error uploading profile image:', error);
     throw error;
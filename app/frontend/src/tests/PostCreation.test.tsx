@@ -8,6 +8,7 @@ import { AuthProvider } from '../context/AuthContext';
 jest.mock('../components/posts/api', () => ({
   postsApi: {
     createPost: jest.fn(),
+    uploadMedia: jest.fn().mockResolvedValue('upload-token'),
   },
 }));
 
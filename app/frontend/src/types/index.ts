@@ -85,6 +85,18 @@ export interface Education {
   current: boolean;
 }
 
+export interface ImageVariant {
+  width: number;
+  height: number;
+  jpeg: string;
+  webp: string;
+}
+
+export interface ImageVariants {
+  sizes: Record<'thumb' | 'card' | 'full', ImageVariant>;
+  srcset: { jpeg: string; webp: string };
+}
+
 export interface Post {
   id: number;
   user_id: number;
@@ -92,6 +104,11 @@ export interface Post {
   rich_content?: string;
   media_url?: string;
   media_type?: 'image' | 'video';
+  media_variants?: ImageVariants | null;
+  media_poster_url?: string | null;
+  media_duration?: number | null;
+  media_width?: number | null;
+  media_height?: number | null;
   likes: number;
   comments: Comment[];
   tags: string[];
@@ -105,9 +122,20 @@ export interface Post {
     first_name?: string;
     last_name?: string;
     profile_image_url?: string;
+    profile_image_variants?: ImageVariants | null;
   };
 }
 
+export interface MediaUploadTicket {
+  token: string;
+  url: string;
+  method: 'PUT';
+  headers: Record<string, string>;
+  size: number;
+  media_type: 'image' | 'video';
+  expires_in: number;
+}
+
 export interface Comment {
   id: number;
   user_id: number;